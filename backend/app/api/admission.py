@@ -0,0 +1,197 @@
+"""Admission control: shed low-priority requests before the connection pool saturates.
+
+Without it a burst queues every request behind ``get_db`` until the pool
+timeout (30 s by default) and latency explodes for all of them. Here each
+request class gets a share of a concurrency limit:
+
+* ``critical`` — order state transitions (pay, cancel, ship, complete), which
+  may use the whole limit and wait briefly for a slot instead of failing;
+* ``write`` — other mutations;
+* ``read`` — everything else under ``/api``.
+
+Read and write requests over their share, or arriving while every pool
+connection is checked out, are rejected at once with 503 and ``Retry-After``.
+The limit itself adapts (AIMD): it grows by ``1/limit`` per request that
+finishes within the target latency and shrinks by ``backoff`` when requests
+run slower than that or the pool is saturated.
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+RETRY_AFTER_SECONDS = 1
+
+# The event stream holds its request open for hours and would pin a slot
+_EXEMPT = {"/api/orders/stream"}
+_TRANSITION = re.compile(r"^/api/orders/[^/]+/(pay|cancel|ship|complete)$")
+
+
+class Priority(str, Enum):
+    READ = "read"
+    WRITE = "write"
+    CRITICAL = "critical"
+
+
+# Fraction of the adaptive limit each class may occupy on its own
+SHARES: Dict[Priority, float] = {Priority.READ: 0.6, Priority.WRITE: 0.8, Priority.CRITICAL: 1.0}
+
+
+def classify(method: str, path: str) -> Optional[Priority]:
+    """Priority of a request, or None if it bypasses admission control."""
+    if not path.startswith("/api/") or path in _EXEMPT:
+        return None
+    if method == "POST" and _TRANSITION.match(path):
+        return Priority.CRITICAL
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return Priority.READ
+    return Priority.WRITE
+
+
+class AimdLimit:
+    """Concurrency limit adjusted by additive increase, multiplicative decrease."""
+
+    def __init__(self, initial: float, min_limit: float, max_limit: float, target_latency: float,
+                 backoff: float = 0.9):
+        self.value = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._last_decrease = float("-inf")
+
+    def observe(self, latency: float, overloaded: bool = False) -> None:
+        now = time.monotonic()
+        if latency > self.target_latency or overloaded:
+            # Requests admitted under the old limit finish slowly too; decrease
+            # at most once per target latency so one burst is not counted many times.
+            if now - self._last_decrease >= self.target_latency:
+                self.value = max(self.min_limit, self.value * self.backoff)
+                self._last_decrease = now
+        else:
+            self.value = min(self.max_limit, self.value + 1 / self.value)
+
+
+class AdmissionController:
+    """In-flight counters per class and the admit/reject decision."""
+
+    def __init__(self, limit: AimdLimit, pool_saturation: Callable[[], Optional[float]] = lambda: None,
+                 critical_wait: float = 1.0):
+        self.limit = limit
+        self.pool_saturation = pool_saturation
+        self.critical_wait = critical_wait
+        self.inflight: Counter = Counter()
+        self.admitted: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self._released: Optional[asyncio.Condition] = None
+
+    @property
+    def total_inflight(self) -> int:
+        return sum(self.inflight.values())
+
+    def _saturated(self) -> bool:
+        saturation = self.pool_saturation()
+        return saturation is not None and saturation >= 1.0
+
+    def _has_room(self, priority: Priority) -> bool:
+        if priority is not Priority.CRITICAL and self._saturated():
+            return False
+        return self.total_inflight < max(1.0, self.limit.value * SHARES[priority])
+
+    def try_acquire(self, priority: Priority) -> bool:
+        if not self._has_room(priority):
+            return False
+        self.inflight[priority] += 1
+        self.admitted[priority] += 1
+        return True
+
+    async def acquire(self, priority: Priority) -> bool:
+        """Take a slot; critical requests wait up to ``critical_wait`` for one."""
+        if self.try_acquire(priority):
+            return True
+        if priority is Priority.CRITICAL and self.critical_wait > 0:
+            if self._released is None:
+                self._released = asyncio.Condition()
+            deadline = time.monotonic() + self.critical_wait
+            async with self._released:
+                while not self._has_room(priority):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._released.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if self.try_acquire(priority):
+                    return True
+        self.rejected[priority] += 1
+        return False
+
+    async def release(self, priority: Priority, latency: float) -> None:
+        self.inflight[priority] -= 1
+        self.limit.observe(latency, overloaded=self._saturated())
+        if self._released is not None:
+            async with self._released:
+                self._released.notify()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit.value, 2),
+            "pool_saturation": self.pool_saturation(),
+            "inflight": {p.value: self.inflight[p] for p in Priority},
+            "admitted": {p.value: self.admitted[p] for p in Priority},
+            "rejected": {p.value: self.rejected[p] for p in Priority},
+        }
+
+
+class AdmissionMiddleware:
+    """Applies an ``AdmissionController`` to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        priority = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.controller.acquire(priority):
+            await self._reject(send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.controller.release(priority, time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def make_controller(settings, pool_saturation: Callable[[], Optional[float]]) -> AdmissionController:
+    """Controller configured from ``Settings``; the limit starts at the pool capacity."""
+    capacity = settings.db_pool_size + settings.db_max_overflow
+    initial = settings.admission_limit or capacity
+    limit = AimdLimit(
+        initial=initial,
+        min_limit=2,
+        max_limit=max(initial, capacity) * 4,
+        target_latency=settings.admission_target_latency_ms / 1000,
+    )
+    return AdmissionController(limit, pool_saturation, critical_wait=settings.admission_critical_wait_ms / 1000)
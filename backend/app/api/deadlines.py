@@ -0,0 +1,134 @@
+"""Per-request deadlines: every ``/api`` request gets a time budget by endpoint class.
+
+The budget starts when the request arrives. ``get_db`` passes what is left of
+it to PostgreSQL as ``statement_timeout`` and ``lock_timeout`` so the server
+cancels a runaway query itself; the middleware also bounds the whole request
+with an asyncio timeout, which is the only limit on SQLite. Either way the
+client gets 504 with the time spent so far, split into database and other.
+
+Callers with a deadline of their own send the remaining milliseconds in
+``X-Deadline-Ms``; the smaller of that and the class budget applies.
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
+
+from app.infrastructure.request_context import RequestContext, get_request_context
+
+from .admission import Priority, classify
+
+DEADLINE_HEADER = "x-deadline-ms"
+
+# query_canceled (statement_timeout) and lock_not_available (lock_timeout)
+TIMEOUT_SQLSTATES = ("57014", "55P03")
+
+# Reads that scan whole tables: listings, search, analytics and the change feed
+BULK_PATHS = {"/api/users", "/api/orders", "/api/orders/search", "/api/changes"}
+
+
+def endpoint_class(method: str, path: str) -> Optional[str]:
+    """``critical``, ``write``, ``read`` or ``bulk``; None for requests without a deadline."""
+    priority = classify(method, path)
+    if priority is None:
+        return None
+    if priority is Priority.READ and (path in BULK_PATHS or path.startswith("/api/stats/")):
+        return "bulk"
+    return priority.value
+
+
+def budgets_from_settings(settings) -> dict:
+    """Budget per endpoint class in seconds; classes set to 0 have no deadline."""
+    budgets = {
+        "critical": settings.deadline_critical_ms,
+        "write": settings.deadline_write_ms,
+        "read": settings.deadline_read_ms,
+        "bulk": settings.deadline_bulk_ms,
+    }
+    return {name: ms / 1000 for name, ms in budgets.items() if ms > 0}
+
+
+def timing_breakdown(context: Optional[RequestContext]) -> dict:
+    if context is None:
+        return {}
+    elapsed = context.elapsed
+    return {
+        "route": context.route,
+        "budget_ms": None if context.budget is None else round(context.budget * 1000, 3),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "db_ms": round(context.db_time * 1000, 3),
+        "other_ms": round((elapsed - context.db_time) * 1000, 3),
+        "statements": context.statements,
+    }
+
+
+def deadline_exceeded_body(context: Optional[RequestContext]) -> dict:
+    return {"detail": "Deadline exceeded", "timing": timing_breakdown(context)}
+
+
+async def database_timeout_handler(request: Request, exc: DBAPIError):
+    """504 for queries cancelled by ``statement_timeout``/``lock_timeout``; other errors stay 500."""
+    if getattr(exc.orig, "sqlstate", None) not in TIMEOUT_SQLSTATES:
+        raise exc
+    return JSONResponse(status_code=504, content=deadline_exceeded_body(get_request_context()))
+
+
+class DeadlineMiddleware:
+    """Sets the request deadline and enforces it with an asyncio timeout.
+
+    Must run inside ``RequestContextMiddleware``: the deadline is stored on the
+    request context, where ``get_db`` reads it.
+    """
+
+    def __init__(self, app, budgets: dict):
+        self.app = app
+        self.budgets = budgets
+
+    def _budget(self, scope) -> Optional[float]:
+        budget = self.budgets.get(endpoint_class(scope["method"], scope["path"]))
+        for name, value in scope.get("headers", ()):
+            if name == DEADLINE_HEADER.encode():
+                try:
+                    requested = float(value) / 1000
+                except ValueError:
+                    break
+                if requested > 0:
+                    budget = requested if budget is None else min(budget, requested)
+                break
+        return budget
+
+    async def __call__(self, scope, receive, send):
+        context = get_request_context() if scope["type"] == "http" else None
+        budget = self._budget(scope) if context is not None else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+        context.budget = budget
+        response_started = False
+
+        async def send_tracking(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send_tracking), context.remaining)
+        except asyncio.TimeoutError:
+            if response_started:
+                raise
+            await self._timed_out(send, context)
+
+    @staticmethod
+    async def _timed_out(send, context: RequestContext) -> None:
+        body = json.dumps(deadline_exceeded_body(context)).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,112 @@
+"""Diagnostic endpoints, mounted under ``/debug``."""
+
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+
+from app.infrastructure.db import slow_query_log
+
+from .schemas import ProfileSummaryResponse, SlowQueryResponse
+
+
+def require_debug_token(request: Request, x_debug_token: Optional[str] = Header(None)) -> None:
+    """Dependency guarding diagnostic endpoints (``Settings.debug_token``).
+
+    Without a configured token the endpoints do not exist: they expose raw SQL,
+    bound parameters and request profiles.
+    """
+    token = request.app.state.settings.debug_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_debug_token != token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid debug token")
+
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+async def list_slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: Literal["total_ms", "max_ms", "mean_ms", "count"] = "total_ms",
+):
+    """Top statement fingerprints that crossed the slow-query threshold."""
+    return [
+        SlowQueryResponse(
+            fingerprint=s.fingerprint,
+            statement=s.statement,
+            parameter_shape=s.parameter_shape,
+            count=s.count,
+            total_ms=round(s.total_ms, 3),
+            mean_ms=round(s.mean_ms, 3),
+            max_ms=round(s.max_ms, 3),
+            last_seen=s.last_seen,
+            routes=dict(s.routes),
+            explain=s.explain,
+        )
+        for s in slow_query_log.top(limit, order_by)
+    ]
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries():
+    """Forget all recorded slow queries."""
+    slow_query_log.reset()
+
+
+@router.get("/startup")
+async def startup_timings(request: Request):
+    """Warm-up and lifespan timings of this process, in milliseconds."""
+    return request.app.state.startup
+
+
+@router.get("/admission")
+async def admission_stats(request: Request):
+    """Adaptive limit, in-flight requests and admit/reject counters per request class."""
+    controller = getattr(request.app.state, "admission", None)
+    return {"enabled": False} if controller is None else {"enabled": True, **controller.snapshot()}
+
+
+@router.get("/transactions")
+async def transaction_retries(request: Request):
+    """Committed order commands, retries by reason and commands that ran out of attempts."""
+    return request.app.state.retry_metrics.snapshot()
+
+
+@router.get("/profiles", response_model=List[ProfileSummaryResponse])
+async def list_profiles(request: Request):
+    """Recently captured request profiles, newest first."""
+    return [
+        ProfileSummaryResponse(
+            id=p.id,
+            method=p.method,
+            path=p.path,
+            route=p.route,
+            status_code=p.status_code,
+            started_at=p.started_at,
+            duration_ms=round(p.duration_ms, 3),
+            samples=len(p.samples),
+        )
+        for p in request.app.state.profile_store.list()
+    ]
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    request: Request,
+    profile_id: str,
+    format: Literal["speedscope", "collapsed"] = "speedscope",
+):
+    """Download a profile as a speedscope file or as collapsed stacks."""
+    profile = request.app.state.profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile {profile_id} not found")
+    if format == "collapsed":
+        content, media_type, suffix = profile.collapsed(), "text/plain", "folded"
+    else:
+        content, media_type, suffix = profile.speedscope_json(), "application/json", "speedscope.json"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.{suffix}"'},
+    )
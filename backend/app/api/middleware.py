@@ -0,0 +1,41 @@
+"""ASGI middleware for the marketplace API."""
+
+from app.infrastructure.request_context import (
+    RequestContext,
+    reset_request_context,
+    set_request_context,
+)
+
+
+class RequestContextMiddleware:
+    """Binds a ``RequestContext`` to every HTTP request.
+
+    The ASGI scope is shared with the router, so the matched route template
+    becomes visible to database hooks once routing has happened. Responses carry
+    the statement count and database time of the request in ``X-DB-Statements``
+    and ``Server-Timing`` so that clients such as the load-test driver can
+    attribute database work to operations.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        context = RequestContext(method=scope["method"], path=scope["path"], scope=scope)
+        token = set_request_context(context)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-statements", str(context.statements).encode()))
+                headers.append((b"server-timing", f"db;dur={context.db_time * 1000:.3f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            reset_request_context(token)
@@ -0,0 +1,276 @@
+"""On-demand request profiling.
+
+A background thread samples the stack of the asyncio task serving a profiled
+request. While the task runs, the sample is the real thread stack; while it is
+suspended, the sample is rebuilt from the coroutine ``cr_await`` chain and ends
+in an ``[await ...]`` frame, so database waits show up next to CPU time spent in
+repositories and serialization.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.settings import Settings
+
+PROFILE_MAX_SAMPLES = 20_000
+
+Stack = Tuple[str, ...]
+
+
+@dataclass
+class Profile:
+    """Sampled stacks of one request."""
+
+    id: str
+    method: str
+    path: str
+    route: str
+    started_at: datetime
+    interval_ms: float
+    duration_ms: float = 0.0
+    status_code: Optional[int] = None
+    samples: List[Stack] = field(default_factory=list, repr=False)
+    weights: List[float] = field(default_factory=list, repr=False)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, weighted in microseconds."""
+        totals: Counter = Counter()
+        for stack, weight in zip(self.samples, self.weights):
+            totals[";".join(stack)] += weight
+        return "".join(f"{stack} {round(weight * 1000)}\n" for stack, weight in totals.most_common())
+
+    def speedscope(self) -> dict:
+        """Sampled profile in the speedscope file format."""
+        frames: List[dict] = []
+        index: Dict[str, int] = {}
+        samples = []
+        for stack in self.samples:
+            row = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                row.append(index[name])
+            samples.append(row)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.route} {self.id}",
+            "exporter": "marketplace-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.route,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(self.weights), 3),
+                    "samples": samples,
+                    "weights": [round(w, 3) for w in self.weights],
+                }
+            ],
+        }
+
+    def speedscope_json(self) -> str:
+        return json.dumps(self.speedscope())
+
+
+class ProfileStore:
+    """Bounded ring buffer of the most recent profiles."""
+
+    def __init__(self, size: int = Settings.profile_buffer_size):
+        self._profiles: Deque[Profile] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self) -> List[Profile]:
+        """Profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _coroutine_chain(task: asyncio.Task):
+    """Frames of the task's coroutine chain, outermost first, and the awaited leaf."""
+    chain = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = (
+            getattr(awaitable, "cr_frame", None)
+            or getattr(awaitable, "gi_frame", None)
+            or getattr(awaitable, "ag_frame", None)
+        )
+        if frame is None:
+            return chain, awaitable
+        chain.append(frame)
+        awaitable = (
+            getattr(awaitable, "cr_await", None)
+            or getattr(awaitable, "gi_yieldfrom", None)
+            or getattr(awaitable, "ag_await", None)
+        )
+    return chain, None
+
+
+def task_stack(task: asyncio.Task, thread_frame) -> Optional[Stack]:
+    """Current stack of ``task``, root first."""
+    chain, leaf = _coroutine_chain(task)
+    if not chain:
+        return None
+    root = chain[0]
+    frames = []
+    frame = thread_frame
+    while frame is not None:
+        frames.append(frame)
+        if frame is root:
+            return tuple(_label(f) for f in reversed(frames))
+        frame = frame.f_back
+    awaiting = f"[await {type(leaf).__name__}]" if leaf is not None else "[await]"
+    return tuple(_label(f) for f in chain) + (awaiting,)
+
+
+class _ActiveProfile:
+    def __init__(self, profile: Profile, task: asyncio.Task, thread_id: int):
+        self.profile = profile
+        self.task = task
+        self.thread_id = thread_id
+        self.last_sample = time.perf_counter()
+
+    def sample(self, frames: dict, now: float) -> None:
+        if len(self.profile.samples) >= PROFILE_MAX_SAMPLES:
+            return
+        stack = task_stack(self.task, frames.get(self.thread_id))
+        if stack:
+            self.profile.samples.append(stack)
+            self.profile.weights.append((now - self.last_sample) * 1000)
+        self.last_sample = now
+
+
+class Sampler:
+    """Single background thread sampling every active profile."""
+
+    def __init__(self, interval_ms: float = Settings.profile_interval_ms):
+        self.interval = interval_ms / 1000
+        self._active: Dict[int, _ActiveProfile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile, task: asyncio.Task) -> _ActiveProfile:
+        active = _ActiveProfile(profile, task, threading.get_ident())
+        with self._lock:
+            self._active[id(active)] = active
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._wakeup.set()
+        return active
+
+    def stop(self, active: _ActiveProfile) -> Profile:
+        """Stop sampling ``active``; its profile is not appended to after this returns."""
+        with self._lock:
+            self._active.pop(id(active), None)
+        return active.profile
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            # Sampling under the lock: a profile removed by stop() is never touched again
+            with self._lock:
+                for profile in self._active.values():
+                    profile.sample(frames, now)
+                if not self._active:
+                    self._wakeup.clear()
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry a valid ``X-Profile-Token`` or win the sampling draw.
+
+    Profiled responses get an ``X-Profile-Id`` header pointing at
+    ``/debug/profiles/{id}``.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        interval_ms: float = Settings.profile_interval_ms,
+    ):
+        self.app = app
+        self.store = store
+        self.token = token
+        self.sample_rate = sample_rate
+        self.sampler = Sampler(interval_ms)
+
+    def _wanted(self, scope) -> bool:
+        if scope["path"].startswith("/debug/"):
+            return False
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile-token" and value.decode("latin-1") == self.token:
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            id=uuid.uuid4().hex[:12],
+            method=scope["method"],
+            path=scope["path"],
+            route=scope["path"],
+            started_at=datetime.now(),
+            interval_ms=self.sampler.interval * 1000,
+        )
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        active = self.sampler.start(profile, asyncio.current_task())
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.sampler.stop(active)
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            if route is not None:
+                profile.route = route.path
+            self.store.add(profile)
@@ -1,52 +1,124 @@
 """API routes for the marketplace."""
 
 import uuid
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infrastructure.db import get_db
-from app.infrastructure.repositories import UserRepository, OrderRepository
+from app.infrastructure.db import begin_transaction, get_db
+from app.infrastructure.events import SessionEventPublisher
+from app.infrastructure.transactions import UnitOfWork
+from app.infrastructure.repositories import (
+    UserRepository,
+    ChangeLogRepository,
+    OrderStatsRepository,
+    UserOrderStatsRepository,
+)
 from app.application.user_service import UserService
-from app.application.order_service import OrderService
+from app.application.user_loader import UserLoader
+from app.application.order_service import BatchOperation, BatchOperationError, OrderService
+from app.application.change_feed_service import ChangeFeedService, MAX_LIMIT, encode_cursor
+from app.application.stats_service import StatsService
+from app.application.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.domain.exceptions import (
     DomainException,
     InvalidEmailError,
     EmailAlreadyExistsError,
     UserNotFoundError,
     OrderNotFoundError,
+    OrderArchivedError,
     OrderAlreadyPaidError,
     OrderCancelledError,
     InvalidQuantityError,
     InvalidPriceError,
 )
 
+from .sse import order_event_stream
 from .schemas import (
     CreateUser,
     UserResponse,
+    UserSummaryResponse,
     CreateOrder,
     AddOrderItem,
     OrderResponse,
     OrderDetailResponse,
+    OrderUserResponse,
     OrderItemResponse,
     OrderStatusChangeResponse,
+    OrderSummaryResponse,
+    OrderSearchResponse,
+    BatchRequest,
+    BatchResponse,
+    BatchResultResponse,
+    ChangeResponse,
+    ChangeFeedResponse,
+    DailyRevenueResponse,
+    StatusTotalsResponse,
+    BasketStatsResponse,
 )
 
 router = APIRouter()
 
+# Cursor of the next page of a keyset-paginated list; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Related objects that order endpoints can embed with ?include=
+ORDER_INCLUDES = {"user"}
+
 
 def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     """Dependency to get UserService."""
     repo = UserRepository(db)
-    return UserService(repo)
+    return UserService(repo, UserOrderStatsRepository(db))
 
 
-def get_order_service(db: AsyncSession = Depends(get_db)) -> OrderService:
+def get_order_service(request: Request, db: AsyncSession = Depends(get_db)) -> OrderService:
     """Dependency to get OrderService."""
     user_repo = UserRepository(db)
-    order_repo = OrderRepository(db)
-    return OrderService(order_repo, user_repo)
+    order_repo = request.app.state.order_repository(db)
+    events = SessionEventPublisher(db, request.app.state.events)
+    return OrderService(order_repo, user_repo, events, OrderStatsRepository(db), UserOrderStatsRepository(db))
+
+
+def get_order_unit_of_work(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    service: OrderService = Depends(get_order_service),
+) -> UnitOfWork[OrderService]:
+    """Dependency for OrderService commands, run as transactions retried on serialization failures."""
+    state = request.app.state
+    return UnitOfWork(db, service, state.retry_policy, state.retry_metrics,
+                      begin=lambda session: begin_transaction(session, state.settings))
+
+
+def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    """Dependency to get the request's UserLoader."""
+    return UserLoader(UserRepository(db))
+
+
+def order_includes(
+    include: Optional[str] = Query(None, description="Comma-separated related objects to embed: user"),
+) -> set:
+    """Dependency parsing ?include= for order endpoints."""
+    requested = {name.strip() for name in (include or "").split(",") if name.strip()}
+    unknown = requested - ORDER_INCLUDES
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def get_change_feed_service(db: AsyncSession = Depends(get_db)) -> ChangeFeedService:
+    """Dependency to get ChangeFeedService."""
+    return ChangeFeedService(ChangeLogRepository(db))
+
+
+def get_stats_service(db: AsyncSession = Depends(get_db)) -> StatsService:
+    """Dependency to get StatsService."""
+    return StatsService(OrderStatsRepository(db))
 
 
 # User endpoints
@@ -97,12 +169,29 @@ async def get_user(user_id: uuid.UUID, service: UserService = Depends(get_user_s
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+@router.get("/users/{user_id}/summary", response_model=UserSummaryResponse)
+async def get_user_summary(user_id: uuid.UUID, service: UserService = Depends(get_user_service)):
+    """Order count, lifetime paid value and last order date of a user."""
+    try:
+        summary = await service.get_summary(user_id)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return UserSummaryResponse(
+        user_id=summary.user_id,
+        orders=summary.orders,
+        paid_orders=summary.paid_orders,
+        paid_amount=summary.paid_amount,
+        cancelled_orders=summary.cancelled_orders,
+        last_order_at=summary.last_order_at,
+    )
+
+
 # Order endpoints
 @router.post("/orders", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(data: CreateOrder, service: OrderService = Depends(get_order_service)):
+async def create_order(data: CreateOrder, uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work)):
     """Create a new order."""
     try:
-        order = await service.create_order(data.user_id)
+        order = await uow.run(uow.service.create_order, data.user_id)
         return _order_to_response(order)
     except UserNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -111,37 +200,136 @@ async def create_order(data: CreateOrder, service: OrderService = Depends(get_or
 @router.get("/orders", response_model=List[OrderResponse])
 async def list_orders(
     user_id: uuid.UUID = None,
+    includes: set = Depends(order_includes),
     service: OrderService = Depends(get_order_service),
+    users: UserLoader = Depends(get_user_loader),
 ):
     """List orders, optionally filtered by user."""
     orders = await service.list_orders(user_id)
-    return [_order_to_response(o) for o in orders]
+    return await _embed(includes, users, [_order_to_response(o) for o in orders])
+
+
+@router.get("/orders/search", response_model=OrderSearchResponse)
+async def search_orders(
+    product: str = Query(..., min_length=1, max_length=200, description="Substring of a product name, case-insensitive"),
+    user_id: uuid.UUID = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    service: OrderService = Depends(get_order_service),
+):
+    """Orders containing a matching product, newest first."""
+    try:
+        # One extra row tells whether another page exists
+        found = await service.search_orders(product, user_id, limit + 1, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return OrderSearchResponse(
+        orders=[
+            OrderSummaryResponse(
+                id=o.id,
+                user_id=o.user_id,
+                status=o.status.value,
+                total_amount=o.total_amount,
+                created_at=o.created_at,
+                matched_products=o.matched_products,
+            )
+            for o in found[:limit]
+        ],
+        limit=limit,
+        offset=offset,
+        has_more=len(found) > limit,
+    )
+
+
+@router.get("/orders/stream", response_class=StreamingResponse)
+async def stream_orders(request: Request):
+    """Server-Sent Events with order changes, published after each commit."""
+    broker = request.app.state.events
+
+    async def events():
+        with broker.subscribe() as subscription:
+            async for chunk in order_event_stream(subscription):
+                yield chunk
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/orders/{order_id}", response_model=OrderDetailResponse)
-async def get_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
+async def get_order(
+    order_id: uuid.UUID,
+    items_limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE,
+                                       description="Return only the first page of items plus counts"),
+    includes: set = Depends(order_includes),
+    service: OrderService = Depends(get_order_service),
+    users: UserLoader = Depends(get_user_loader),
+):
     """Get order by ID with full details."""
     try:
-        order = await service.get_order(order_id)
-        return _order_to_detail_response(order)
+        if items_limit is None:
+            order = await service.get_order(order_id)
+            return (await _embed(includes, users, [_order_to_detail_response(order)]))[0]
+        overview = await service.get_order_overview(order_id, items_limit)
+    except OrderNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    header = overview.header
+    detail = OrderDetailResponse(
+        id=header.id,
+        user_id=header.user_id,
+        status=header.status.value,
+        total_amount=header.total_amount,
+        created_at=header.created_at,
+        items=[_item_to_response(item) for item in overview.items.entries],
+        status_history=[_change_to_response(h) for h in overview.status_history],
+        items_count=header.items_count,
+        history_count=header.history_count,
+        items_next_cursor=overview.items.next_cursor,
+    )
+    return (await _embed(includes, users, [detail]))[0]
+
+
+@router.get("/orders/{order_id}/items", response_model=List[OrderItemResponse])
+async def list_order_items(
+    order_id: uuid.UUID,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; omit to start"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    service: OrderService = Depends(get_order_service),
+):
+    """Order items in pages; the next page's cursor is returned in X-Next-Cursor."""
+    try:
+        page = await service.get_items_page(order_id, cursor, limit)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return [_item_to_response(item) for item in page.entries]
 
 
 @router.post("/orders/{order_id}/items", response_model=OrderItemResponse, status_code=status.HTTP_201_CREATED)
 async def add_order_item(
     order_id: uuid.UUID,
     data: AddOrderItem,
-    service: OrderService = Depends(get_order_service),
+    response: Response,
+    uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work),
 ):
-    """Add item to order."""
+    """Add item to order; with ``merge`` a repeated product updates its line (200) instead of adding one (201)."""
     try:
-        item = await service.add_item(
+        item, merged = await uow.run(
+            uow.service.add_or_merge_item,
             order_id,
             data.product_name,
             data.price,
             data.quantity,
+            merge=data.merge,
         )
+        if merged:
+            response.status_code = status.HTTP_200_OK
         return OrderItemResponse(
             id=item.id,
             product_name=item.product_name,
@@ -151,6 +339,8 @@ async def add_order_item(
         )
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderArchivedError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except OrderCancelledError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except (InvalidQuantityError, InvalidPriceError) as e:
@@ -158,13 +348,15 @@ async def add_order_item(
 
 
 @router.post("/orders/{order_id}/pay", response_model=OrderResponse)
-async def pay_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
+async def pay_order(order_id: uuid.UUID, uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work)):
     """Pay for an order."""
     try:
-        order = await service.pay_order(order_id)
+        order = await uow.run(uow.service.pay_order, order_id)
         return _order_to_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderArchivedError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except OrderAlreadyPaidError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except OrderCancelledError as e:
@@ -172,59 +364,241 @@ async def pay_order(order_id: uuid.UUID, service: OrderService = Depends(get_ord
 
 
 @router.post("/orders/{order_id}/cancel", response_model=OrderResponse)
-async def cancel_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
+async def cancel_order(order_id: uuid.UUID, uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work)):
     """Cancel an order."""
     try:
-        order = await service.cancel_order(order_id)
+        order = await uow.run(uow.service.cancel_order, order_id)
         return _order_to_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderArchivedError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except OrderAlreadyPaidError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.post("/orders/{order_id}/ship", response_model=OrderResponse)
-async def ship_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
+async def ship_order(order_id: uuid.UUID, uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work)):
     """Ship an order."""
     try:
-        order = await service.ship_order(order_id)
+        order = await uow.run(uow.service.ship_order, order_id)
         return _order_to_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderArchivedError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post("/orders/{order_id}/complete", response_model=OrderResponse)
-async def complete_order(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
+async def complete_order(order_id: uuid.UUID, uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work)):
     """Complete an order."""
     try:
-        order = await service.complete_order(order_id)
+        order = await uow.run(uow.service.complete_order, order_id)
         return _order_to_response(order)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except OrderArchivedError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+# Fields each batch operation needs besides "op"
+BATCH_REQUIRED_FIELDS = {
+    "create_order": ("user_id",),
+    "add_item": ("order_id", "product_name", "price", "quantity"),
+    "pay": ("order_id",),
+    "cancel": ("order_id",),
+    "ship": ("order_id",),
+    "complete": ("order_id",),
+}
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(data: BatchRequest, uow: UnitOfWork[OrderService] = Depends(get_order_unit_of_work)):
+    """Run order operations in order, in one transaction: either all of them apply or none."""
+    operations = _batch_operations(data)
+    try:
+        results = await uow.run(uow.service.execute_batch, operations)
+    except BatchOperationError as e:
+        raise HTTPException(status_code=_batch_error_status(e.error), detail=str(e))
+    return BatchResponse(results=[
+        BatchResultResponse(
+            op=result.action,
+            order_id=result.order_id,
+            order=_order_to_response(result.order) if result.order is not None else None,
+            item=_item_to_response(result.item) if result.item is not None else None,
+        )
+        for result in results
+    ])
+
+
+def _batch_operations(data: BatchRequest) -> List[BatchOperation]:
+    """Check required fields and resolve "$ref" order references to operation indexes."""
+    refs = {}
+    operations = []
+    for index, op in enumerate(data.operations):
+        missing = [name for name in BATCH_REQUIRED_FIELDS[op.op] if getattr(op, name) is None]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Operation {index}: {op.op} needs {', '.join(missing)}")
+        order_id = order_ref = None
+        if op.order_id is not None and op.order_id.startswith("$"):
+            name = op.order_id[1:]
+            order_ref = refs.get(name, int(name) if name.isdigit() else None)
+            if order_ref is None or order_ref >= index:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"Operation {index}: unknown reference {op.order_id}")
+        elif op.order_id is not None:
+            try:
+                order_id = uuid.UUID(op.order_id)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail=f"Operation {index}: invalid order id {op.order_id}")
+        if op.ref is not None:
+            refs[op.ref] = index
+        operations.append(BatchOperation(
+            action=op.op, order_id=order_id, order_ref=order_ref, user_id=op.user_id,
+            product_name=op.product_name, price=op.price, quantity=op.quantity, merge=op.merge,
+        ))
+    return operations
+
+
+def _batch_error_status(error: Exception) -> int:
+    if isinstance(error, (UserNotFoundError, OrderNotFoundError)):
+        return status.HTTP_404_NOT_FOUND
+    if isinstance(error, (OrderArchivedError, OrderAlreadyPaidError)):
+        return status.HTTP_409_CONFLICT
+    return status.HTTP_400_BAD_REQUEST
+
+
 @router.get("/orders/{order_id}/history", response_model=List[OrderStatusChangeResponse])
-async def get_order_history(order_id: uuid.UUID, service: OrderService = Depends(get_order_service)):
-    """Get order status history."""
+async def get_order_history(
+    order_id: uuid.UUID,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; omit to start"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    service: OrderService = Depends(get_order_service),
+):
+    """Get order status history, oldest first; the next page's cursor is returned in X-Next-Cursor."""
     try:
-        history = await service.get_order_history(order_id)
-        return [
-            OrderStatusChangeResponse(
-                id=h.id,
-                status=h.status.value,
-                changed_at=h.changed_at,
-            )
-            for h in history
-        ]
+        page = await service.get_history_page(order_id, cursor, limit)
     except OrderNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return [_change_to_response(h) for h in page.entries]
+
+
+# Change feed
+@router.get("/changes", response_model=ChangeFeedResponse)
+async def list_changes(
+    since: str = Query(None, description="next_cursor of the previous page; omit to start from the beginning"),
+    limit: int = Query(100, ge=1, le=MAX_LIMIT),
+    service: ChangeFeedService = Depends(get_change_feed_service),
+):
+    """User and order changes after ``since``, oldest first."""
+    try:
+        page = await service.changes_since(since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ChangeFeedResponse(
+        changes=[
+            ChangeResponse(
+                cursor=encode_cursor(c.txid, c.seq),
+                entity=c.entity,
+                id=c.entity_id,
+                op=c.op,
+                data=c.data,
+                changed_at=c.changed_at,
+            )
+            for c in page.changes
+        ],
+        next_cursor=page.next_cursor,
+        has_more=page.has_more,
+    )
+
+
+# Stats endpoints
+# Periods are inclusive and refer to the day (UTC) an order was created.
+DateFrom = Query(None, alias="from", description="First day, inclusive")
+DateTo = Query(None, alias="to", description="Last day, inclusive")
+
+
+@router.get("/stats/revenue", response_model=List[DailyRevenueResponse])
+async def revenue_stats(
+    date_from: Optional[date] = DateFrom,
+    date_to: Optional[date] = DateTo,
+    service: StatsService = Depends(get_stats_service),
+):
+    """Orders created, orders paid and revenue per day."""
+    try:
+        days = await service.revenue_by_day(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return [DailyRevenueResponse(day=d.day, orders=d.orders, paid_orders=d.paid_orders, revenue=d.revenue)
+            for d in days]
+
+
+@router.get("/stats/statuses", response_model=List[StatusTotalsResponse])
+async def status_stats(
+    date_from: Optional[date] = DateFrom,
+    date_to: Optional[date] = DateTo,
+    service: StatsService = Depends(get_stats_service),
+):
+    """Number and value of orders in each status."""
+    try:
+        totals = await service.orders_by_status(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return [StatusTotalsResponse(status=t.status.value, orders=t.orders, amount=t.amount) for t in totals]
+
+
+@router.get("/stats/basket", response_model=BasketStatsResponse)
+async def basket_stats(
+    date_from: Optional[date] = DateFrom,
+    date_to: Optional[date] = DateTo,
+    service: StatsService = Depends(get_stats_service),
+):
+    """Average value and size of paid orders."""
+    try:
+        basket = await service.basket(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return BasketStatsResponse(
+        orders=basket.orders,
+        items=basket.items,
+        revenue=basket.revenue,
+        average_amount=basket.average_amount,
+        average_items=basket.average_items,
+    )
 
 
 # Helper functions
+def _item_to_response(item) -> OrderItemResponse:
+    """Convert OrderItem domain object to response."""
+    return OrderItemResponse(
+        id=item.id,
+        product_name=item.product_name,
+        price=item.price,
+        quantity=item.quantity,
+        subtotal=item.subtotal,
+    )
+
+
+def _change_to_response(change) -> OrderStatusChangeResponse:
+    """Convert OrderStatusChange domain object to response."""
+    return OrderStatusChangeResponse(
+        id=change.id,
+        status=change.status.value,
+        changed_at=change.changed_at,
+    )
+
+
 def _order_to_response(order) -> OrderResponse:
     """Convert Order domain object to response."""
     return OrderResponse(
@@ -233,19 +607,20 @@ def _order_to_response(order) -> OrderResponse:
         status=order.status.value,
         total_amount=order.total_amount,
         created_at=order.created_at,
-        items=[
-            OrderItemResponse(
-                id=item.id,
-                product_name=item.product_name,
-                price=item.price,
-                quantity=item.quantity,
-                subtotal=item.subtotal,
-            )
-            for item in order.items
-        ],
+        items=[_item_to_response(item) for item in order.items],
     )
 
 
+async def _embed(includes: set, users: UserLoader, responses: list) -> list:
+    """Fill the requested related objects; all users are read in one query."""
+    if "user" in includes:
+        found = await users.load_many(r.user_id for r in responses)
+        for response, user in zip(responses, found):
+            if user is not None:
+                response.user = OrderUserResponse(id=user.id, email=user.email, name=user.name)
+    return responses
+
+
 def _order_to_detail_response(order) -> OrderDetailResponse:
     """Convert Order domain object to detailed response."""
     return OrderDetailResponse(
@@ -254,22 +629,6 @@ def _order_to_detail_response(order) -> OrderDetailResponse:
         status=order.status.value,
         total_amount=order.total_amount,
         created_at=order.created_at,
-        items=[
-            OrderItemResponse(
-                id=item.id,
-                product_name=item.product_name,
-                price=item.price,
-                quantity=item.quantity,
-                subtotal=item.subtotal,
-            )
-            for item in order.items
-        ],
-        status_history=[
-            OrderStatusChangeResponse(
-                id=h.id,
-                status=h.status.value,
-                changed_at=h.changed_at,
-            )
-            for h in order.status_history
-        ],
+        items=[_item_to_response(item) for item in order.items],
+        status_history=[_change_to_response(h) for h in order.status_history],
     )
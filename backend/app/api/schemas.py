@@ -1,9 +1,9 @@
 """Pydantic schemas for API request/response."""
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -24,6 +24,15 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserSummaryResponse(BaseModel):
+    user_id: uuid.UUID
+    orders: int
+    paid_orders: int
+    paid_amount: Decimal
+    cancelled_orders: int
+    last_order_at: Optional[datetime] = None
+
+
 # Order schemas
 class CreateOrder(BaseModel):
     user_id: uuid.UUID
@@ -33,6 +42,8 @@ class AddOrderItem(BaseModel):
     product_name: str = Field(..., min_length=1)
     price: Decimal = Field(..., ge=0)
     quantity: int = Field(..., gt=0)
+    # Add to the quantity of an existing line with the same product and price instead
+    merge: bool = False
 
 
 class OrderItemResponse(BaseModel):
@@ -52,6 +63,12 @@ class OrderStatusChangeResponse(BaseModel):
     changed_at: datetime
 
 
+class OrderUserResponse(BaseModel):
+    id: uuid.UUID
+    email: str
+    name: str
+
+
 class OrderResponse(BaseModel):
     id: uuid.UUID
     user_id: uuid.UUID
@@ -59,6 +76,8 @@ class OrderResponse(BaseModel):
     total_amount: Decimal
     created_at: datetime
     items: List[OrderItemResponse] = []
+    # Set only with ?include=user
+    user: Optional[OrderUserResponse] = None
 
     class Config:
         from_attributes = True
@@ -66,6 +85,122 @@ class OrderResponse(BaseModel):
 
 class OrderDetailResponse(OrderResponse):
     status_history: List[OrderStatusChangeResponse] = []
+    # Set only when items are paged (?items_limit=); the rest via GET /orders/{id}/items
+    items_count: Optional[int] = None
+    history_count: Optional[int] = None
+    items_next_cursor: Optional[str] = None
+
+
+class OrderSummaryResponse(BaseModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    status: str
+    total_amount: Decimal
+    created_at: datetime
+    matched_products: List[str]
+
+
+class OrderSearchResponse(BaseModel):
+    orders: List[OrderSummaryResponse]
+    limit: int
+    offset: int
+    has_more: bool
+
+
+# Batch schemas
+MAX_BATCH_OPERATIONS = 100
+
+
+class BatchOperationRequest(BaseModel):
+    op: Literal["create_order", "add_item", "pay", "cancel", "ship", "complete"]
+    # Later operations refer to this one's order as "$<ref>"; "$<index>" always works
+    ref: Optional[str] = Field(None, min_length=1)
+    # An order UUID or a reference to an earlier operation
+    order_id: Optional[str] = None
+    user_id: Optional[uuid.UUID] = None
+    product_name: Optional[str] = Field(None, min_length=1)
+    price: Optional[Decimal] = Field(None, ge=0)
+    quantity: Optional[int] = Field(None, gt=0)
+    merge: bool = False
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperationRequest] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class BatchResultResponse(BaseModel):
+    op: str
+    order_id: uuid.UUID
+    # The order after the operation; add_item returns its item instead
+    order: Optional[OrderResponse] = None
+    item: Optional[OrderItemResponse] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResultResponse]
+
+
+# Change feed schemas
+class ChangeResponse(BaseModel):
+    cursor: str
+    entity: str
+    id: uuid.UUID
+    op: str
+    data: Dict[str, Any]
+    changed_at: datetime
+
+
+class ChangeFeedResponse(BaseModel):
+    changes: List[ChangeResponse]
+    next_cursor: str
+    has_more: bool
+
+
+# Stats schemas
+class DailyRevenueResponse(BaseModel):
+    day: date
+    orders: int
+    paid_orders: int
+    revenue: Decimal
+
+
+class StatusTotalsResponse(BaseModel):
+    status: str
+    orders: int
+    amount: Decimal
+
+
+class BasketStatsResponse(BaseModel):
+    orders: int
+    items: int
+    revenue: Decimal
+    average_amount: Decimal
+    average_items: Decimal
+
+
+# Debug schemas
+class SlowQueryResponse(BaseModel):
+    fingerprint: str
+    statement: str
+    parameter_shape: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    last_seen: Optional[datetime] = None
+    routes: Dict[str, int] = {}
+    explain: Optional[str] = None
+
+
+class ProfileSummaryResponse(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: str
+    status_code: Optional[int] = None
+    started_at: datetime
+    duration_ms: float
+    samples: int
 
 
 # Error response
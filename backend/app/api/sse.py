@@ -0,0 +1,39 @@
+"""Server-Sent Events encoding for the order change stream."""
+
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from app.infrastructure.events import Subscription
+
+KEEPALIVE_SECONDS = 15.0
+RETRY_MS = 3000
+
+
+def format_event(data: Optional[dict] = None, event: Optional[str] = None) -> str:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data if data is not None else {}, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def order_event_stream(subscription: Subscription, keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+    """Encode events of ``subscription`` until the client goes away.
+
+    ``order`` events carry ``event_payload`` dictionaries; ``resync`` tells the
+    client that events were lost (slow consumer or broker reconnect) and it
+    should reload its state. Comment lines keep idle proxies from closing the
+    connection.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    while True:
+        if subscription.overflowed:
+            subscription.overflowed = False
+            yield format_event(event="resync")
+        try:
+            payload = await asyncio.wait_for(subscription.get(), keepalive)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+            continue
+        yield format_event(payload, event="order")
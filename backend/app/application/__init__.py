@@ -1,4 +1,6 @@
 from .user_service import UserService
 from .order_service import OrderService
+from .change_feed_service import ChangeFeedService
+from .stats_service import StatsService
 
-__all__ = ["UserService", "OrderService"]
+__all__ = ["UserService", "OrderService", "ChangeFeedService", "StatsService"]
@@ -0,0 +1,47 @@
+"""Сервис ленты изменений для синхронизации внешних систем."""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+MAX_LIMIT = 1000
+
+
+def encode_cursor(txid: int, seq: int) -> str:
+    return f"{txid}-{seq}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """Разобрать курсор вида ``<txid>-<seq>``; пустой курсор — начало ленты."""
+    if not cursor:
+        return 0, 0
+    try:
+        txid, seq = cursor.split("-")
+        position = int(txid), int(seq)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if min(position) < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return position
+
+
+@dataclass
+class ChangePage:
+    changes: List
+    next_cursor: str
+    has_more: bool
+
+
+class ChangeFeedService:
+    """Чтение журнала изменений порциями после курсора."""
+
+    def __init__(self, change_repo):
+        self.change_repo = change_repo
+
+    async def changes_since(self, cursor: Optional[str], limit: int = 100) -> ChangePage:
+        txid, seq = decode_cursor(cursor)
+        limit = max(1, min(limit, MAX_LIMIT))
+        # Одна лишняя строка показывает, есть ли продолжение
+        records = await self.change_repo.read_since(txid, seq, limit + 1)
+        page = records[:limit]
+        next_cursor = encode_cursor(page[-1].txid, page[-1].seq) if page else encode_cursor(txid, seq)
+        return ChangePage(changes=page, next_cursor=next_cursor, has_more=len(records) > limit)
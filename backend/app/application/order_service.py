@@ -1,30 +1,208 @@
 """Сервис для работы с заказами."""
 
+import copy
 import uuid
+from dataclasses import dataclass
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from app.domain.order import Order, OrderItem, OrderStatus
-from app.domain.exceptions import OrderNotFoundError, UserNotFoundError
+from app.application.pagination import (
+    DEFAULT_PAGE_SIZE,
+    Page,
+    clamp_limit,
+    decode_history_cursor,
+    decode_item_cursor,
+    encode_history_cursor,
+    encode_item_cursor,
+)
+from app.domain.order import Order, OrderItem, OrderStatus, PAID_STATUSES
+from app.domain.events import OrderChanged, OrderEventType
+from app.domain.exceptions import DomainException, OrderArchivedError, OrderNotFoundError, UserNotFoundError
+
+
+@dataclass
+class OrderOverview:
+    """Заказ для отображения: шапка со счётчиками, первая страница позиций, история."""
+
+    header: object
+    items: Page
+    status_history: List
+
+
+# Операции пакета: создание заказа, добавление позиции и переходы статуса
+BATCH_ACTIONS = ("create_order", "add_item", "pay", "cancel", "ship", "complete")
+TRANSITIONS = ("pay", "cancel", "ship", "complete")
+
+
+@dataclass
+class BatchOperation:
+    """Одна операция пакета; заказ задаётся ``order_id`` или индексом более ранней операции ``order_ref``."""
+
+    action: str
+    order_id: Optional[uuid.UUID] = None
+    order_ref: Optional[int] = None
+    user_id: Optional[uuid.UUID] = None
+    product_name: Optional[str] = None
+    price: Optional[Decimal] = None
+    quantity: Optional[int] = None
+    merge: bool = False
+
+
+@dataclass
+class BatchResult:
+    """Результат операции: снимок заказа после неё (для add_item — позиция)."""
+
+    action: str
+    order_id: uuid.UUID
+    order: Optional[Order] = None
+    item: Optional[OrderItem] = None
+
+
+class BatchOperationError(Exception):
+    """Операция пакета ``index`` не выполнена; ``error`` — исходное исключение."""
+
+    def __init__(self, index: int, error: Exception):
+        self.index = index
+        self.error = error
+        super().__init__(f"Operation {index}: {error}")
 
 
 class OrderService:
     """Сервис для операций с заказами."""
 
-    def __init__(self, order_repo, user_repo):
+    def __init__(self, order_repo, user_repo, events=None, stats=None, user_stats=None):
         self.order_repo = order_repo
         self.user_repo = user_repo
+        # Публикатор событий; события уходят подписчикам только после коммита транзакции
+        self.events = events
+        # Агрегаты для аналитики (OrderStatsRepository) и счётчики пользователя
+        # (UserOrderStatsRepository); обновляются в той же транзакции, что и заказ
+        self.stats = stats
+        self.user_stats = user_stats
+
+    async def _notify(self, type: OrderEventType, order: Order, item: Optional[OrderItem] = None) -> None:
+        if self.events is not None:
+            await self.events.publish(OrderChanged.of(type, order, item))
+
+    async def _transition(self, order: Order, transition) -> Order:
+        previous = order.status
+        transition()
+        await self.order_repo.save(order)
+        if self.stats is not None:
+            await self.stats.move(order, previous)
+        if self.user_stats is not None:
+            paid = (order.status in PAID_STATUSES) - (previous in PAID_STATUSES)
+            cancelled = (order.status == OrderStatus.CANCELLED) - (previous == OrderStatus.CANCELLED)
+            if paid or cancelled:
+                await self.user_stats.add(order.user_id, paid_orders=paid, paid_amount=paid * order.total_amount,
+                                          cancelled_orders=cancelled)
+        await self._notify(OrderEventType.STATUS_CHANGED, order)
+        return order
 
     # TODO: Реализовать create_order(user_id) -> Order
     async def create_order(self, user_id: uuid.UUID) -> Order:
         user = await self.user_repo.find_by_id(user_id)
         if not user:
             raise UserNotFoundError(f"User with ID {user_id} ws not found!")
-        order = Order(user_id=user_id)
+        # Шардированный репозиторий выдаёт id с номером шарда пользователя
+        new_order_id = getattr(self.order_repo, "new_order_id", None)
+        order = Order(user_id=user_id, id=new_order_id(user_id) if new_order_id else None)
         await self.order_repo.save(order)
+        if self.stats is not None:
+            await self.stats.add(order, order.status, orders=1, amount=order.total_amount)
+        if self.user_stats is not None:
+            await self.user_stats.add(user_id, orders=1, last_order_at=order.created_at)
+        await self._notify(OrderEventType.CREATED, order)
         
         return order
 
+    async def execute_batch(self, operations: List[BatchOperation]) -> List[BatchResult]:
+        """Выполнить операции по порядку над загруженными один раз агрегатами.
+
+        Каждый заказ читается не больше одного раза и сохраняется один раз в
+        конце, вместе со счётчиками аналитики и событиями. Ошибка любой
+        операции прерывает пакет до записи (``BatchOperationError``), а откат
+        транзакции вызывающим отменяет всё.
+        """
+        loaded: Dict[uuid.UUID, Order] = {}
+        # Статус, сумма и число единиц товара заказа до пакета; None — создан в пакете
+        before: Dict[uuid.UUID, Optional[Tuple[OrderStatus, Decimal, int]]] = {}
+        results: List[BatchResult] = []
+        changes: List[OrderChanged] = []
+        for index, operation in enumerate(operations):
+            try:
+                results.append(await self._apply(operation, results, loaded, before, changes))
+            except (DomainException, ValueError) as exc:
+                raise BatchOperationError(index, exc) from exc
+        for order_id, order in loaded.items():
+            await self.order_repo.save(order)
+            await self._account(order, before[order_id])
+        if self.events is not None:
+            for change in changes:
+                await self.events.publish(change)
+        return results
+
+    async def _apply(self, operation: BatchOperation, results: List[BatchResult], loaded: Dict[uuid.UUID, Order],
+                     before: Dict, changes: List[OrderChanged]) -> BatchResult:
+        action = operation.action
+        if action not in BATCH_ACTIONS:
+            raise ValueError(f"Unknown batch operation: {action!r}")
+        if action == "create_order":
+            if not await self.user_repo.find_by_id(operation.user_id):
+                raise UserNotFoundError(f"User with ID {operation.user_id} ws not found!")
+            new_order_id = getattr(self.order_repo, "new_order_id", None)
+            order = Order(user_id=operation.user_id,
+                          id=new_order_id(operation.user_id) if new_order_id else None)
+            loaded[order.id], before[order.id] = order, None
+            changes.append(OrderChanged.of(OrderEventType.CREATED, order))
+            return BatchResult(action, order.id, order=copy.deepcopy(order))
+
+        if operation.order_ref is not None:
+            if not 0 <= operation.order_ref < len(results):
+                raise ValueError(f"Reference to operation {operation.order_ref} which has not run yet")
+            order_id = results[operation.order_ref].order_id
+        elif operation.order_id is not None:
+            order_id = operation.order_id
+        else:
+            raise ValueError(f"Operation {action!r} needs an order")
+        order = loaded.get(order_id)
+        if order is None:
+            order = await self._get_active(order_id)
+            loaded[order_id] = order
+            before[order_id] = (order.status, order.total_amount, sum(i.quantity for i in order.items))
+
+        if action == "add_item":
+            item = copy.copy(order.add_item(operation.product_name, operation.price, operation.quantity,
+                                            merge=operation.merge))
+            changes.append(OrderChanged.of(OrderEventType.ITEM_ADDED, order, item))
+            return BatchResult(action, order_id, item=item)
+        getattr(order, action)()
+        changes.append(OrderChanged.of(OrderEventType.STATUS_CHANGED, order))
+        return BatchResult(action, order_id, order=copy.deepcopy(order))
+
+    async def _account(self, order: Order, before: Optional[Tuple[OrderStatus, Decimal, int]]) -> None:
+        """Счётчики аналитики и пользователя за все изменения заказа в пакете разом."""
+        items = sum(item.quantity for item in order.items)
+        status0, total0, items0 = before or (OrderStatus.CREATED, Decimal("0"), 0)
+        if self.stats is not None:
+            if before is None:
+                await self.stats.add(order, order.status, orders=1, amount=order.total_amount, items=items)
+            elif status0 != order.status:
+                await self.stats.add(order, status0, -1, -total0, -items0)
+                await self.stats.add(order, order.status, 1, order.total_amount, items)
+            elif (order.total_amount, items) != (total0, items0):
+                await self.stats.add(order, order.status, amount=order.total_amount - total0, items=items - items0)
+        if self.user_stats is not None:
+            paid = (order.status in PAID_STATUSES) - (status0 in PAID_STATUSES)
+            paid_amount = (order.status in PAID_STATUSES) * order.total_amount - (status0 in PAID_STATUSES) * total0
+            cancelled = (order.status == OrderStatus.CANCELLED) - (status0 == OrderStatus.CANCELLED)
+            if before is None:
+                await self.user_stats.add(order.user_id, orders=1, paid_orders=paid, paid_amount=paid_amount,
+                                          cancelled_orders=cancelled, last_order_at=order.created_at)
+            elif paid or paid_amount or cancelled:
+                await self.user_stats.add(order.user_id, paid_orders=paid, paid_amount=paid_amount,
+                                          cancelled_orders=cancelled)
+
     # TODO: Реализовать get_order(order_id) -> Order
     async def get_order(self, order_id: uuid.UUID) -> Order:
         order = await self.order_repo.find_by_id(order_id)
@@ -32,6 +210,15 @@ class OrderService:
             raise OrderNotFoundError(f"Order with ID {order_id} was not found!")
         
         return order
+
+    async def _get_active(self, order_id: uuid.UUID) -> Order:
+        """Заказ для изменения: архивные заказы доступны только для чтения."""
+        order = await self.order_repo.find_by_id(order_id, include_archive=False)
+        if order:
+            return order
+        if await self.order_repo.is_archived(order_id):
+            raise OrderArchivedError(order_id)
+        raise OrderNotFoundError(f"Order with ID {order_id} was not found!")
         
     # TODO: Реализовать add_item(order_id, product_name, price, quantity) -> OrderItem
     async def add_item(
@@ -40,45 +227,57 @@ class OrderService:
         product_name: str,
         price: Decimal,
         quantity: int,
+        merge: bool = False,
     ) -> OrderItem:
-        order = await self.get_order(order_id)
-        item = order.add_item(product_name, price, quantity)
-        await self.order_repo.save(order)
-        
+        """Добавить позицию; при ``merge`` повтор товара с той же ценой увеличивает количество
+        существующей позиции, которая сохраняется UPDATE вместо новой строки."""
+        item, _ = await self.add_or_merge_item(order_id, product_name, price, quantity, merge)
         return item
 
+    async def add_or_merge_item(
+        self,
+        order_id: uuid.UUID,
+        product_name: str,
+        price: Decimal,
+        quantity: int,
+        merge: bool = False,
+    ) -> Tuple[OrderItem, bool]:
+        """Как ``add_item``, но вместе с позицией сообщает, была ли она объединена с существующей."""
+        order = await self._get_active(order_id)
+        item = order.merge_item(product_name, price, quantity) if merge else None
+        merged = item is not None
+        if not merged:
+            item = order.add_item(product_name, price, quantity)
+        await self.order_repo.save(order)
+        # Счётчики получают только добавленное количество, и для объединённой позиции тоже
+        added = price * quantity
+        if self.stats is not None:
+            await self.stats.add(order, order.status, amount=added, items=quantity)
+        if self.user_stats is not None and order.status in PAID_STATUSES:
+            await self.user_stats.add(order.user_id, paid_amount=added)
+        await self._notify(OrderEventType.ITEM_ADDED, order, item)
+        return item, merged
+
     # TODO: Реализовать pay_order(order_id) -> Order
     # КРИТИЧНО: гарантировать что нельзя оплатить дважды!
     async def pay_order(self, order_id: uuid.UUID) -> Order:
-        order = await self.get_order(order_id)
-        order.pay()
-        await self.order_repo.save(order)
-
-        return order
+        order = await self._get_active(order_id)
+        return await self._transition(order, order.pay)
     
     # TODO: Реализовать cancel_order(order_id) -> Order
     async def cancel_order(self, order_id: uuid.UUID) -> Order:
-        order = await self.get_order(order_id)
-        order.cancel()
-        await self.order_repo.save(order)
-
-        return order
+        order = await self._get_active(order_id)
+        return await self._transition(order, order.cancel)
 
     # TODO: Реализовать ship_order(order_id) -> Order
     async def ship_order(self, order_id: uuid.UUID) -> Order:
-        order = await self.get_order(order_id)
-        order.ship() 
-        await self.order_repo.save(order)
-
-        return order
+        order = await self._get_active(order_id)
+        return await self._transition(order, order.ship)
 
     # TODO: Реализовать complete_order(order_id) -> Order
     async def complete_order(self, order_id: uuid.UUID) -> Order:
-        order = await self.get_order(order_id)
-        order.complete() 
-        await self.order_repo.save(order)
-
-        return order
+        order = await self._get_active(order_id)
+        return await self._transition(order, order.complete)
 
     # TODO: Реализовать list_orders(user_id: Optional) -> List[Order]
     async def list_orders(self, user_id: Optional[uuid.UUID] = None) -> List[Order]:
@@ -89,6 +288,54 @@ class OrderService:
 
     # TODO: Реализовать get_order_history(order_id) -> List[OrderStatusChange]
     async def get_order_history(self, order_id: uuid.UUID) -> List:
-        order = await self.get_order(order_id)
+        header = await self._get_header(order_id)
+        return await self.order_repo.find_history(order_id, archived=header.archived)
 
-        return order.status_history
+    async def _get_header(self, order_id: uuid.UUID):
+        header = await self.order_repo.find_header(order_id)
+        if not header:
+            raise OrderNotFoundError(f"Order with ID {order_id} was not found!")
+        return header
+
+    async def get_history_page(self, order_id: uuid.UUID, cursor: Optional[str] = None,
+                               limit: int = DEFAULT_PAGE_SIZE) -> Page:
+        """Страница истории статусов после ``cursor``; позиции заказа не читаются."""
+        after = decode_history_cursor(cursor)
+        limit = clamp_limit(limit)
+        header = await self._get_header(order_id)
+        # Одна лишняя строка показывает, есть ли продолжение
+        changes = await self.order_repo.find_history(order_id, after, limit + 1, header.archived)
+        page = changes[:limit]
+        next_cursor = encode_history_cursor(page[-1].changed_at, page[-1].id) if len(changes) > limit else None
+        return Page(page, next_cursor)
+
+    async def get_items_page(self, order_id: uuid.UUID, cursor: Optional[str] = None,
+                             limit: int = DEFAULT_PAGE_SIZE, header=None) -> Page:
+        """Страница позиций заказа после ``cursor``."""
+        after = decode_item_cursor(cursor)
+        limit = clamp_limit(limit)
+        header = header or await self._get_header(order_id)
+        items = await self.order_repo.find_items(order_id, after, limit + 1, header.archived)
+        page = items[:limit]
+        next_cursor = encode_item_cursor(page[-1][0], page[-1][1].id) if len(items) > limit else None
+        return Page([item for _, item in page], next_cursor)
+
+    async def get_order_overview(self, order_id: uuid.UUID, items_limit: int = DEFAULT_PAGE_SIZE) -> OrderOverview:
+        """Заказ с первой страницей позиций, полной историей и счётчиками."""
+        header = await self._get_header(order_id)
+        items = await self.get_items_page(order_id, None, items_limit, header)
+        history = await self.order_repo.find_history(order_id, archived=header.archived)
+        return OrderOverview(header, items, history)
+
+    async def search_orders(
+        self,
+        product: str,
+        user_id: Optional[uuid.UUID] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List:
+        """Заказы, содержащие товар с подстрокой ``product`` в названии."""
+        product = product.strip()
+        if not product:
+            raise ValueError("Search term must not be empty")
+        return await self.order_repo.search_by_product(product, user_id, limit, offset)
@@ -0,0 +1,71 @@
+"""Курсоры keyset-пагинации для позиций и истории заказа."""
+
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass
+class Page:
+    entries: List
+    next_cursor: Optional[str]
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def _encode(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values
+
+
+def encode_item_cursor(line_no: int, item_id: uuid.UUID) -> str:
+    return _encode([line_no, str(item_id)])
+
+
+def decode_item_cursor(cursor: Optional[str]) -> Optional[Tuple[int, uuid.UUID]]:
+    """(line_no, id) последней позиции предыдущей страницы; пустой курсор — начало."""
+    if not cursor:
+        return None
+    try:
+        line_no, item_id = _decode(cursor, 2)
+        if type(line_no) is not int:
+            raise ValueError(line_no)
+        return line_no, uuid.UUID(item_id)
+    except (TypeError, AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def encode_history_cursor(changed_at: datetime, change_id: uuid.UUID) -> str:
+    return _encode([changed_at.isoformat(), str(change_id)])
+
+
+def decode_history_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """(changed_at, id) последней записи предыдущей страницы; пустой курсор — начало."""
+    if not cursor:
+        return None
+    try:
+        changed_at, change_id = _decode(cursor, 2)
+        return datetime.fromisoformat(changed_at), uuid.UUID(change_id)
+    except (TypeError, AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
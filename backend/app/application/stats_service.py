@@ -0,0 +1,81 @@
+"""Сервис аналитики по заказам на основе агрегатов."""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from app.domain.order import OrderStatus, PAID_STATUSES
+
+CENT = Decimal("0.01")
+
+
+@dataclass
+class DailyRevenue:
+    day: date
+    orders: int
+    paid_orders: int
+    revenue: Decimal
+
+
+@dataclass
+class StatusTotals:
+    status: OrderStatus
+    orders: int
+    amount: Decimal
+
+
+@dataclass
+class BasketStats:
+    orders: int
+    items: int
+    revenue: Decimal
+    average_amount: Decimal
+    average_items: Decimal
+
+
+class StatsService:
+    """Выручка, заказы по статусам и средний чек за период."""
+
+    def __init__(self, stats_repo):
+        self.stats_repo = stats_repo
+
+    @staticmethod
+    def _check_period(date_from: Optional[date], date_to: Optional[date]) -> None:
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("Period start must not be after its end")
+
+    async def revenue_by_day(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[DailyRevenue]:
+        """Созданные и оплаченные заказы и выручка по дням создания заказа."""
+        self._check_period(date_from, date_to)
+        days: Dict[date, DailyRevenue] = {}
+        for bucket in await self.stats_repo.buckets(date_from, date_to):
+            day = days.setdefault(bucket.day, DailyRevenue(bucket.day, 0, 0, Decimal("0.00")))
+            day.orders += bucket.orders
+            if bucket.status in PAID_STATUSES:
+                day.paid_orders += bucket.orders
+                day.revenue += bucket.amount
+        return [d for d in days.values() if d.orders]
+
+    async def orders_by_status(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[StatusTotals]:
+        """Число и сумма заказов в каждом статусе."""
+        self._check_period(date_from, date_to)
+        orders, amounts = defaultdict(int), defaultdict(Decimal)
+        for bucket in await self.stats_repo.buckets(date_from, date_to):
+            orders[bucket.status] += bucket.orders
+            amounts[bucket.status] += bucket.amount
+        return [StatusTotals(status, orders[status], amounts[status].quantize(CENT)) for status in OrderStatus]
+
+    async def basket(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> BasketStats:
+        """Средний чек и среднее число единиц товара в оплаченном заказе."""
+        self._check_period(date_from, date_to)
+        orders, items, revenue = 0, 0, Decimal("0")
+        for bucket in await self.stats_repo.buckets(date_from, date_to):
+            if bucket.status in PAID_STATUSES:
+                orders += bucket.orders
+                items += bucket.items
+                revenue += bucket.amount
+        average_amount = (revenue / orders).quantize(CENT) if orders else Decimal("0.00")
+        average_items = (Decimal(items) / orders).quantize(CENT) if orders else Decimal("0.00")
+        return BasketStats(orders, items, revenue.quantize(CENT), average_amount, average_items)
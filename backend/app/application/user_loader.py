@@ -0,0 +1,52 @@
+"""Пакетная загрузка пользователей в духе DataLoader.
+
+``load`` не обращается к БД сразу: id копятся до конца текущего шага цикла
+событий, затем все накопленные пользователи читаются одним вызовом
+``repo.find_by_ids``. Загрузчик живёт один запрос; повторный ``load`` того же
+id берёт результат из его кэша.
+"""
+
+import asyncio
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from app.domain.user import User
+
+
+class UserLoader:
+    """Собирает id пользователей и читает их одним запросом."""
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._cache: Dict[uuid.UUID, asyncio.Future] = {}
+        self._queue: List[uuid.UUID] = []
+        self._task: Optional[asyncio.Task] = None
+        # Число обращений к repo.find_by_ids
+        self.batches = 0
+
+    def load(self, user_id: uuid.UUID) -> "asyncio.Future[Optional[User]]":
+        """Future с пользователем или None, если его нет."""
+        future = self._cache.get(user_id)
+        if future is None:
+            future = self._cache[user_id] = asyncio.get_running_loop().create_future()
+            if not self._queue:
+                # Задача стартует на следующем шаге цикла, когда соседние load уже в очереди
+                self._task = asyncio.ensure_future(self._dispatch())
+            self._queue.append(user_id)
+        return future
+
+    async def load_many(self, user_ids: Iterable[uuid.UUID]) -> List[Optional[User]]:
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    async def _dispatch(self) -> None:
+        batch, self._queue = self._queue, []
+        self.batches += 1
+        try:
+            users = await self.repo.find_by_ids(batch)
+        except Exception as exc:
+            # Ждущие получают ошибку, а сама задача завершается с ней же и не прячет её
+            for user_id in batch:
+                self._cache.pop(user_id).set_exception(exc)
+            raise
+        for user_id in batch:
+            self._cache[user_id].set_result(users.get(user_id))
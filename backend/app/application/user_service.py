@@ -10,8 +10,10 @@ from app.domain.exceptions import EmailAlreadyExistsError, UserNotFoundError
 class UserService:
     """Сервис для операций с пользователями."""
 
-    def __init__(self, repo):
+    def __init__(self, repo, order_stats=None):
         self.repo = repo
+        # Счётчики заказов пользователя (UserOrderStatsRepository)
+        self.order_stats = order_stats
 
     # TODO: Реализовать register(email, name) -> User
     # 1. Проверить что email не занят
@@ -42,3 +44,8 @@ class UserService:
     # TODO: Реализовать list_users() -> List[User]
     async def list_users(self) -> List[User]:
         return await self.repo.find_all()
+
+    async def get_summary(self, user_id: uuid.UUID):
+        """Число заказов, сумма оплаченных и дата последнего заказа пользователя."""
+        await self.get_by_id(user_id)
+        return await self.order_stats.find(user_id)
@@ -2,7 +2,8 @@
 # Students must implement these classes
 
 from .user import User
-from .order import Order, OrderItem, OrderStatus, OrderStatusChange
+from .order import Order, OrderItem, OrderStatus, OrderStatusChange, PAID_STATUSES
+from .events import OrderChanged, OrderEventType
 from .exceptions import (
     DomainException,
     InvalidEmailError,
@@ -13,6 +14,7 @@ from .exceptions import (
     InvalidAmountError,
     UserNotFoundError,
     OrderNotFoundError,
+    OrderArchivedError,
     EmailAlreadyExistsError,
 )
 
@@ -22,6 +24,9 @@ __all__ = [
     "OrderItem",
     "OrderStatus",
     "OrderStatusChange",
+    "PAID_STATUSES",
+    "OrderChanged",
+    "OrderEventType",
     "DomainException",
     "InvalidEmailError",
     "OrderAlreadyPaidError",
@@ -31,5 +36,6 @@ __all__ = [
     "InvalidAmountError",
     "UserNotFoundError",
     "OrderNotFoundError",
+    "OrderArchivedError",
     "EmailAlreadyExistsError",
 ]
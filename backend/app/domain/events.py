@@ -0,0 +1,41 @@
+"""Доменные события заказа."""
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+from .order import Order, OrderItem, OrderStatus
+
+
+class OrderEventType(str, Enum):
+    CREATED = 'order_created'
+    ITEM_ADDED = 'item_added'
+    STATUS_CHANGED = 'status_changed'
+
+
+@dataclass(frozen=True)
+class OrderChanged:
+    """Компактное описание изменения заказа: статус и сумма после операции."""
+
+    type: OrderEventType
+    order_id: uuid.UUID
+    user_id: uuid.UUID
+    status: OrderStatus
+    total_amount: Decimal
+    created_at: datetime
+    item: Optional[OrderItem] = None
+
+    @classmethod
+    def of(cls, type: OrderEventType, order: Order, item: Optional[OrderItem] = None) -> "OrderChanged":
+        return cls(
+            type=type,
+            order_id=order.id,
+            user_id=order.user_id,
+            status=order.status,
+            total_amount=order.total_amount,
+            created_at=order.created_at,
+            item=item,
+        )
@@ -71,6 +71,14 @@ class OrderNotFoundError(DomainException):
         super().__init__(f"Order {order_id} not found")
 
 
+class OrderArchivedError(DomainException):
+    """Raised when attempting to modify an order moved to the archive."""
+
+    def __init__(self, order_id):
+        self.order_id = order_id
+        super().__init__(f"Order {order_id} is archived and read-only")
+
+
 class EmailAlreadyExistsError(DomainException):
     """Raised when email is already registered."""
 
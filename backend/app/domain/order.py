@@ -26,6 +26,10 @@ class OrderStatus(str, Enum):
     SHIPPED = 'shipped'
     COMPLETED = 'completed'
 
+
+# Статусы оплаченного заказа: такие заказы составляют выручку
+PAID_STATUSES = frozenset({OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.COMPLETED})
+
 # TODO: Реализовать OrderItem (dataclass)
 # Поля: product_name, price, quantity, id, order_id
 # Свойство: subtotal (price * quantity)
@@ -123,9 +127,13 @@ class Order:
         self.status = OrderStatus.COMPLETED
         self.status_history.append(OrderStatusChange(order_id=self.id, status=self.status))
     
-    def add_item(self, product_name: str, price: Decimal, quantity: int) -> OrderItem:
+    def add_item(self, product_name: str, price: Decimal, quantity: int, merge: bool = False) -> OrderItem:
+        """Добавить позицию; при ``merge`` количество прибавляется к позиции с тем же товаром и ценой."""
         if self.status == OrderStatus.CANCELLED:
             raise OrderCancelledError("Order {self.id} is already cancelled!")
+        merged = self.merge_item(product_name, price, quantity) if merge else None
+        if merged is not None:
+            return merged
         item = OrderItem(product_name=product_name, price=price, quantity=quantity, order_id=self.id)
         self.items.append(item)
         self.total_amount += item.subtotal
@@ -134,4 +142,19 @@ class Order:
             raise InvalidAmountError(f"Order total cannot be negative!")
         return item
 
+    def find_item(self, product_name: str, price: Decimal) -> Optional[OrderItem]:
+        return next((i for i in self.items if i.product_name == product_name and i.price == price), None)
+
+    def merge_item(self, product_name: str, price: Decimal, quantity: int) -> Optional[OrderItem]:
+        """Прибавить количество к позиции с тем же товаром и ценой; None, если такой позиции нет."""
+        if self.status == OrderStatus.CANCELLED:
+            raise OrderCancelledError(f"Order {self.id} is already cancelled!")
+        existing = self.find_item(product_name, price)
+        if existing is None:
+            return None
+        added = OrderItem(product_name=product_name, price=price, quantity=quantity, order_id=self.id)
+        existing.quantity += added.quantity
+        self.total_amount += added.subtotal
+        return existing
+
 
@@ -1,4 +1,15 @@
-from .db import engine, SessionLocal, get_db
+from .db import Database, get_db, make_engine, slow_query_log
 from .repositories import UserRepository, OrderRepository
+from .memory_repositories import InMemoryStore, InMemoryUserRepository, InMemoryOrderRepository
 
-__all__ = ["engine", "SessionLocal", "get_db", "UserRepository", "OrderRepository"]
+__all__ = [
+    "Database",
+    "get_db",
+    "make_engine",
+    "slow_query_log",
+    "UserRepository",
+    "OrderRepository",
+    "InMemoryStore",
+    "InMemoryUserRepository",
+    "InMemoryOrderRepository",
+]
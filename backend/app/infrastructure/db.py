@@ -1,21 +1,153 @@
-"""Database connection and session management."""
+"""Database connection and session management.
 
-import os
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+Nothing here connects at import time: ``Database`` builds its engine on first
+use, normally from the application lifespan, which also warms the pool.
+"""
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "postgresql+asyncpg://postgres:postgres@db:5432/marketplace"
-)
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, Optional
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
+from app.settings import Settings
 
-async def get_db() -> AsyncSession:
+from .request_context import get_request_context
+from .schema import sqlite_connect_args
+from .slow_query_log import SlowQueryLog
+
+# Shared by every engine in the process so /debug/slow-queries sees all of them.
+slow_query_log = SlowQueryLog()
+
+
+def make_engine(url: str, **kwargs) -> AsyncEngine:
+    """Create an async engine; SQLite URLs get UUID/Decimal/datetime type adapters."""
+    if url.startswith("sqlite"):
+        kwargs.setdefault("connect_args", sqlite_connect_args())
+    return create_async_engine(url, **kwargs)
+
+
+async def prime_statements(session: AsyncSession) -> None:
+    """Run the hot repository reads once so they are compiled and, on asyncpg, prepared.
+
+    asyncpg keeps prepared statements per connection, so this is done on every
+    connection opened by ``Database.warm_up``.
+    """
+    from .repositories import OrderRepository, UserRepository
+
+    missing = uuid.UUID(int=0)
+    users, orders = UserRepository(session), OrderRepository(session)
+    await users.find_by_id(missing)
+    await users.find_by_email("")
+    await orders.find_by_id(missing)
+    await orders.find_by_user(missing)
+    await session.rollback()
+
+
+class Database:
+    """Engine and session factory owned by one application instance."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+        self.warm_up_ms: Optional[float] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            settings = self.settings
+            options = {"echo": settings.sql_echo}
+            if not settings.database_url.startswith("sqlite"):
+                options.update(
+                    pool_size=settings.db_pool_size,
+                    max_overflow=settings.db_max_overflow,
+                    pool_timeout=settings.db_pool_timeout,
+                )
+            self._engine = make_engine(settings.database_url, **options)
+            slow_query_log.threshold_ms = settings.slow_query_threshold_ms
+            slow_query_log.explain_sample_rate = settings.slow_query_explain_sample_rate
+            slow_query_log.install(self._engine)
+        return self._engine
+
+    @property
+    def session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
+        return self._session_factory
+
+    def pool_saturation(self) -> Optional[float]:
+        """Share of the pool's connections checked out, or None for SQLite and before first use."""
+        if self._engine is None or self.settings.database_url.startswith("sqlite"):
+            return None
+        capacity = self.settings.db_pool_size + self.settings.db_max_overflow
+        return self._engine.sync_engine.pool.checkedout() / capacity if capacity else None
+
+    async def warm_up(self, connections: Optional[int] = None) -> None:
+        """Open ``connections`` pool connections at once and prime each of them."""
+        if connections is None:
+            connections = self.settings.db_pool_warm
+        if self.settings.database_url.startswith("sqlite"):
+            connections = min(connections, 1)
+        else:
+            connections = min(connections, self.settings.db_pool_size)
+        started = time.perf_counter()
+
+        async def prime():
+            async with self.session_factory() as session:
+                await prime_statements(session)
+
+        # Sessions hold their connection until closed, so running them
+        # concurrently makes the pool open distinct connections.
+        await asyncio.gather(*(prime() for _ in range(connections)))
+        self.warm_up_ms = (time.perf_counter() - started) * 1000
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+        self._engine = None
+        self._session_factory = None
+
+
+async def apply_deadline(session: AsyncSession, remaining: float, lock_timeout: float) -> None:
+    """Bound the statements and lock waits of the session's transaction by the request deadline.
+
+    ``set_config(..., true)`` is ``SET LOCAL``: the limits end with the transaction.
+    """
+    statement_ms = max(1, int(remaining * 1000))
+    lock_ms = min(statement_ms, int(lock_timeout * 1000)) if lock_timeout > 0 else statement_ms
+    await session.execute(
+        text("SELECT set_config('statement_timeout', :statement_ms, true), "
+             "set_config('lock_timeout', :lock_ms, true)"),
+        {"statement_ms": f"{statement_ms}ms", "lock_ms": f"{lock_ms}ms"},
+    )
+
+
+async def begin_transaction(session: AsyncSession, settings: Settings) -> None:
+    """Start the session's next transaction at ``db_isolation_level``, bounded by the request deadline.
+
+    PostgreSQL only: SQLite has no statement timeout (DeadlineMiddleware's
+    asyncio timeout covers it) and is always serializable.
+    """
+    if settings.database_url.startswith("sqlite"):
+        return
+    if settings.db_isolation_level:
+        await session.connection(execution_options={"isolation_level": settings.db_isolation_level})
+    context = get_request_context()
+    remaining = context.remaining if context is not None else None
+    if remaining is not None:
+        await apply_deadline(session, remaining, settings.db_lock_timeout_ms / 1000)
+
+
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
     """Dependency for getting database session."""
-    async with SessionLocal() as session:
+    database: Database = request.app.state.database
+    async with database.session_factory() as session:
         try:
+            await begin_transaction(session, database.settings)
             yield session
             await session.commit()
         except Exception:
@@ -0,0 +1,216 @@
+"""Publish/subscribe for order change events.
+
+``OrderService`` publishes ``OrderChanged`` through a ``SessionEventPublisher``
+bound to the request's session, so events only leave the process once the
+transaction that produced them commits:
+
+* ``EventBroker`` (in-process) keeps published events on ``session.info`` and
+  fans them out to subscribers from the session's ``after_commit`` hook;
+  rolled-back events are dropped;
+* ``PostgresEventBroker`` sends ``pg_notify`` inside the transaction, which
+  PostgreSQL delivers only on commit, and ``LISTEN``s on a dedicated connection
+  so that subscribers in every worker process receive every event.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.domain.events import OrderChanged
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "order_events"
+PENDING_KEY = "pending_order_events"
+
+
+def event_payload(change: OrderChanged) -> dict:
+    """JSON-ready representation sent to clients."""
+    payload = {
+        "type": change.type.value,
+        "order_id": str(change.order_id),
+        "user_id": str(change.user_id),
+        "status": change.status.value,
+        "total_amount": str(change.total_amount),
+        "created_at": change.created_at.isoformat(),
+    }
+    if change.item is not None:
+        item = change.item
+        payload["item"] = {
+            "id": str(item.id),
+            "product_name": item.product_name,
+            "price": str(item.price),
+            "quantity": item.quantity,
+            "subtotal": str(item.subtotal),
+        }
+    return payload
+
+
+@dataclass(eq=False)
+class Subscription:
+    """Bounded queue of payloads for one subscriber.
+
+    A subscriber that falls ``maxsize`` events behind is marked ``overflowed``
+    and its backlog dropped; it should resynchronise from the API.
+    """
+
+    maxsize: int = 256
+    overflowed: bool = False
+    queue: asyncio.Queue = field(init=False)
+
+    def __post_init__(self):
+        self.queue = asyncio.Queue(self.maxsize)
+
+    def put(self, payload: dict) -> None:
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """In-process fan-out; events of one worker reach subscribers of that worker only."""
+
+    def __init__(self, subscriber_queue_size: int = 256):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._subscribers: Set[Subscription] = set()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[Subscription]:
+        subscription = Subscription(self.subscriber_queue_size)
+        self._subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscribers.discard(subscription)
+
+    def dispatch(self, payload: dict) -> None:
+        """Deliver an already committed event to local subscribers."""
+        for subscription in list(self._subscribers):
+            subscription.put(payload)
+
+    async def publish(self, session, payload: dict) -> None:
+        """Queue ``payload`` until ``session`` commits."""
+        if not session.in_transaction():
+            # Tie the event to a transaction so that a rollback discards it
+            await session.begin()
+        session.sync_session.info.setdefault(PENDING_KEY, []).append((self, payload))
+
+
+class PostgresEventBroker(EventBroker):
+    """``LISTEN``/``NOTIFY`` backend: events reach subscribers of every worker.
+
+    The LISTEN connection is opened with ``asyncpg.connect``, outside the
+    SQLAlchemy pool, so it is not counted in ``DB_POOL_SIZE``; ``app.serve``
+    reserves one connection per worker for it in ``DB_MAX_CONNECTIONS``.
+    """
+
+    def __init__(self, database_url: str, channel: str = CHANNEL, reconnect_delay: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    async def _listen_forever(self) -> None:
+        import asyncpg
+
+        while not self._stopping:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.get_running_loop().create_future()
+                # Bound as a default: a late callback of an old connection must not resolve the new future
+                self._connection.add_termination_listener(
+                    lambda _, closed=closed: closed.done() or closed.set_result(None)
+                )
+                await self._connection.add_listener(self.channel, self._on_notify)
+                await closed
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("event listener connection failed: %s", exc)
+            # Events committed while disconnected are lost; tell subscribers to resynchronise.
+            for subscription in list(self._subscribers):
+                subscription.overflowed = True
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        self.dispatch(json.loads(payload))
+
+    async def publish(self, session, payload: dict) -> None:
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": self.channel, "payload": json.dumps(payload)},
+        )
+
+
+def make_broker(settings) -> EventBroker:
+    if settings.events_backend == "postgres":
+        return PostgresEventBroker(settings.database_url)
+    if settings.events_backend != "memory":
+        raise ValueError(f"Unknown events backend: {settings.events_backend!r}")
+    return EventBroker()
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(session) -> None:
+    pending: List = session.info.pop(PENDING_KEY, None)
+    for broker, payload in pending or ():
+        broker.dispatch(payload)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+class SessionEventPublisher:
+    """Publishes domain events as part of the session's current transaction."""
+
+    def __init__(self, session, broker: EventBroker):
+        self.session = session
+        self.broker = broker
+
+    async def publish(self, change: OrderChanged) -> None:
+        await self.broker.publish(self.session, event_payload(change))
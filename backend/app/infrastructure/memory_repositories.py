@@ -0,0 +1,136 @@
+"""Репозитории в памяти процесса: быстрый бэкенд для тестов и базовая линия бенчмарков.
+
+Интерфейс совпадает с UserRepository и OrderRepository. Данные лежат в общем
+``InMemoryStore`` с хеш-индексами по id, email и user_id; объекты копируются
+при записи и чтении, как при обращении к БД, поэтому изменения, не сохранённые
+через ``save``, не видны другим читателям. Ограничения, которые в БД
+обеспечивают ключи и триггеры, проверяются при ``save``.
+"""
+
+import copy
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.domain.exceptions import EmailAlreadyExistsError, OrderAlreadyPaidError, UserNotFoundError
+from app.domain.order import Order, OrderItem, OrderStatus, OrderStatusChange
+from app.domain.user import User
+
+from .repositories import OrderHeader, OrderSummary, page_after
+
+
+@dataclass
+class InMemoryStore:
+    """Общие данные репозиториев одного «соединения»."""
+
+    users: Dict[uuid.UUID, User] = field(default_factory=dict)
+    user_ids_by_email: Dict[str, uuid.UUID] = field(default_factory=dict)
+    orders: Dict[uuid.UUID, Order] = field(default_factory=dict)
+    order_ids_by_user: Dict[uuid.UUID, List[uuid.UUID]] = field(default_factory=dict)
+
+
+class InMemoryUserRepository:
+    """Пользователи в памяти; email уникален."""
+
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    async def save(self, user: User) -> None:
+        owner = self.store.user_ids_by_email.get(user.email)
+        if owner is not None and owner != user.id:
+            raise EmailAlreadyExistsError(user.email)
+        previous = self.store.users.get(user.id)
+        if previous is not None and previous.email != user.email:
+            del self.store.user_ids_by_email[previous.email]
+        self.store.users[user.id] = copy.deepcopy(user)
+        self.store.user_ids_by_email[user.email] = user.id
+
+    async def find_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+        return copy.deepcopy(self.store.users.get(user_id))
+
+    async def find_by_ids(self, user_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, User]:
+        users = self.store.users
+        return {user_id: copy.deepcopy(users[user_id]) for user_id in user_ids if user_id in users}
+
+    async def find_by_email(self, email: str) -> Optional[User]:
+        user_id = self.store.user_ids_by_email.get(email)
+        return None if user_id is None else await self.find_by_id(user_id)
+
+    async def find_all(self) -> List[User]:
+        return [copy.deepcopy(user) for user in self.store.users.values()]
+
+
+class InMemoryOrderRepository:
+    """Заказы в памяти с индексом по user_id; архива нет."""
+
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def _check(self, order: Order) -> None:
+        """Ограничения схемы: владелец существует, сумма сходится, оплата одна."""
+        if order.user_id not in self.store.users:
+            raise UserNotFoundError(order.user_id)
+        if any(item.order_id not in (None, order.id) for item in order.items):
+            raise ValueError(f"Order {order.id} contains items of another order")
+        if order.total_amount != sum((item.subtotal for item in order.items), Decimal("0")):
+            raise ValueError(f"Order {order.id} total does not match its items")
+        if sum(change.status == OrderStatus.PAID for change in order.status_history) > 1:
+            raise OrderAlreadyPaidError(order.id)
+
+    async def save(self, order: Order) -> None:
+        self._check(order)
+        if order.id not in self.store.orders:
+            self.store.order_ids_by_user.setdefault(order.user_id, []).append(order.id)
+        self.store.orders[order.id] = copy.deepcopy(order)
+
+    async def find_by_id(self, order_id: uuid.UUID, include_archive: bool = True) -> Optional[Order]:
+        return copy.deepcopy(self.store.orders.get(order_id))
+
+    async def is_archived(self, order_id: uuid.UUID) -> bool:
+        return False
+
+    async def find_by_user(self, user_id: uuid.UUID) -> List[Order]:
+        return [copy.deepcopy(self.store.orders[order_id])
+                for order_id in self.store.order_ids_by_user.get(user_id, ())]
+
+    async def find_all(self) -> List[Order]:
+        return [copy.deepcopy(order) for order in self.store.orders.values()]
+
+    async def find_header(self, order_id: uuid.UUID) -> Optional[OrderHeader]:
+        order = self.store.orders.get(order_id)
+        if order is None:
+            return None
+        return OrderHeader(id=order.id, user_id=order.user_id, status=order.status,
+                           total_amount=order.total_amount, created_at=order.created_at,
+                           items_count=len(order.items), history_count=len(order.status_history))
+
+    async def find_items(self, order_id: uuid.UUID, after: Optional[Tuple[int, uuid.UUID]] = None,
+                         limit: Optional[int] = None, archived: bool = False) -> List[Tuple[int, OrderItem]]:
+        order = self.store.orders.get(order_id)
+        return copy.deepcopy(page_after(order.items if order else [], after, limit))
+
+    async def find_history(self, order_id: uuid.UUID, after: Optional[Tuple[datetime, uuid.UUID]] = None,
+                           limit: Optional[int] = None, archived: bool = False) -> List[OrderStatusChange]:
+        order = self.store.orders.get(order_id)
+        history = sorted(order.status_history if order else [], key=lambda h: (h.changed_at, str(h.id)))
+        if after is not None:
+            history = [h for h in history if (h.changed_at, str(h.id)) > (after[0], str(after[1]))]
+        return copy.deepcopy(history if limit is None else history[:limit])
+
+    async def search_by_product(self, product: str, user_id: Optional[uuid.UUID] = None,
+                                limit: int = 20, offset: int = 0) -> List[OrderSummary]:
+        """Полный просмотр: подстрока без учёта регистра, новые заказы первыми."""
+        needle = product.casefold()
+        candidates = (self.store.orders[order_id] for order_id in self.store.order_ids_by_user.get(user_id, ())) \
+            if user_id is not None else self.store.orders.values()
+        found = []
+        for order in candidates:
+            matched = sorted({i.product_name for i in order.items if needle in i.product_name.casefold()})
+            if matched:
+                found.append(OrderSummary(id=order.id, user_id=order.user_id, status=order.status,
+                                          total_amount=order.total_amount, created_at=order.created_at,
+                                          matched_products=matched))
+        found.sort(key=lambda s: (s.created_at, str(s.id)), reverse=True)
+        return found[offset:offset + limit]
@@ -1,15 +1,80 @@
 """Реализация репозиториев с использованием SQLAlchemy."""
 
+import json
+import random
 import uuid
-from datetime import datetime
+import weakref
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Tuple
 
-from sqlalchemy import text
+from sqlalchemy import bindparam, event, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from app.domain.user import User
-from app.domain.order import Order, OrderItem, OrderStatus, OrderStatusChange
+from app.domain.order import Order, OrderItem, OrderStatus, OrderStatusChange, PAID_STATUSES
+
+
+# Карта идентичности транзакции лежит в session.info и общая для всех репозиториев сессии
+IDENTITY_MAP_KEY = "identity_map"
+
+
+class IdentityMap:
+    """Сущности, прочитанные или сохранённые в текущей транзакции, по (тип, id).
+
+    Повторный ``find_by_id`` возвращает тот же объект без запроса к БД. Вместе
+    с объектом хранится снимок его сохранённого состояния: ``save`` сравнивает
+    с ним и пишет только изменения. Карта очищается при коммите и откате — после
+    них строки могли измениться другими транзакциями. Списки (``find_by_user``,
+    ``find_all``, поиск) идут мимо карты.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[type, uuid.UUID], Tuple[Any, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, cls: type, entity_id: uuid.UUID):
+        entry = self._entries.get((cls, entity_id))
+        return entry[0] if entry else None
+
+    def snapshot(self, entity) -> Any:
+        """Сохранённое состояние ``entity`` или None, если в карте другой объект или ничего."""
+        entry = self._entries.get((type(entity), entity.id))
+        return entry[1] if entry and entry[0] is entity else None
+
+    def add(self, entity, snapshot) -> None:
+        self._entries[(type(entity), entity.id)] = (entity, snapshot)
+
+    def remove(self, cls: type, entity_id: uuid.UUID) -> None:
+        self._entries.pop((cls, entity_id), None)
+
+
+def identity_map(session: AsyncSession) -> IdentityMap:
+    return session.sync_session.info.setdefault(IDENTITY_MAP_KEY, IdentityMap())
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_identity_map(session) -> None:
+    session.info.pop(IDENTITY_MAP_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_identity_map(session, previous_transaction) -> None:
+    session.info.pop(IDENTITY_MAP_KEY, None)
+
+
+def _user_state(user: User) -> tuple:
+    return user.email, user.name, user.created_at
+
+
+def _order_state(order: Order) -> tuple:
+    """Снимок того, что пишет OrderRepository.save: шапка, количества позиций, id записей истории."""
+    return (order.status, order.total_amount, {item.id: item.quantity for item in order.items},
+            frozenset(change.id for change in order.status_history))
 
 
 class UserRepository:
@@ -21,6 +86,9 @@ class UserRepository:
     # TODO: Реализовать save(user: User) -> None
     # Используйте INSERT ... ON CONFLICT DO UPDATE
     async def save(self, user: User) -> None:
+        tracked = identity_map(self.session)
+        if tracked.snapshot(user) == _user_state(user):
+            return
         query = text("""
                       INSERT INTO users (id, email, name, created_at)
                       VALUES (:id, :email, :name, :created_at)
@@ -28,10 +96,23 @@ class UserRepository:
                       SET email = EXCLUDED.email, name = EXCLUDED.name, created_at = EXCLUDED.created_at
                     """)
         await self.session.execute(query, {"id": user.id,"email": user.email, "name": user.name, 'created_at': user.created_at})
-        await self.session.commit()
+        await ChangeLogRepository(self.session).record("user", user.id, {"email": user.email, "name": user.name})
+        tracked.add(user, _user_state(user))
+
+    def _adopt(self, row) -> User:
+        """Пользователь из строки; если он уже в карте идентичности — тот же объект."""
+        tracked = identity_map(self.session)
+        user = tracked.get(User, row.id)
+        if user is None:
+            user = User(id=row.id, email=row.email, name=row.name, created_at=row.created_at)
+            tracked.add(user, _user_state(user))
+        return user
 
     # TODO: Реализовать find_by_id(user_id: UUID) -> Optional[User]
     async def find_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+        user = identity_map(self.session).get(User, user_id)
+        if user is not None:
+            return user
         query = text("""
                       SELECT * FROM users
                       WHERE id = :id                    
@@ -41,9 +122,29 @@ class UserRepository:
         if not row:
             return None
         
-        return User(id=row.id, email=row.email, name=row.name, created_at=row.created_at)
+        return self._adopt(row)
 
 
+    async def find_by_ids(self, user_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, User]:
+        """Пользователи по набору id одним запросом; уже загруженные берутся из карты идентичности."""
+        tracked = identity_map(self.session)
+        found: Dict[uuid.UUID, User] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = tracked.get(User, user_id)
+            if user is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = user
+        if missing:
+            query = text("""
+                          SELECT id, email, name, created_at FROM users
+                          WHERE id IN :ids
+                        """).bindparams(bindparam("ids", expanding=True))
+            for row in (await self.session.execute(query, {"ids": missing})).fetchall():
+                found[row.id] = self._adopt(row)
+        return found
+
     # TODO: Реализовать find_by_email(email: str) -> Optional[User]
     async def find_by_email(self, email: str) -> Optional[User]:
         query = text("""
@@ -55,7 +156,7 @@ class UserRepository:
         if not row:
             return None
         
-        return User(id=row.id, email=row.email, name=row.name, created_at=row.created_at)
+        return self._adopt(row)
 
     # TODO: Реализовать find_all() -> List[User]
     async def find_all(self) -> List[User]:
@@ -66,6 +167,193 @@ class UserRepository:
         rows = result.fetchall()
         return [User(id=row.id, email=row.email, name=row.name, created_at=row.created_at) for row in rows]
 
+@dataclass
+class ChangeRecord:
+    """Запись журнала изменений; (txid, seq) — позиция в ленте."""
+
+    txid: int
+    seq: int
+    entity: str
+    entity_id: uuid.UUID
+    op: str
+    data: dict
+    changed_at: datetime
+
+
+class ChangeLogRepository:
+    """Журнал изменений (outbox): пишется в транзакции изменения, читается по курсору."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def record(self, entity: str, entity_id: uuid.UUID, data: dict, op: str = "upsert") -> None:
+        query = text("""
+                      INSERT INTO change_log (entity, entity_id, op, data)
+                      VALUES (:entity, :entity_id, :op, :data)
+                    """)
+        await self.session.execute(query, {"entity": entity, "entity_id": entity_id, "op": op,
+                                           "data": json.dumps(data)})
+
+    async def read_since(self, txid: int, seq: int, limit: int) -> List[ChangeRecord]:
+        """Изменения строго после позиции (txid, seq), только из завершённых транзакций."""
+        if self.session.get_bind().dialect.name == "postgresql":
+            query = text("""
+                          SELECT txid::text AS txid, seq, entity, entity_id, op, data, changed_at
+                          FROM change_log
+                          WHERE (txid, seq) > (CAST(CAST(:txid AS TEXT) AS xid8), :seq)
+                            AND txid < pg_snapshot_xmin(pg_current_snapshot())
+                          ORDER BY txid, seq
+                          LIMIT :limit
+                        """)
+        else:
+            query = text("""
+                          SELECT txid, seq, entity, entity_id, op, data, changed_at
+                          FROM change_log
+                          WHERE seq > :seq
+                          ORDER BY seq
+                          LIMIT :limit
+                        """)
+        result = await self.session.execute(query, {"txid": str(txid), "seq": seq, "limit": limit})
+        return [
+            ChangeRecord(txid=int(r.txid), seq=r.seq, entity=r.entity, entity_id=r.entity_id, op=r.op,
+                         data=r.data if isinstance(r.data, dict) else json.loads(r.data),
+                         changed_at=r.changed_at)
+            for r in result.fetchall()
+        ]
+
+
+# Кэш название → id товара, отдельный для каждого движка (у разных БД разные id).
+# Строки products никогда не удаляются, поэтому закоммиченный id не устаревает.
+_product_ids: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+PRODUCT_CACHE_SIZE = 100_000
+# id, выданные в текущей транзакции: попадают в общий кэш только после коммита
+PENDING_PRODUCTS_KEY = "pending_product_ids"
+
+
+def _remember_products(bind, ids: Dict[str, int]) -> None:
+    cache = _product_ids.setdefault(bind, {})
+    if len(cache) + len(ids) > PRODUCT_CACHE_SIZE:
+        cache.clear()
+    cache.update(ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_pending_products(session) -> None:
+    pending = session.info.pop(PENDING_PRODUCTS_KEY, None)
+    if pending:
+        _remember_products(session.get_bind(), pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_products(session, previous_transaction) -> None:
+    # Также при откате точки сохранения: забыть лишнее безопасно, запомнить отменённое — нет
+    session.info.pop(PENDING_PRODUCTS_KEY, None)
+
+
+class ProductRepository:
+    """Справочник товаров: интернирование названий в идентификаторы."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _find(self, names: List[str]) -> Dict[str, int]:
+        query = text("SELECT id, name FROM products WHERE name IN :names").bindparams(
+            bindparam("names", expanding=True))
+        result = await self.session.execute(query, {"names": names})
+        return {r.name: r.id for r in result.fetchall()}
+
+    async def resolve(self, names: Iterable[str]) -> Dict[str, int]:
+        """id для каждого названия; отсутствующие товары создаются одним пакетом.
+
+        Обычно все названия уже в кэше и запросов нет; иначе — один SELECT и,
+        для новых товаров, INSERT ... ON CONFLICT DO NOTHING и повторный SELECT.
+        """
+        bind = self.session.get_bind()
+        committed = _product_ids.get(bind, {})
+        pending = self.session.sync_session.info.setdefault(PENDING_PRODUCTS_KEY, {})
+        ids, missing = {}, []
+        for name in set(names):
+            product_id = committed.get(name) or pending.get(name)
+            if product_id is None:
+                missing.append(name)
+            else:
+                ids[name] = product_id
+        if not missing:
+            return ids
+
+        # Одинаковый порядок вставки в параллельных транзакциях исключает взаимоблокировки
+        missing.sort()
+        found = await self._find(missing)
+        # Найденные первым запросом строки закоммичены: новые в этой транзакции уже в pending
+        _remember_products(bind, found)
+        new = [name for name in missing if name not in found]
+        if new:
+            await self.session.execute(
+                text("INSERT INTO products (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+                [{"name": name} for name in new],
+            )
+            created = await self._find(new)
+            pending.update(created)
+            found.update(created)
+        ids.update(found)
+        return ids
+
+
+@dataclass
+class OrderSummary:
+    """Заказ без позиций и истории — строка результатов поиска."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    status: OrderStatus
+    total_amount: Decimal
+    created_at: datetime
+    matched_products: List[str]
+
+
+@dataclass
+class OrderHeader:
+    """Строка заказа с числом позиций и записей истории, без них самих."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    status: OrderStatus
+    total_amount: Decimal
+    created_at: datetime
+    items_count: int
+    history_count: int
+    archived: bool = False
+
+
+def like_pattern(value: str) -> str:
+    """Образец LIKE для поиска подстроки; % и _ из ввода ищутся буквально."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def page_after(items: List[OrderItem], after: Optional[Tuple[int, uuid.UUID]],
+               limit: Optional[int]) -> List[Tuple[int, OrderItem]]:
+    """Страница (line_no, позиция) после ``after``; номер строки — место позиции в заказе."""
+    numbered = list(enumerate(items))
+    if after is not None:
+        numbered = [(n, item) for n, item in numbered if (n, str(item.id)) > (after[0], str(after[1]))]
+    return numbered if limit is None else numbered[:limit]
+
+
+@dataclass(frozen=True)
+class OrderTables:
+    """Таблицы, в которых хранится заказ: горячие или архивные."""
+
+    orders: str
+    items: str
+    history: str
+
+
+ACTIVE_TABLES = OrderTables("orders", "order_items", "order_status_history")
+ARCHIVE_TABLES = OrderTables("orders_archive", "order_items_archive", "order_status_history_archive")
+ARCHIVABLE_STATUSES = (OrderStatus.COMPLETED, OrderStatus.CANCELLED)
+
+
 class OrderRepository:
     """Репозиторий для Order."""
 
@@ -75,6 +363,31 @@ class OrderRepository:
     # TODO: Реализовать save(order: Order) -> None
     # Сохранить заказ, товары и историю статусов
     async def save(self, order: Order) -> None:
+        """Записать заказ; для заказа из карты идентичности — только изменившееся с загрузки."""
+        tracked = identity_map(self.session)
+        state = _order_state(order)
+        saved = tracked.snapshot(order)
+        if saved == state:
+            return
+        if saved is None:
+            header_changed, items, history = True, order.items, order.status_history
+        else:
+            header_changed = saved[:2] != state[:2]
+            items = [item for item in order.items if saved[2].get(item.id) != item.quantity]
+            history = [change for change in order.status_history if change.id not in saved[3]]
+        if header_changed:
+            await self._save_header(order)
+        await self._save_items(order, items)
+        await self._save_history(order, history)
+        await ChangeLogRepository(self.session).record("order", order.id, {
+            "user_id": str(order.user_id),
+            "status": order.status.value,
+            "total_amount": str(order.total_amount),
+            "items": len(order.items),
+        })
+        tracked.add(order, state)
+
+    async def _save_header(self, order: Order) -> None:
         query_order = text("""
                      INSERT INTO orders (id, user_id, status, total_amount, created_at)
                      VALUES (:id, :user_id, :status, :total_amount, :created_at)
@@ -84,35 +397,131 @@ class OrderRepository:
         await self.session.execute(query_order, {"id": order.id, "user_id": order.user_id,
                                                 "status": order.status.value, 'total_amount': float(order.total_amount),
                                                 "created_at" : order.created_at})
-        
+
+    async def _save_items(self, order: Order, items: List[OrderItem]) -> None:
+        if not items:
+            return
         query_item = text(""" 
-                          INSERT INTO orders_items (id, order_id, product_name, price, quantity)
-                          VALUES (:id, :order_id, :product_name, :price, :quantity)
-                          ON CONFLICT (id) DO NOTHING
+                          INSERT INTO order_items (id, order_id, product_id, price, quantity, line_no)
+                          VALUES (:id, :order_id, :product_id, :price, :quantity, :line_no)
+                          ON CONFLICT (id) DO UPDATE SET quantity = EXCLUDED.quantity
+                          WHERE order_items.quantity <> EXCLUDED.quantity
                     """)
-        for item in order.items:
+        product_ids = await ProductRepository(self.session).resolve(item.product_name for item in items)
+        # Номер строки — место позиции в заказе: по нему позиции читаются в порядке добавления
+        line_numbers = {item.id: n for n, item in enumerate(order.items)}
+        for item in items:
             await self.session.execute(query_item, {"id": item.id, "order_id": order.id,
-                                                    "product_name": item.product_name,
-                                                    "price": float(item.price), "quantity": item.quantity})
-            
+                                                    "product_id": product_ids[item.product_name],
+                                                    "price": float(item.price), "quantity": item.quantity,
+                                                    "line_no": line_numbers[item.id]})
+
+    async def _save_history(self, order: Order, history: List[OrderStatusChange]) -> None:
         query_history = text("""
                               INSERT INTO order_status_history (id, order_id, status, changed_at)
                               VALUES (:id, :order_id, :status, :changed_at)
-                              ON CONFLICT (id) DO NOTHING
+                              ON CONFLICT (id, changed_at) DO NOTHING
                             """)
-        for stat in order.status_history:
+        for stat in history:
             await self.session.execute(query_history, {"id": stat.id, "order_id": order.id,
                                                        "status": stat.status.value, 
                                                        "changed_at": stat.changed_at})
-        await self.session.commit()
 
     # TODO: Реализовать find_by_id(order_id: UUID) -> Optional[Order]
     # Загрузить заказ со всеми товарами и историей
     # Используйте object.__new__(Order) чтобы избежать __post_init__
-    async def find_by_id(self, order_id: uuid.UUID) -> Optional[Order]:
-        query_order = text("""
+    async def find_by_id(self, order_id: uuid.UUID, include_archive: bool = True) -> Optional[Order]:
+        """Заказ из горячих таблиц, при промахе (и include_archive) — из архива.
+
+        Заказ из горячих таблиц попадает в карту идентичности; архивные только для чтения.
+        """
+        tracked = identity_map(self.session)
+        order = tracked.get(Order, order_id)
+        if order is not None:
+            return order
+        order = await self._load(order_id, ACTIVE_TABLES)
+        if order is not None:
+            tracked.add(order, _order_state(order))
+        elif include_archive:
+            order = await self._load(order_id, ARCHIVE_TABLES)
+        return order
+
+    async def is_archived(self, order_id: uuid.UUID) -> bool:
+        result = await self.session.execute(text("SELECT 1 FROM orders_archive WHERE id = :id"), {"id": order_id})
+        return result.first() is not None
+
+    async def find_header(self, order_id: uuid.UUID) -> Optional[OrderHeader]:
+        """Заказ без позиций и истории (сначала горячие таблицы, затем архив)."""
+        for tables in (ACTIVE_TABLES, ARCHIVE_TABLES):
+            query = text(f"""
+                          SELECT o.id, o.user_id, o.status, o.total_amount, o.created_at,
+                                 (SELECT COUNT(*) FROM {tables.items} i WHERE i.order_id = o.id) AS items_count,
+                                 (SELECT COUNT(*) FROM {tables.history} h WHERE h.order_id = o.id) AS history_count
+                          FROM {tables.orders} o
+                          WHERE o.id = :id
+                        """)
+            row = (await self.session.execute(query, {"id": order_id})).fetchone()
+            if row:
+                return OrderHeader(id=row.id, user_id=row.user_id, status=OrderStatus(row.status),
+                                   total_amount=Decimal(str(row.total_amount)), created_at=row.created_at,
+                                   items_count=int(row.items_count), history_count=int(row.history_count),
+                                   archived=tables is ARCHIVE_TABLES)
+        return None
+
+    async def find_items(self, order_id: uuid.UUID, after: Optional[Tuple[int, uuid.UUID]] = None,
+                         limit: Optional[int] = None, archived: bool = False) -> List[Tuple[int, OrderItem]]:
+        """Позиции заказа с номерами строк в порядке добавления, начиная после ``after`` = (line_no, id)."""
+        tables = ARCHIVE_TABLES if archived else ACTIVE_TABLES
+        params = {"id": order_id}
+        keyset = ""
+        if after is not None:
+            # Значения из курсора, а не из строки ``after``: её могли удалить между страницами
+            keyset = "AND (i.line_no > :after_line OR (i.line_no = :after_line AND i.id > :after_id))"
+            params["after_line"], params["after_id"] = after
+        page = ""
+        if limit is not None:
+            page = "LIMIT :limit"
+            params["limit"] = limit
+        query = text(f"""
+                      SELECT i.id, p.name AS product_name, i.price, i.quantity, i.order_id, i.line_no
+                      FROM {tables.items} i
+                      JOIN products p ON p.id = i.product_id
+                      WHERE i.order_id = :id {keyset}
+                      ORDER BY i.line_no, i.id
+                      {page}
+                    """)
+        rows = (await self.session.execute(query, params)).fetchall()
+        return [(r.line_no, OrderItem(id=r.id, product_name=r.product_name, price=Decimal(str(r.price)),
+                                      quantity=r.quantity, order_id=r.order_id)) for r in rows]
+
+    async def find_history(self, order_id: uuid.UUID, after: Optional[Tuple[datetime, uuid.UUID]] = None,
+                           limit: Optional[int] = None, archived: bool = False) -> List[OrderStatusChange]:
+        """История статусов по возрастанию (changed_at, id), начиная после ``after``."""
+        tables = ARCHIVE_TABLES if archived else ACTIVE_TABLES
+        params = {"id": order_id}
+        keyset = ""
+        if after is not None:
+            keyset = "AND (changed_at > :after_at OR (changed_at = :after_at AND id > :after_id))"
+            params["after_at"], params["after_id"] = after
+        page = ""
+        if limit is not None:
+            page = "LIMIT :limit"
+            params["limit"] = limit
+        query = text(f"""
+                      SELECT id, order_id, status, changed_at
+                      FROM {tables.history}
+                      WHERE order_id = :id {keyset}
+                      ORDER BY changed_at, id
+                      {page}
+                    """)
+        rows = (await self.session.execute(query, params)).fetchall()
+        return [OrderStatusChange(id=r.id, order_id=r.order_id, status=OrderStatus(r.status),
+                                  changed_at=r.changed_at) for r in rows]
+
+    async def _load(self, order_id: uuid.UUID, tables: "OrderTables") -> Optional[Order]:
+        query_order = text(f"""
                             SELECT id, user_id, status, total_amount, created_at
-                            FROM orders
+                            FROM {tables.orders}
                             WHERE id = :id
                         """)
         result = await self.session.execute(query_order, {"id": order_id})
@@ -121,19 +530,21 @@ class OrderRepository:
         if not row:
             return None
         
-        query_items = text("""
-                            SELECT id, product_name, price, quantity, order_id 
-                            FROM order_items 
-                            WHERE order_id = :id
+        query_items = text(f"""
+                            SELECT i.id, p.name AS product_name, i.price, i.quantity, i.order_id
+                            FROM {tables.items} i
+                            JOIN products p ON p.id = i.product_id
+                            WHERE i.order_id = :id
+                            ORDER BY i.line_no, i.id
                         """)
         result_items = await self.session.execute(query_items, {"id": order_id})
         items_rows = result_items.fetchall()
 
         items = [OrderItem(id=r.id, product_name=r.product_name, price=Decimal(str(r.price)), quantity=r.quantity, order_id=r.order_id) for r in items_rows]
 
-        query_history = text("""
+        query_history = text(f"""
                               SELECT id, order_id, status, changed_at 
-                              FROM order_status_history 
+                              FROM {tables.history} 
                               WHERE order_id = :id
                               ORDER BY changed_at ASC
                             """)
@@ -167,9 +578,11 @@ class OrderRepository:
 
         for row in order_rows:
             query_items = text("""
-                                SELECT id, product_name, price, quantity, order_id 
-                                FROM order_items 
-                                WHERE order_id = :id
+                                SELECT i.id, p.name AS product_name, i.price, i.quantity, i.order_id
+                                FROM order_items i
+                                JOIN products p ON p.id = i.product_id
+                                WHERE i.order_id = :id
+                                ORDER BY i.line_no, i.id
                             """)
             res_items = await self.session.execute(query_items, {"id": row.id})
             items = [OrderItem(id=r.id, product_name=r.product_name, price=Decimal(str(r.price)), 
@@ -198,6 +611,63 @@ class OrderRepository:
 
         return all_orders
     
+    async def find_created_after(self, after: Optional[Tuple[datetime, uuid.UUID]] = None,
+                                 limit: int = 100) -> List[Order]:
+        """Страница заказов по возрастанию (created_at, id) после ``after``; три запроса на страницу."""
+        params = {"limit": limit}
+        keyset = ""
+        if after is not None:
+            keyset = "WHERE created_at > :after_at OR (created_at = :after_at AND id > :after_id)"
+            params["after_at"], params["after_id"] = after
+        query_orders = text(f"""
+                            SELECT id, user_id, status, total_amount, created_at
+                            FROM orders
+                            {keyset}
+                            ORDER BY created_at, id
+                            LIMIT :limit
+                            """)
+        order_rows = (await self.session.execute(query_orders, params)).fetchall()
+        if not order_rows:
+            return []
+        ids = {"ids": [r.id for r in order_rows]}
+
+        query_items = text("""
+                            SELECT i.id, p.name AS product_name, i.price, i.quantity, i.order_id
+                            FROM order_items i
+                            JOIN products p ON p.id = i.product_id
+                            WHERE i.order_id IN :ids
+                            ORDER BY i.line_no, i.id
+                            """).bindparams(bindparam("ids", expanding=True))
+        items: Dict[uuid.UUID, List[OrderItem]] = {}
+        for r in (await self.session.execute(query_items, ids)).fetchall():
+            items.setdefault(r.order_id, []).append(
+                OrderItem(id=r.id, product_name=r.product_name, price=Decimal(str(r.price)),
+                          quantity=r.quantity, order_id=r.order_id))
+
+        query_history = text("""
+                              SELECT id, order_id, status, changed_at
+                              FROM order_status_history
+                              WHERE order_id IN :ids
+                              ORDER BY changed_at ASC
+                              """).bindparams(bindparam("ids", expanding=True))
+        history: Dict[uuid.UUID, List[OrderStatusChange]] = {}
+        for r in (await self.session.execute(query_history, ids)).fetchall():
+            history.setdefault(r.order_id, []).append(
+                OrderStatusChange(id=r.id, order_id=r.order_id, status=OrderStatus(r.status), changed_at=r.changed_at))
+
+        orders = []
+        for row in order_rows:
+            order = object.__new__(Order)
+            order.id = row.id
+            order.user_id = row.user_id
+            order.status = OrderStatus(row.status)
+            order.total_amount = Decimal(str(row.total_amount))
+            order.created_at = row.created_at
+            order.items = items.get(row.id, [])
+            order.status_history = history.get(row.id, [])
+            orders.append(order)
+        return orders
+
     # TODO: Реализовать find_all() -> List[Order]
     async def find_all(self) -> List[Order]:
         query_orders = text("""
@@ -211,9 +681,11 @@ class OrderRepository:
 
         for row in order_rows:
             query_items = text("""
-                                SELECT id, product_name, price, quantity, order_id 
-                                FROM order_items 
-                                WHERE order_id = :id
+                                SELECT i.id, p.name AS product_name, i.price, i.quantity, i.order_id
+                                FROM order_items i
+                                JOIN products p ON p.id = i.product_id
+                                WHERE i.order_id = :id
+                                ORDER BY i.line_no, i.id
                             """)
             res_items = await self.session.execute(query_items, {"id": row.id})
             items = [OrderItem(id=r.id, product_name=r.product_name, price=Decimal(str(r.price)), 
@@ -241,3 +713,482 @@ class OrderRepository:
             all_orders.append(order)
 
         return all_orders
+
+    async def search_by_product(self, product: str, user_id: Optional[uuid.UUID] = None,
+                                limit: int = 20, offset: int = 0) -> List[OrderSummary]:
+        """Заказы с товаром, название которого содержит ``product``; новые первыми.
+
+        На Postgres ILIKE обслуживается триграммным GIN-индексом по products.name,
+        на SQLite — полным просмотром: LIKE там и так не учитывает регистр ASCII.
+        """
+        like = "ILIKE" if self.session.get_bind().dialect.name == "postgresql" else "LIKE"
+        params = {"pattern": like_pattern(product), "limit": limit, "offset": offset}
+        user_filter = ""
+        if user_id is not None:
+            user_filter = "AND o.user_id = :user_id"
+            params["user_id"] = user_id
+        query_orders = text(f"""
+                            SELECT o.id, o.user_id, o.status, o.total_amount, o.created_at
+                            FROM orders o
+                            WHERE EXISTS (
+                                SELECT 1 FROM order_items i
+                                JOIN products p ON p.id = i.product_id
+                                WHERE i.order_id = o.id AND p.name {like} :pattern ESCAPE '\\'
+                            ) {user_filter}
+                            ORDER BY o.created_at DESC, o.id DESC
+                            LIMIT :limit OFFSET :offset
+                            """)
+        order_rows = (await self.session.execute(query_orders, params)).fetchall()
+        if not order_rows:
+            return []
+
+        query_products = text(f"""
+                              SELECT i.order_id, p.name AS product_name
+                              FROM order_items i
+                              JOIN products p ON p.id = i.product_id
+                              WHERE i.order_id IN :ids AND p.name {like} :pattern ESCAPE '\\'
+                              ORDER BY p.name
+                              """).bindparams(bindparam("ids", expanding=True))
+        result = await self.session.execute(query_products, {"ids": [r.id for r in order_rows],
+                                                             "pattern": params["pattern"]})
+        matched = {}
+        for r in result.fetchall():
+            names = matched.setdefault(r.order_id, [])
+            if r.product_name not in names:
+                names.append(r.product_name)
+
+        return [
+            OrderSummary(id=r.id, user_id=r.user_id, status=OrderStatus(r.status),
+                         total_amount=Decimal(str(r.total_amount)), created_at=r.created_at,
+                         matched_products=matched.get(r.id, []))
+            for r in order_rows
+        ]
+
+    async def archive_batch(self, cutoff: datetime, limit: int = 1000) -> int:
+        """Перенести до ``limit`` завершённых/отменённых заказов старше ``cutoff`` в архив.
+
+        Заказы переносятся вместе с позициями и историей в одной транзакции
+        вызывающего; на Postgres строки, заблокированные другими транзакциями,
+        пропускаются. Возвращает число перенесённых заказов.
+        """
+        postgres = self.session.get_bind().dialect.name == "postgresql"
+        skip_locked = " FOR UPDATE SKIP LOCKED" if postgres else ""
+        statuses = ", ".join(f"'{status.value}'" for status in ARCHIVABLE_STATUSES)
+        query_ids = text(f"""
+                          SELECT id FROM orders
+                          WHERE status IN ({statuses}) AND created_at < :cutoff
+                          ORDER BY created_at, id
+                          LIMIT :limit{skip_locked}
+                        """)
+        ids = [r.id for r in (await self.session.execute(query_ids, {"cutoff": cutoff, "limit": limit})).fetchall()]
+        if not ids:
+            return 0
+
+        statements = [
+            """INSERT INTO orders_archive (id, user_id, status, total_amount, created_at)
+               SELECT id, user_id, status, total_amount, created_at FROM orders WHERE id IN :ids""",
+            """INSERT INTO order_items_archive (id, order_id, product_id, price, quantity, line_no)
+               SELECT id, order_id, product_id, price, quantity, line_no FROM order_items WHERE order_id IN :ids""",
+            """INSERT INTO order_status_history_archive (id, order_id, status, changed_at)
+               SELECT id, order_id, status, changed_at FROM order_status_history WHERE order_id IN :ids""",
+            "DELETE FROM order_status_history WHERE order_id IN :ids",
+            "DELETE FROM order_items WHERE order_id IN :ids",
+            "DELETE FROM orders WHERE id IN :ids",
+        ]
+        skip_recalc = text("SELECT set_config('app.skip_total_recalc', :value, true)")
+        for statement in statements:
+            # Суммы удаляемых заказов не пересчитываются (010_archive_skip_total_recalc.sql)
+            deletes_items = postgres and statement.startswith("DELETE FROM order_items")
+            if deletes_items:
+                await self.session.execute(skip_recalc, {"value": "on"})
+            await self.session.execute(text(statement).bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+            if deletes_items:
+                await self.session.execute(skip_recalc, {"value": "off"})
+        return len(ids)
+
+
+def order_document(order: Order) -> str:
+    """JSON-документ с позициями и историей заказа (колонка order_documents.doc)."""
+    return json.dumps({
+        "items": [
+            {"id": str(item.id), "product_name": item.product_name, "price": str(item.price),
+             "quantity": item.quantity}
+            for item in order.items
+        ],
+        "history": [
+            {"id": str(change.id), "status": change.status.value, "changed_at": change.changed_at.isoformat()}
+            for change in order.status_history
+        ],
+    }, separators=(",", ":"))
+
+
+class DocumentOrderRepository:
+    """Репозиторий для Order, хранящий агрегат одной строкой order_documents.
+
+    Позиции и история лежат JSON-документом рядом с полями заказа, поэтому
+    чтение — один запрос, а запись — один INSERT ... ON CONFLICT независимо от
+    числа позиций. Интерфейс совпадает с OrderRepository; архив и пересчёт
+    агрегатов (app.tools.archive, app.tools.reconcile) работают только с
+    табличной схемой.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def save(self, order: Order) -> None:
+        query = text("""
+                      INSERT INTO order_documents (id, user_id, status, total_amount, created_at, doc)
+                      VALUES (:id, :user_id, :status, :total_amount, :created_at, :doc)
+                      ON CONFLICT (id) DO UPDATE
+                      SET status = EXCLUDED.status, total_amount = EXCLUDED.total_amount, doc = EXCLUDED.doc
+                    """)
+        await self.session.execute(query, {"id": order.id, "user_id": order.user_id, "status": order.status.value,
+                                           "total_amount": order.total_amount, "created_at": order.created_at,
+                                           "doc": order_document(order)})
+        await ChangeLogRepository(self.session).record("order", order.id, {
+            "user_id": str(order.user_id),
+            "status": order.status.value,
+            "total_amount": str(order.total_amount),
+            "items": len(order.items),
+        })
+
+    @staticmethod
+    def _hydrate(row) -> Order:
+        doc = json.loads(row.doc) if isinstance(row.doc, (str, bytes)) else row.doc
+        order = object.__new__(Order)
+        order.id = row.id
+        order.user_id = row.user_id
+        order.status = OrderStatus(row.status)
+        order.total_amount = Decimal(str(row.total_amount))
+        order.created_at = row.created_at
+        order.items = [
+            OrderItem(id=uuid.UUID(i["id"]), product_name=i["product_name"], price=Decimal(i["price"]),
+                      quantity=i["quantity"], order_id=row.id)
+            for i in doc["items"]
+        ]
+        order.status_history = [
+            OrderStatusChange(id=uuid.UUID(h["id"]), order_id=row.id, status=OrderStatus(h["status"]),
+                              changed_at=datetime.fromisoformat(h["changed_at"]))
+            for h in doc["history"]
+        ]
+        return order
+
+    async def _select(self, where: str = "", params: Optional[dict] = None, order_by: str = "") -> List[Order]:
+        query = text(f"""
+                      SELECT id, user_id, status, total_amount, created_at, doc
+                      FROM order_documents
+                      {where}
+                      {order_by}
+                    """)
+        result = await self.session.execute(query, params or {})
+        return [self._hydrate(row) for row in result.fetchall()]
+
+    async def find_by_id(self, order_id: uuid.UUID, include_archive: bool = True) -> Optional[Order]:
+        orders = await self._select("WHERE id = :id", {"id": order_id})
+        return orders[0] if orders else None
+
+    async def is_archived(self, order_id: uuid.UUID) -> bool:
+        return False
+
+    async def find_by_user(self, user_id: uuid.UUID) -> List[Order]:
+        return await self._select("WHERE user_id = :user_id", {"user_id": user_id})
+
+    async def find_all(self) -> List[Order]:
+        return await self._select()
+
+    async def find_header(self, order_id: uuid.UUID) -> Optional[OrderHeader]:
+        query = text("""
+                      SELECT id, user_id, status, total_amount, created_at, items_count, history_count
+                      FROM order_documents
+                      WHERE id = :id
+                    """)
+        row = (await self.session.execute(query, {"id": order_id})).fetchone()
+        if not row:
+            return None
+        return OrderHeader(id=row.id, user_id=row.user_id, status=OrderStatus(row.status),
+                           total_amount=Decimal(str(row.total_amount)), created_at=row.created_at,
+                           items_count=int(row.items_count), history_count=int(row.history_count))
+
+    async def find_items(self, order_id: uuid.UUID, after: Optional[Tuple[int, uuid.UUID]] = None,
+                         limit: Optional[int] = None, archived: bool = False) -> List[Tuple[int, OrderItem]]:
+        """Позиции в порядке документа; он читается целиком, страница режется в памяти."""
+        order = await self.find_by_id(order_id)
+        return page_after(order.items if order else [], after, limit)
+
+    async def find_history(self, order_id: uuid.UUID, after: Optional[Tuple[datetime, uuid.UUID]] = None,
+                           limit: Optional[int] = None, archived: bool = False) -> List[OrderStatusChange]:
+        order = await self.find_by_id(order_id)
+        history = sorted(order.status_history if order else [], key=lambda h: (h.changed_at, str(h.id)))
+        if after is not None:
+            history = [h for h in history if (h.changed_at, str(h.id)) > (after[0], str(after[1]))]
+        return history if limit is None else history[:limit]
+
+    async def search_by_product(self, product: str, user_id: Optional[uuid.UUID] = None,
+                                limit: int = 20, offset: int = 0) -> List[OrderSummary]:
+        """Поиск подстроки в названиях товаров документа; без индекса — полный просмотр."""
+        if self.session.get_bind().dialect.name == "postgresql":
+            names = "SELECT e ->> 'product_name' AS name FROM jsonb_array_elements(d.doc -> 'items') e"
+            like = "ILIKE"
+        else:
+            names = "SELECT json_extract(e.value, '$.product_name') AS name FROM json_each(d.doc, '$.items') e"
+            like = "LIKE"
+        params = {"pattern": like_pattern(product), "limit": limit, "offset": offset}
+        user_filter = ""
+        if user_id is not None:
+            user_filter = "AND d.user_id = :user_id"
+            params["user_id"] = user_id
+        query = text(f"""
+                      SELECT d.id, d.user_id, d.status, d.total_amount, d.created_at, d.doc
+                      FROM order_documents d
+                      WHERE EXISTS (
+                          SELECT 1 FROM ({names}) n WHERE n.name {like} :pattern ESCAPE '\\'
+                      ) {user_filter}
+                      ORDER BY d.created_at DESC, d.id DESC
+                      LIMIT :limit OFFSET :offset
+                    """)
+        needle = product.casefold()
+        summaries = []
+        for row in (await self.session.execute(query, params)).fetchall():
+            order = self._hydrate(row)
+            matched = sorted({i.product_name for i in order.items if needle in i.product_name.casefold()})
+            summaries.append(OrderSummary(id=order.id, user_id=order.user_id, status=order.status,
+                                          total_amount=order.total_amount, created_at=order.created_at,
+                                          matched_products=matched))
+        return summaries
+
+
+ORDER_STORAGES = {"tables": OrderRepository, "document": DocumentOrderRepository}
+
+
+def order_repository_class(storage: str):
+    """Класс репозитория заказов для настройки ORDER_STORAGE."""
+    try:
+        return ORDER_STORAGES[storage]
+    except KeyError:
+        raise ValueError(f"Unknown order storage: {storage!r}")
+
+
+@dataclass
+class StatsBucket:
+    """Заказы одного дня в одном статусе: количество, сумма, число единиц товара."""
+
+    day: date
+    status: OrderStatus
+    orders: int
+    amount: Decimal
+    items: int
+
+
+def stats_day(created_at: datetime) -> date:
+    """День заказа в агрегатах — дата создания по UTC.
+
+    Наивное время домена — местное (``datetime.now()``); asyncpg сохраняет его
+    так же, через ``astimezone``, поэтому день совпадает с пересчётом в SQL.
+    """
+    return created_at.astimezone(timezone.utc).date()
+
+
+# Агрегаты считаются по всем заказам, включая перенесённые в архив
+_ALL_ORDERS = """
+    SELECT id, user_id, status, total_amount, created_at FROM orders
+    UNION ALL
+    SELECT id, user_id, status, total_amount, created_at FROM orders_archive
+"""
+_ALL_ITEMS = """
+    SELECT order_id, quantity FROM order_items
+    UNION ALL
+    SELECT order_id, quantity FROM order_items_archive
+"""
+
+
+class OrderStatsRepository:
+    """Агрегаты order_daily_stats (005_order_stats.sql)."""
+
+    # Строк-счётчиков на (day, status); см. комментарий к slot в миграции
+    SLOTS = 8
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, order: Order, status: OrderStatus, orders: int = 0,
+                  amount: Decimal = Decimal("0"), items: int = 0) -> None:
+        """Прибавить приращения к корзине (день заказа, ``status``)."""
+        query = text("""
+                      INSERT INTO order_daily_stats (day, status, slot, orders, amount, items)
+                      VALUES (:day, :status, :slot, :orders, :amount, :items)
+                      ON CONFLICT (day, status, slot) DO UPDATE
+                      SET orders = order_daily_stats.orders + EXCLUDED.orders,
+                          amount = order_daily_stats.amount + EXCLUDED.amount,
+                          items = order_daily_stats.items + EXCLUDED.items
+                    """)
+        await self.session.execute(query, {"day": stats_day(order.created_at), "status": status.value,
+                                           "slot": random.randrange(self.SLOTS), "orders": orders,
+                                           "amount": amount, "items": items})
+
+    async def move(self, order: Order, previous: OrderStatus) -> None:
+        """Перенести заказ из статуса ``previous`` в текущий."""
+        if previous == order.status:
+            return
+        items = sum(item.quantity for item in order.items)
+        await self.add(order, previous, -1, -order.total_amount, -items)
+        await self.add(order, order.status, 1, order.total_amount, items)
+
+    async def buckets(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[StatsBucket]:
+        """Корзины за период [date_from, date_to] по дням и статусам."""
+        conditions, params = [], {}
+        if date_from is not None:
+            conditions.append("day >= :date_from")
+            params["date_from"] = date_from
+        if date_to is not None:
+            conditions.append("day <= :date_to")
+            params["date_to"] = date_to
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = text(f"""
+                      SELECT day, status, SUM(orders) AS orders, SUM(amount) AS amount, SUM(items) AS items
+                      FROM order_daily_stats
+                      {where}
+                      GROUP BY day, status
+                      ORDER BY day, status
+                    """)
+        result = await self.session.execute(query, params)
+        return [
+            StatsBucket(day=r.day if isinstance(r.day, date) else date.fromisoformat(r.day),
+                        status=OrderStatus(r.status), orders=int(r.orders),
+                        amount=Decimal(str(r.amount)).quantize(Decimal("0.01")), items=int(r.items))
+            for r in result.fetchall()
+        ]
+
+    @staticmethod
+    def rebuild_statements(dialect: str) -> List[str]:
+        """SQL пересчёта агрегатов по заказам; нужен после загрузки в обход сервисов."""
+        # SQLite хранит наивное местное время; модификатор 'utc' переводит его в UTC, как stats_day
+        day = "(o.created_at AT TIME ZONE 'UTC')::date" if dialect == "postgresql" else "date(o.created_at, 'utc')"
+        # Блокировка не даёт параллельным транзакциям прибавить приращение к удаляемым строкам
+        lock = ["LOCK TABLE order_daily_stats IN SHARE ROW EXCLUSIVE MODE"] if dialect == "postgresql" else []
+        return lock + [
+            "DELETE FROM order_daily_stats",
+            f"""
+            INSERT INTO order_daily_stats (day, status, slot, orders, amount, items)
+            SELECT {day}, o.status, 0, COUNT(*), SUM(o.total_amount), COALESCE(SUM(i.items), 0)
+            FROM ({_ALL_ORDERS}) o
+            LEFT JOIN (
+                SELECT order_id, SUM(quantity) AS items FROM ({_ALL_ITEMS}) ai GROUP BY order_id
+            ) i ON i.order_id = o.id
+            GROUP BY 1, 2
+            """,
+        ]
+
+    async def rebuild(self) -> None:
+        """Пересчитать агрегаты по заказам."""
+        for statement in self.rebuild_statements(self.session.get_bind().dialect.name):
+            await self.session.execute(text(statement))
+
+
+_PAID = ", ".join(f"'{status.value}'" for status in sorted(PAID_STATUSES))
+# Ожидаемые значения user_order_stats, вычисленные по orders и orders_archive
+_USER_STATS_SOURCE = f"""
+    SELECT user_id,
+           COUNT(*) AS orders,
+           SUM(CASE WHEN status IN ({_PAID}) THEN 1 ELSE 0 END) AS paid_orders,
+           SUM(CASE WHEN status IN ({_PAID}) THEN total_amount ELSE 0 END) AS paid_amount,
+           SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) AS cancelled_orders,
+           MAX(created_at) AS last_order_at
+    FROM ({_ALL_ORDERS}) o
+    GROUP BY user_id
+"""
+
+
+@dataclass
+class UserOrderStats:
+    """Счётчики заказов пользователя."""
+
+    user_id: uuid.UUID
+    orders: int = 0
+    paid_orders: int = 0
+    paid_amount: Decimal = Decimal("0.00")
+    cancelled_orders: int = 0
+    last_order_at: Optional[datetime] = None
+
+
+class UserOrderStatsRepository:
+    """Денормализованные счётчики user_order_stats (006_user_order_stats.sql)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, user_id: uuid.UUID, orders: int = 0, paid_orders: int = 0,
+                  paid_amount: Decimal = Decimal("0"), cancelled_orders: int = 0,
+                  last_order_at: Optional[datetime] = None) -> None:
+        """Прибавить приращения к счётчикам пользователя; last_order_at только растёт."""
+        query = text("""
+                      INSERT INTO user_order_stats (user_id, orders, paid_orders, paid_amount, cancelled_orders, last_order_at)
+                      VALUES (:user_id, :orders, :paid_orders, :paid_amount, :cancelled_orders, :last_order_at)
+                      ON CONFLICT (user_id) DO UPDATE
+                      SET orders = user_order_stats.orders + EXCLUDED.orders,
+                          paid_orders = user_order_stats.paid_orders + EXCLUDED.paid_orders,
+                          paid_amount = user_order_stats.paid_amount + EXCLUDED.paid_amount,
+                          cancelled_orders = user_order_stats.cancelled_orders + EXCLUDED.cancelled_orders,
+                          last_order_at = CASE
+                              WHEN EXCLUDED.last_order_at IS NULL OR user_order_stats.last_order_at >= EXCLUDED.last_order_at
+                              THEN user_order_stats.last_order_at
+                              ELSE EXCLUDED.last_order_at
+                          END
+                    """)
+        await self.session.execute(query, {"user_id": user_id, "orders": orders, "paid_orders": paid_orders,
+                                           "paid_amount": paid_amount, "cancelled_orders": cancelled_orders,
+                                           "last_order_at": last_order_at})
+
+    async def find(self, user_id: uuid.UUID) -> UserOrderStats:
+        """Счётчики пользователя; без заказов — нули."""
+        query = text("""
+                      SELECT user_id, orders, paid_orders, paid_amount, cancelled_orders, last_order_at
+                      FROM user_order_stats
+                      WHERE user_id = :user_id
+                    """)
+        row = (await self.session.execute(query, {"user_id": user_id})).fetchone()
+        if not row:
+            return UserOrderStats(user_id=user_id)
+        return UserOrderStats(user_id=row.user_id, orders=int(row.orders), paid_orders=int(row.paid_orders),
+                              paid_amount=Decimal(str(row.paid_amount)).quantize(Decimal("0.01")),
+                              cancelled_orders=int(row.cancelled_orders), last_order_at=row.last_order_at)
+
+    async def count_drift(self) -> int:
+        """Число пользователей, чьи счётчики расходятся с заказами (включая архив)."""
+        query = text(f"""
+                      SELECT
+                          (SELECT COUNT(*)
+                           FROM ({_USER_STATS_SOURCE}) e
+                           LEFT JOIN user_order_stats s ON s.user_id = e.user_id
+                           WHERE s.user_id IS NULL
+                              OR s.orders <> e.orders
+                              OR s.paid_orders <> e.paid_orders
+                              OR ABS(s.paid_amount - e.paid_amount) >= 0.005
+                              OR s.cancelled_orders <> e.cancelled_orders
+                              OR s.last_order_at IS NULL
+                              OR s.last_order_at <> e.last_order_at)
+                        + (SELECT COUNT(*)
+                           FROM user_order_stats s
+                           WHERE NOT EXISTS (SELECT 1 FROM orders o WHERE o.user_id = s.user_id)
+                             AND NOT EXISTS (SELECT 1 FROM orders_archive a WHERE a.user_id = s.user_id)
+                             AND (s.orders <> 0 OR s.paid_orders <> 0 OR s.paid_amount <> 0
+                                  OR s.cancelled_orders <> 0)) AS drift
+                    """)
+        return int((await self.session.execute(query)).scalar_one())
+
+    @staticmethod
+    def rebuild_statements(dialect: str) -> List[str]:
+        """SQL пересчёта счётчиков по заказам, включая архив."""
+        lock = ["LOCK TABLE user_order_stats IN SHARE ROW EXCLUSIVE MODE"] if dialect == "postgresql" else []
+        return lock + [
+            "DELETE FROM user_order_stats",
+            f"""
+            INSERT INTO user_order_stats (user_id, orders, paid_orders, paid_amount, cancelled_orders, last_order_at)
+            SELECT user_id, orders, paid_orders, paid_amount, cancelled_orders, last_order_at
+            FROM ({_USER_STATS_SOURCE}) source
+            """,
+        ]
+
+    async def rebuild(self) -> None:
+        """Пересчитать счётчики всех пользователей."""
+        for statement in self.rebuild_statements(self.session.get_bind().dialect.name):
+            await self.session.execute(text(statement))
@@ -0,0 +1,55 @@
+"""Per-request context shared between the web layer and database hooks."""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class RequestContext:
+    """Information about the HTTP request currently being served."""
+
+    method: str
+    path: str
+    scope: dict = field(default_factory=dict, repr=False)
+    started_at: float = field(default_factory=time.perf_counter)
+    statements: int = 0
+    db_time: float = 0.0
+    # Time budget in seconds from ``started_at`` (see app/api/deadlines.py)
+    budget: Optional[float] = None
+
+    @property
+    def route(self) -> str:
+        """Route template (e.g. ``/api/orders/{order_id}``) once routing has happened."""
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.path
+        return f"{self.method} {path}"
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None if the request has none."""
+        if self.budget is None:
+            return None
+        return max(0.0, self.budget - self.elapsed)
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Return the context of the request being served, if any."""
+    return _current.get()
+
+
+def set_request_context(context: Optional[RequestContext]):
+    """Bind a context to the current task; returns a token for ``reset_request_context``."""
+    return _current.set(context)
+
+
+def reset_request_context(token) -> None:
+    _current.reset(token)
@@ -0,0 +1,194 @@
+"""Schema bootstrap for PostgreSQL (SQL migrations) and SQLite (local/test backend)."""
+
+import sqlite3
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import text
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# SQLite mirror of migrations/*.sql. Column types are declared as UUID/TIMESTAMP so
+# that the converters registered below hydrate the same Python types as asyncpg.
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS order_statuses (
+        status TEXT PRIMARY KEY,
+        description TEXT NOT NULL
+    )
+    """,
+    """
+    INSERT INTO order_statuses (status, description) VALUES
+        ('created', 'Заказ создан'),
+        ('paid', 'Заказ оплачен'),
+        ('cancelled', 'Заказ отменен'),
+        ('shipped', 'Заказ доставляется'),
+        ('completed', 'Заказ завершён')
+    ON CONFLICT (status) DO NOTHING
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id UUID PRIMARY KEY,
+        email TEXT NOT NULL UNIQUE CHECK (email <> ''),
+        name TEXT NOT NULL,
+        created_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS orders (
+        id UUID PRIMARY KEY,
+        user_id UUID NOT NULL REFERENCES users(id),
+        status TEXT NOT NULL REFERENCES order_statuses(status),
+        total_amount NUMERIC(10, 2) NOT NULL CHECK (total_amount >= 0),
+        created_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE CHECK (name <> ''),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS order_items (
+        id UUID PRIMARY KEY,
+        order_id UUID NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+        product_id INTEGER NOT NULL REFERENCES products(id),
+        price NUMERIC(10, 2) NOT NULL CHECK (price >= 0),
+        quantity INT NOT NULL CHECK (quantity > 0),
+        line_no INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS order_status_history (
+        id UUID NOT NULL,
+        order_id UUID NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+        status TEXT NOT NULL REFERENCES order_statuses(status),
+        changed_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (id, changed_at)
+    )
+    """,
+    # SQLite serializes writers, so seq order is commit order and txid stays 0.
+    """
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        txid INTEGER NOT NULL DEFAULT 0,
+        entity TEXT NOT NULL CHECK (entity IN ('user', 'order')),
+        entity_id UUID NOT NULL,
+        op TEXT NOT NULL,
+        data TEXT NOT NULL DEFAULT '{}',
+        changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS order_daily_stats (
+        day DATE NOT NULL,
+        status TEXT NOT NULL REFERENCES order_statuses(status),
+        slot INTEGER NOT NULL DEFAULT 0,
+        orders INTEGER NOT NULL DEFAULT 0,
+        amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        items INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, status, slot)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_order_stats (
+        user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+        orders INTEGER NOT NULL DEFAULT 0,
+        paid_orders INTEGER NOT NULL DEFAULT 0,
+        paid_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        cancelled_orders INTEGER NOT NULL DEFAULT 0,
+        last_order_at TIMESTAMP
+    )
+    """,
+    # Archive of old completed/cancelled orders; PostgreSQL also partitions the hot
+    # order_status_history by month, which has no SQLite equivalent.
+    """
+    CREATE TABLE IF NOT EXISTS orders_archive (
+        id UUID PRIMARY KEY,
+        user_id UUID NOT NULL REFERENCES users(id),
+        status TEXT NOT NULL REFERENCES order_statuses(status),
+        total_amount NUMERIC(10, 2) NOT NULL,
+        created_at TIMESTAMP,
+        archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS order_items_archive (
+        id UUID PRIMARY KEY,
+        order_id UUID NOT NULL REFERENCES orders_archive(id) ON DELETE CASCADE,
+        product_id INTEGER NOT NULL REFERENCES products(id),
+        price NUMERIC(10, 2) NOT NULL,
+        quantity INT NOT NULL,
+        line_no INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS order_status_history_archive (
+        id UUID PRIMARY KEY,
+        order_id UUID NOT NULL REFERENCES orders_archive(id) ON DELETE CASCADE,
+        status TEXT NOT NULL REFERENCES order_statuses(status),
+        changed_at TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_orders_archive_user_id ON orders_archive (user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_archive_order_id ON order_items_archive (order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_status_history_archive_order_id"
+    " ON order_status_history_archive (order_id, changed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_order_status_history_order_id ON order_status_history (order_id, changed_at)",
+    # Whole-order documents (ORDER_STORAGE=document); JSON is plain text in SQLite
+    """
+    CREATE TABLE IF NOT EXISTS order_documents (
+        id UUID PRIMARY KEY,
+        user_id UUID NOT NULL REFERENCES users(id),
+        status TEXT NOT NULL REFERENCES order_statuses(status),
+        total_amount NUMERIC(10, 2) NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        doc TEXT NOT NULL,
+        items_count INTEGER GENERATED ALWAYS AS (json_array_length(doc, '$.items')) STORED,
+        history_count INTEGER GENERATED ALWAYS AS (json_array_length(doc, '$.history')) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_order_documents_user_id_created_at"
+    " ON order_documents (user_id, created_at DESC, id DESC)",
+    # No trigram indexes in SQLite: product search falls back to a LIKE scan.
+    "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_user_id_created_at ON orders (user_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_product_id ON order_items (product_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_order_id_line_no ON order_items (order_id, line_no, id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_archive_order_id_line_no"
+    " ON order_items_archive (order_id, line_no, id)",
+]
+
+
+def _register_sqlite_types() -> None:
+    sqlite3.register_adapter(uuid.UUID, str)
+    sqlite3.register_adapter(Decimal, str)
+    sqlite3.register_converter("UUID", lambda value: uuid.UUID(value.decode()))
+
+
+_register_sqlite_types()
+
+
+def sqlite_connect_args() -> dict:
+    """Connection arguments that make SQLite return UUID and datetime values."""
+    return {"detect_types": sqlite3.PARSE_DECLTYPES}
+
+
+async def create_schema(engine) -> None:
+    """Create all tables on ``engine``.
+
+    The SQLite mirror is safe to run repeatedly; on PostgreSQL every migration
+    is applied in order, so the database must not have any of them yet.
+    """
+    async with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            for statement in SQLITE_SCHEMA:
+                await conn.execute(text(statement))
+            return
+        raw = await conn.get_raw_connection()
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            # asyncpg runs multi-statement scripts (with $$ bodies) over the simple protocol
+            await raw.driver_connection.execute(path.read_text(encoding="utf-8"))
@@ -0,0 +1,289 @@
+"""Шардирование пользователей и заказов по user_id между несколькими базами.
+
+``ShardRouter`` сопоставляет user_id шарду по кольцу согласованного хеширования:
+при добавлении шарда переезжает примерно 1/N пользователей, а не все. Пользователь
+и все его заказы лежат на одном шарде (внешний ключ orders.user_id остаётся
+локальным), поэтому транзакция OrderService затрагивает одну базу.
+
+Id заказа несёт подсказку о шарде (маркер и номер шарда в первых байтах UUID),
+и ``find_by_id`` идёт сразу в нужную базу; при промахе (заказы, созданные до
+шардирования, или после изменения числа шардов) заказ ищется на всех шардах
+параллельно. Запросы без user_id (``find_all``, поиск, выгрузка) выполняются на
+всех шардах одновременно, результаты сливаются в общем порядке.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import heapq
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.domain.order import Order, OrderItem, OrderStatusChange
+from app.domain.user import User
+
+from .db import make_engine
+from .repositories import OrderHeader, OrderRepository, OrderSummary, UserRepository
+from .schema import create_schema
+
+# Первый байт id заказа с подсказкой; второй байт — номер шарда
+SHARD_MARKER = 0x5A
+MAX_SHARDS = 256
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class ShardRouter:
+    """Кольцо согласованного хеширования: ``virtual_nodes`` точек на шард."""
+
+    def __init__(self, shards: int, virtual_nodes: int = 64):
+        if not 1 <= shards <= MAX_SHARDS:
+            raise ValueError(f"Shard count must be between 1 and {MAX_SHARDS}, got: {shards}")
+        self.shards = shards
+        ring = sorted((_hash(f"shard-{shard}-{node}"), shard)
+                      for shard in range(shards) for node in range(virtual_nodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [shard for _, shard in ring]
+
+    def shard_for_user(self, user_id: uuid.UUID) -> int:
+        index = bisect.bisect(self._points, _hash(str(user_id))) % len(self._points)
+        return self._owners[index]
+
+    def new_order_id(self, user_id: uuid.UUID) -> uuid.UUID:
+        """Случайный UUID4 с номером шарда пользователя."""
+        raw = bytearray(uuid.uuid4().bytes)
+        raw[0], raw[1] = SHARD_MARKER, self.shard_for_user(user_id)
+        return uuid.UUID(bytes=bytes(raw))
+
+    def shard_hint(self, order_id: uuid.UUID) -> Optional[int]:
+        """Шард из id заказа или None, если подсказки нет."""
+        raw = order_id.bytes
+        if raw[0] == SHARD_MARKER and raw[1] < self.shards:
+            return raw[1]
+        return None
+
+
+class ShardSessions:
+    """По одной сессии на шард; сессия открывается при первом обращении.
+
+    ``commit`` фиксирует открытые сессии по очереди — атомарности между шардами
+    нет, поэтому одна бизнес-операция должна писать в один шард.
+    """
+
+    def __init__(self, factories: Sequence):
+        self.factories = list(factories)
+        self._sessions: Dict[int, AsyncSession] = {}
+
+    def __len__(self) -> int:
+        return len(self.factories)
+
+    def __getitem__(self, shard: int) -> AsyncSession:
+        if shard not in self._sessions:
+            self._sessions[shard] = self.factories[shard]()
+        return self._sessions[shard]
+
+    async def commit(self) -> None:
+        for session in self._sessions.values():
+            await session.commit()
+
+    async def rollback(self) -> None:
+        for session in self._sessions.values():
+            await session.rollback()
+
+    async def close(self) -> None:
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
+
+    async def __aenter__(self) -> "ShardSessions":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class ShardedDatabase:
+    """Движки и фабрики сессий для списка адресов баз; порядок адресов задаёт номера шардов."""
+
+    def __init__(self, urls: Sequence[str], **engine_kwargs):
+        self.urls = list(urls)
+        self.router = ShardRouter(len(self.urls))
+        self.engines = [make_engine(url, **engine_kwargs) for url in self.urls]
+        self.session_factories = [async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+                                  for engine in self.engines]
+
+    def sessions(self) -> ShardSessions:
+        return ShardSessions(self.session_factories)
+
+    async def create_schema(self) -> None:
+        await asyncio.gather(*(create_schema(engine) for engine in self.engines))
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(engine.dispose() for engine in self.engines))
+
+
+class ShardedUserRepository:
+    """UserRepository поверх шардов: пользователь живёт на шарде своего id."""
+
+    def __init__(self, sessions: ShardSessions, router: ShardRouter):
+        self.sessions = sessions
+        self.router = router
+
+    def _repo(self, shard: int) -> UserRepository:
+        return UserRepository(self.sessions[shard])
+
+    async def save(self, user: User) -> None:
+        await self._repo(self.router.shard_for_user(user.id)).save(user)
+
+    async def find_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+        return await self._repo(self.router.shard_for_user(user_id)).find_by_id(user_id)
+
+    async def find_by_ids(self, user_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, User]:
+        """По одному запросу на каждый шард, где есть кто-то из user_ids."""
+        by_shard: Dict[int, List[uuid.UUID]] = {}
+        for user_id in user_ids:
+            by_shard.setdefault(self.router.shard_for_user(user_id), []).append(user_id)
+        found = await asyncio.gather(*(self._repo(shard).find_by_ids(ids) for shard, ids in by_shard.items()))
+        return {user_id: user for users in found for user_id, user in users.items()}
+
+    async def find_by_email(self, email: str) -> Optional[User]:
+        """Опрос всех шардов: email не входит в ключ шардирования."""
+        found = await asyncio.gather(*(self._repo(shard).find_by_email(email) for shard in range(len(self.sessions))))
+        return next((user for user in found if user is not None), None)
+
+    async def find_all(self) -> List[User]:
+        found = await asyncio.gather(*(self._repo(shard).find_all() for shard in range(len(self.sessions))))
+        return [user for users in found for user in users]
+
+
+def _created_key(order) -> Tuple[datetime, str]:
+    return order.created_at, str(order.id)
+
+
+class ShardedOrderRepository:
+    """OrderRepository поверх шардов с маршрутизацией по user_id."""
+
+    def __init__(self, sessions: ShardSessions, router: ShardRouter):
+        self.sessions = sessions
+        self.router = router
+        # Шард найденных заказов: чтения позиций и истории идут сразу туда
+        self._located: Dict[uuid.UUID, int] = {}
+
+    @property
+    def _shards(self) -> range:
+        return range(len(self.sessions))
+
+    def _repo(self, shard: int) -> OrderRepository:
+        return OrderRepository(self.sessions[shard])
+
+    def new_order_id(self, user_id: uuid.UUID) -> uuid.UUID:
+        return self.router.new_order_id(user_id)
+
+    async def save(self, order: Order) -> None:
+        shard = self.router.shard_for_user(order.user_id)
+        await self._repo(shard).save(order)
+        self._located[order.id] = shard
+
+    async def _first(self, order_id: uuid.UUID, read) -> Tuple[Optional[int], object]:
+        """Результат ``read(repo)`` с шарда заказа: известного, из подсказки, иначе со всех сразу."""
+        tried = set()
+        for shard in (self._located.get(order_id), self.router.shard_hint(order_id)):
+            if shard is None or shard in tried:
+                continue
+            tried.add(shard)
+            found = await read(self._repo(shard))
+            if found:
+                return shard, found
+        rest = [shard for shard in self._shards if shard not in tried]
+        results = await asyncio.gather(*(read(self._repo(shard)) for shard in rest))
+        for shard, found in zip(rest, results):
+            if found:
+                return shard, found
+        return None, None
+
+    async def find_by_id(self, order_id: uuid.UUID, include_archive: bool = True) -> Optional[Order]:
+        shard, order = await self._first(order_id, lambda repo: repo.find_by_id(order_id, include_archive))
+        if shard is not None:
+            self._located[order_id] = shard
+        return order
+
+    async def is_archived(self, order_id: uuid.UUID) -> bool:
+        _, archived = await self._first(order_id, lambda repo: repo.is_archived(order_id))
+        return bool(archived)
+
+    async def find_header(self, order_id: uuid.UUID) -> Optional[OrderHeader]:
+        shard, header = await self._first(order_id, lambda repo: repo.find_header(order_id))
+        if shard is not None:
+            self._located[order_id] = shard
+        return header
+
+    async def _located_repo(self, order_id: uuid.UUID) -> Optional[OrderRepository]:
+        if order_id not in self._located:
+            await self.find_header(order_id)
+        shard = self._located.get(order_id)
+        return None if shard is None else self._repo(shard)
+
+    async def find_items(self, order_id: uuid.UUID, after: Optional[Tuple[int, uuid.UUID]] = None,
+                         limit: Optional[int] = None, archived: bool = False) -> List[Tuple[int, OrderItem]]:
+        repo = await self._located_repo(order_id)
+        return [] if repo is None else await repo.find_items(order_id, after, limit, archived)
+
+    async def find_history(self, order_id: uuid.UUID, after: Optional[Tuple[datetime, uuid.UUID]] = None,
+                           limit: Optional[int] = None, archived: bool = False) -> List[OrderStatusChange]:
+        repo = await self._located_repo(order_id)
+        return [] if repo is None else await repo.find_history(order_id, after, limit, archived)
+
+    async def find_by_user(self, user_id: uuid.UUID) -> List[Order]:
+        return await self._repo(self.router.shard_for_user(user_id)).find_by_user(user_id)
+
+    async def find_all(self) -> List[Order]:
+        """Заказы всех шардов по возрастанию (created_at, id)."""
+        found = await asyncio.gather(*(self._repo(shard).find_all() for shard in self._shards))
+        return sorted((order for orders in found for order in orders), key=_created_key)
+
+    async def iter_all(self, batch_size: int = 500) -> AsyncIterator[Order]:
+        """Поток заказов всех шардов по возрастанию (created_at, id).
+
+        Каждый шард читается страницами по ``batch_size``; в памяти не больше
+        одной страницы на шард.
+        """
+        async def page(shard: int, after=None) -> List[Order]:
+            return await self._repo(shard).find_created_after(after, batch_size)
+
+        first = await asyncio.gather(*(page(shard) for shard in self._shards))
+        buffers = {shard: deque(orders) for shard, orders in zip(self._shards, first)}
+        exhausted = {shard: len(orders) < batch_size for shard, orders in zip(self._shards, first)}
+        heap = [(_created_key(buffer[0]), shard) for shard, buffer in buffers.items() if buffer]
+        heapq.heapify(heap)
+        while heap:
+            _, shard = heapq.heappop(heap)
+            buffer = buffers[shard]
+            order = buffer.popleft()
+            yield order
+            if not buffer and not exhausted[shard]:
+                more = await page(shard, (order.created_at, order.id))
+                exhausted[shard] = len(more) < batch_size
+                buffer.extend(more)
+            if buffer:
+                heapq.heappush(heap, (_created_key(buffer[0]), shard))
+
+    async def search_by_product(self, product: str, user_id: Optional[uuid.UUID] = None,
+                                limit: int = 20, offset: int = 0) -> List[OrderSummary]:
+        if user_id is not None:
+            return await self._repo(self.router.shard_for_user(user_id)).search_by_product(
+                product, user_id, limit, offset)
+        # Страница общего порядка может целиком лежать на одном шарде
+        found = await asyncio.gather(*(self._repo(shard).search_by_product(product, None, offset + limit, 0)
+                                       for shard in self._shards))
+        merged = sorted((s for summaries in found for s in summaries), key=_created_key, reverse=True)
+        return merged[offset:offset + limit]
+
+    async def archive_batch(self, cutoff: datetime, limit: int = 1000) -> int:
+        moved = await asyncio.gather(*(self._repo(shard).archive_batch(cutoff, limit) for shard in self._shards))
+        return sum(moved)
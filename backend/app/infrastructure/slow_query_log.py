@@ -0,0 +1,187 @@
+"""Slow-query log with normalized SQL fingerprints and sampled EXPLAIN plans."""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event
+
+from .request_context import get_request_context
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):[A-Za-z_]\w*|\?")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Strip literals and bind markers so that equivalent statements compare equal."""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUES_LIST.sub(r"\1, ...", sql)
+    sql = _IN_LIST.sub("IN (?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def parameter_shape(parameters) -> str:
+    """Describe bind parameters by type only, never by value."""
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+@dataclass
+class SlowQueryStats:
+    """Aggregated timings of one normalized statement."""
+
+    fingerprint: str
+    statement: str
+    parameter_shape: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: Optional[datetime] = None
+    routes: Counter = field(default_factory=Counter)
+    explain: Optional[str] = None
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+@dataclass
+class SlowQuery:
+    """Single statement that crossed the threshold."""
+
+    fingerprint: str
+    duration_ms: float
+    route: Optional[str]
+    parameter_shape: str
+    recorded_at: datetime
+
+
+class SlowQueryLog:
+    """Collects statements slower than ``threshold_ms``.
+
+    When ``explain_sample_rate`` is positive, a statement that becomes the new worst
+    case of its fingerprint is re-run once under ``EXPLAIN (ANALYZE, BUFFERS)`` with
+    that probability. Only read-only ``SELECT`` statements on PostgreSQL are explained,
+    because ``ANALYZE`` executes the statement a second time.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 200.0,
+        explain_sample_rate: float = 0.0,
+        max_fingerprints: int = 500,
+        recent_size: int = 200,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.max_fingerprints = max_fingerprints
+        self.recent: Deque[SlowQuery] = deque(maxlen=recent_size)
+        self._stats: Dict[str, SlowQueryStats] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine) -> None:
+        """Attach timing hooks to an engine (sync or async)."""
+        target = getattr(engine, "sync_engine", engine)
+        event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_query_started_at
+        request = get_request_context()
+        if request is not None:
+            request.statements += 1
+            request.db_time += elapsed
+        duration_ms = elapsed * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        stats = self.record(statement, parameters, duration_ms, request.route if request else None)
+        if stats is not None and self._should_explain(conn, statement):
+            stats.explain = self._explain(conn, statement, parameters)
+
+    def record(self, statement: str, parameters, duration_ms: float, route: Optional[str] = None):
+        """Store one slow execution; returns the aggregate it was added to."""
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        shape = parameter_shape(parameters)
+        now = datetime.now()
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self._evict()
+                stats = self._stats[key] = SlowQueryStats(key, normalized, shape)
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.last_seen = now
+            stats.routes[route or "-"] += 1
+            worst = duration_ms > stats.max_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            self.recent.append(SlowQuery(key, duration_ms, route, shape, now))
+        return stats if worst else None
+
+    def _evict(self) -> None:
+        victim = min(self._stats.values(), key=lambda s: s.total_ms)
+        del self._stats[victim.fingerprint]
+
+    def _should_explain(self, conn, statement: str) -> bool:
+        if self.explain_sample_rate <= 0 or conn.dialect.name != "postgresql":
+            return False
+        if not statement.lstrip().lower().startswith("select"):
+            return False
+        return random.random() < self.explain_sample_rate
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[str]:
+        # A savepoint keeps a failing EXPLAIN from aborting the caller's transaction.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            except Exception as exc:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                plan = f"EXPLAIN failed: {exc}"
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as exc:  # the plan is best effort, never fail the request
+            return f"EXPLAIN failed: {exc}"
+        finally:
+            cursor.close()
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[SlowQueryStats]:
+        """Fingerprints sorted by ``total_ms``, ``max_ms``, ``mean_ms`` or ``count``."""
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda s: getattr(s, order_by), reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.recent.clear()
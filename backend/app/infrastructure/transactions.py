@@ -0,0 +1,109 @@
+"""Retrying units of work.
+
+Under SERIALIZABLE or REPEATABLE READ (``DB_ISOLATION_LEVEL``) PostgreSQL
+aborts one of two conflicting transactions with ``serialization_failure``
+(40001), and lock cycles end in ``deadlock_detected`` (40P01) at any level.
+Both mean "run the transaction again", so ``UnitOfWork.run`` rolls back, waits
+a jittered, exponentially growing delay and repeats the whole command,
+commit included, up to ``RetryPolicy.attempts`` times. Retries never sleep
+past the request deadline.
+"""
+
+import asyncio
+import random
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .request_context import get_request_context
+
+T = TypeVar("T")
+S = TypeVar("S")
+
+RETRYABLE_SQLSTATES = {"40001": "serialization_failure", "40P01": "deadlock_detected"}
+
+
+def retryable_error(exc: BaseException) -> Optional[str]:
+    """Name of the retryable condition behind ``exc``, or None."""
+    if not isinstance(exc, DBAPIError):
+        return None
+    return RETRYABLE_SQLSTATES.get(getattr(exc.orig, "sqlstate", None))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 0.01
+    max_delay: float = 0.2
+
+    def delay(self, attempt: int, rng: random.Random = random) -> float:
+        """Backoff after failed ``attempt`` (1-based): uniform up to the capped exponential delay."""
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RetryMetrics:
+    """Counters per operation; exposed at ``/debug/transactions``."""
+
+    def __init__(self):
+        self.committed: Counter = Counter()
+        self.retries: Counter = Counter()
+        self.exhausted: Counter = Counter()
+
+    def snapshot(self) -> dict:
+        operations = sorted(set(self.committed) | {op for op, _ in self.retries} | set(self.exhausted))
+        return {
+            op: {
+                "committed": self.committed[op],
+                "retries": {reason: n for (name, reason), n in sorted(self.retries.items()) if name == op},
+                "exhausted": self.exhausted[op],
+            }
+            for op in operations
+        }
+
+
+class UnitOfWork(Generic[S]):
+    """A service bound to a session whose commands run as retried transactions.
+
+    ``begin`` prepares every retry's transaction the way ``get_db`` prepared
+    the first one (isolation level, deadline limits).
+    """
+
+    def __init__(self, session: AsyncSession, service: S, policy: RetryPolicy = RetryPolicy(),
+                 metrics: Optional[RetryMetrics] = None,
+                 begin: Optional[Callable[[AsyncSession], Awaitable[None]]] = None):
+        self.session = session
+        self.service = service
+        self.policy = policy
+        self.metrics = metrics if metrics is not None else RetryMetrics()
+        self.begin = begin
+
+    async def run(self, command: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Call ``command(*args, **kwargs)`` and commit, retrying on 40001/40P01."""
+        name = getattr(command, "__name__", "command")
+        attempt = 1
+        while True:
+            try:
+                result = await command(*args, **kwargs)
+                await self.session.commit()
+            except DBAPIError as exc:
+                reason = retryable_error(exc)
+                await self.session.rollback()
+                if reason is None:
+                    raise
+                delay = self.policy.delay(attempt)
+                context = get_request_context()
+                out_of_time = context is not None and context.remaining is not None and context.remaining <= delay
+                if attempt >= self.policy.attempts or out_of_time:
+                    self.metrics.exhausted[name] += 1
+                    raise
+                self.metrics.retries[name, reason] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                if self.begin is not None:
+                    await self.begin(self.session)
+            else:
+                self.metrics.committed[name] += 1
+                return result
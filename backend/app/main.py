@@ -1,30 +1,115 @@
 """Main FastAPI application."""
 
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import DBAPIError
+
+from app.api.routes import NEXT_CURSOR_HEADER, router
+from app.api.debug import router as debug_router
+from app.api.deadlines import DeadlineMiddleware, budgets_from_settings, database_timeout_handler
+from app.api.middleware import RequestContextMiddleware
+from app.api.profiling import ProfileStore, ProfilingMiddleware
+from app.infrastructure.db import Database
+from app.infrastructure.events import make_broker
+from app.infrastructure.repositories import order_repository_class
+from app.infrastructure.transactions import RetryMetrics, RetryPolicy
+from app.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the connection pool and start the event broker; undo both on shutdown."""
+    database: Database = app.state.database
+    started = time.perf_counter()
+    # Sync dependencies run in anyio's thread pool, whose backend is otherwise
+    # imported (~30 ms) while serving the first request.
+    await anyio.to_thread.run_sync(lambda: None)
+    try:
+        await database.warm_up()
+    except Exception as exc:
+        # Serve anyway: requests will open connections on demand once the database is back.
+        logger.warning("database warm-up failed: %s", exc)
+    app.state.startup["warm_up_ms"] = database.warm_up_ms
+    await app.state.events.start()
+    app.state.startup["lifespan_ms"] = (time.perf_counter() - started) * 1000
+    try:
+        yield
+    finally:
+        await app.state.events.stop()
+        await database.dispose()
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build an application; the engine is created by the lifespan, not here."""
+    settings = settings or Settings.from_env()
+    app = FastAPI(
+        title="Marketplace API",
+        description="DDD-based marketplace API for lab work",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+    app.state.database = Database(settings)
+    app.state.events = make_broker(settings)
+    app.state.order_repository = order_repository_class(settings.order_storage)
+    app.state.retry_policy = RetryPolicy(
+        attempts=settings.tx_retry_attempts,
+        base_delay=settings.tx_retry_base_delay_ms / 1000,
+        max_delay=settings.tx_retry_max_delay_ms / 1000,
+    )
+    app.state.retry_metrics = RetryMetrics()
+    app.state.startup = {}
+    app.state.profile_store = ProfileStore(settings.profile_buffer_size)
+
+    # Load shedding; added first so that CORS and timing headers also wrap its 503s
+    if settings.admission_control:
+        from app.api.admission import AdmissionMiddleware, make_controller
+
+        app.state.admission = make_controller(settings, app.state.database.pool_saturation)
+        app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
+
+    # Per-class time budgets; needs the request context, so it sits inside RequestContextMiddleware
+    app.add_middleware(DeadlineMiddleware, budgets=budgets_from_settings(settings))
+    app.add_exception_handler(DBAPIError, database_timeout_handler)
 
-from app.api.routes import router
+    # CORS for frontend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
 
-app = FastAPI(
-    title="Marketplace API",
-    description="DDD-based marketplace API for lab work",
-    version="1.0.0",
-)
+    # Per-request context for database instrumentation
+    app.add_middleware(RequestContextMiddleware)
 
-# CORS for frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Opt-in sampling profiler (X-Profile-Token header or PROFILE_SAMPLE_RATE)
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            store=app.state.profile_store,
+            token=settings.profile_token,
+            sample_rate=settings.profile_sample_rate,
+            interval_ms=settings.profile_interval_ms,
+        )
 
-# Include routes
-app.include_router(router, prefix="/api")
+    # Include routes
+    app.include_router(router, prefix="/api")
+    app.include_router(debug_router)
 
+    @app.get("/health")
+    async def health():
+        """Health check endpoint."""
+        return {"status": "ok"}
 
-@app.get("/health")
-async def health():
-    """Health check endpoint."""
-    return {"status": "ok"}
+    return app
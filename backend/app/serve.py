@@ -0,0 +1,147 @@
+"""Production entry point: ``python -m app.serve``.
+
+Runs ``app.main:create_app`` under uvicorn in several worker processes:
+
+* the number of workers comes from ``--workers``, then ``WEB_CONCURRENCY``,
+  then the CPU quota of the container (cgroup v2/v1), then the CPUs the
+  process may run on;
+* ``DB_MAX_CONNECTIONS`` is the connection budget of the whole server; with
+  ``EVENTS_BACKEND=postgres`` one connection per worker is set aside for its
+  LISTEN connection, which lives outside the pool, and every worker gets an
+  equal share of the rest as its pool size (and no overflow), so the total
+  never exceeds what PostgreSQL was sized for; workers that would not get a
+  pool connection are not started;
+* on SIGTERM/SIGINT every worker stops accepting connections, finishes the
+  requests in flight (up to ``--graceful-timeout`` seconds), then runs the
+  lifespan shutdown, which disposes of its engine.
+"""
+
+import argparse
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def cpu_quota(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """CPUs granted by the cgroup CPU quota, or ``None`` when unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers(environ=os.environ, root: Path = CGROUP_ROOT) -> int:
+    """``WEB_CONCURRENCY`` if set, otherwise one worker per CPU of the quota."""
+    if environ.get("WEB_CONCURRENCY"):
+        return max(1, int(environ["WEB_CONCURRENCY"]))
+    cpus = available_cpus()
+    quota = cpu_quota(root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def reserved_connections(events_backend: str) -> int:
+    """Connections each worker opens outside its pool: the LISTEN connection of the postgres broker."""
+    return 1 if events_backend == "postgres" else 0
+
+
+def capped_workers(workers: int, budget: int, reserved: int = 0) -> int:
+    """At most as many workers as the budget has room for a pool of one plus ``reserved`` each."""
+    if budget < 1 + reserved:
+        raise ValueError(f"DB_MAX_CONNECTIONS must be at least {1 + reserved}, got {budget}")
+    return min(workers, budget // (1 + reserved))
+
+
+def pool_settings(budget: int, workers: int, warm: int, reserved: int = 0) -> Dict[str, str]:
+    """Per-worker pool environment for a server-wide budget of ``budget`` connections.
+
+    ``reserved`` connections per worker are taken out of the budget before it is split.
+    """
+    needed = workers * (1 + reserved)
+    if needed > budget:
+        raise ValueError(f"{workers} workers need at least {needed} connections, the budget is {budget}")
+    per_worker = (budget - workers * reserved) // workers
+    return {
+        "DB_POOL_SIZE": str(per_worker),
+        "DB_MAX_OVERFLOW": "0",
+        "DB_POOL_WARM": str(min(warm, per_worker)),
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: WEB_CONCURRENCY, else the CPU quota)")
+    parser.add_argument("--db-max-connections", type=int, default=int(os.getenv("DB_MAX_CONNECTIONS", "40")),
+                        help="database connections for the whole server, split across workers")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                        help="seconds to drain in-flight requests on shutdown")
+    parser.add_argument("--keep-alive", type=int, default=5, help="HTTP keep-alive timeout, seconds")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    requested = args.workers or default_workers()
+    events_backend = os.getenv("EVENTS_BACKEND", "memory")
+    reserved = reserved_connections(events_backend)
+    workers = capped_workers(requested, args.db_max_connections, reserved)
+    if workers < requested:
+        print(f"running {workers} worker(s) instead of {requested}: "
+              f"DB_MAX_CONNECTIONS={args.db_max_connections} allows {1 + reserved} connection(s) "
+              f"per worker at most", file=sys.stderr)
+    if workers > 1 and events_backend == "memory":
+        print("warning: EVENTS_BACKEND=memory delivers order events only within one worker; "
+              "SSE clients of the other workers miss them. Set EVENTS_BACKEND=postgres.", file=sys.stderr)
+    warm = int(os.getenv("DB_POOL_WARM", "5"))
+    # Workers build their settings from the environment they inherit.
+    os.environ.update(pool_settings(args.db_max_connections, workers, warm, reserved))
+    listen = " plus a LISTEN connection" if reserved else ""
+    print(f"serving on {args.host}:{args.port} with {workers} worker(s), "
+          f"{os.environ['DB_POOL_SIZE']} database connection(s) each{listen}", file=sys.stderr)
+
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        timeout_keep_alive=args.keep_alive,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Application settings, read from the environment once per application instance."""
+
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional, Tuple
+
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Everything ``create_app`` needs; no connections are opened while building it."""
+
+    database_url: str = "postgresql+asyncpg://postgres:postgres@db:5432/marketplace"
+    # SQL_ECHO=1 logs every statement; use the slow-query log in production instead.
+    sql_echo: bool = False
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # e.g. "SERIALIZABLE" or "REPEATABLE READ"; order commands retry serialization
+    # failures and deadlocks up to tx_retry_attempts times (app/infrastructure/transactions.py).
+    db_isolation_level: Optional[str] = None
+    tx_retry_attempts: int = 3
+    tx_retry_base_delay_ms: float = 10.0
+    tx_retry_max_delay_ms: float = 200.0
+    # Upper bound on row-lock waits within a request deadline; 0 leaves only the deadline.
+    db_lock_timeout_ms: float = 2000.0
+    # Connections opened (and primed with the hot statements) before the first request.
+    db_pool_warm: int = 5
+    slow_query_threshold_ms: float = 200.0
+    slow_query_explain_sample_rate: float = 0.0
+    # /debug endpoints answer only requests with a matching X-Debug-Token header;
+    # while unset they return 404.
+    debug_token: Optional[str] = None
+    # Requests carrying X-Profile-Token equal to profile_token are always profiled;
+    # profile_sample_rate profiles a random share of all other requests.
+    profile_token: Optional[str] = None
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5.0
+    # Profiles kept in memory for /debug/profiles
+    profile_buffer_size: int = 50
+    cors_origins: Tuple[str, ...] = ("*",)
+    # "memory" delivers order events within one process; "postgres" uses LISTEN/NOTIFY
+    # so that SSE subscribers of every worker see every change.
+    events_backend: str = "memory"
+    # "tables" stores orders in orders/order_items/order_status_history; "document"
+    # keeps each order in one order_documents row (see 009_order_documents.sql).
+    order_storage: str = "tables"
+    # Shed read/write requests with 503 when the pool is saturated (see app/api/admission.py).
+    # admission_limit is the initial concurrency limit; 0 means db_pool_size + db_max_overflow.
+    admission_control: bool = False
+    admission_limit: int = 0
+    admission_target_latency_ms: float = 250.0
+    admission_critical_wait_ms: float = 1000.0
+    # Request deadlines per endpoint class (app/api/deadlines.py); 0 disables a class.
+    deadline_critical_ms: float = 5000.0
+    deadline_write_ms: float = 5000.0
+    deadline_read_ms: float = 2000.0
+    deadline_bulk_ms: float = 10000.0
+
+    @property
+    def profiling_enabled(self) -> bool:
+        return bool(self.profile_token) or self.profile_sample_rate > 0
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ, **overrides) -> "Settings":
+        """Settings from environment variables; keyword arguments take precedence."""
+        values = {
+            "database_url": environ.get("DATABASE_URL", cls.database_url),
+            "sql_echo": _flag(environ.get("SQL_ECHO", "0")),
+            "db_pool_size": int(environ.get("DB_POOL_SIZE", cls.db_pool_size)),
+            "db_max_overflow": int(environ.get("DB_MAX_OVERFLOW", cls.db_max_overflow)),
+            "db_pool_timeout": float(environ.get("DB_POOL_TIMEOUT", cls.db_pool_timeout)),
+            "db_isolation_level": environ.get("DB_ISOLATION_LEVEL") or None,
+            "tx_retry_attempts": int(environ.get("TX_RETRY_ATTEMPTS", cls.tx_retry_attempts)),
+            "tx_retry_base_delay_ms": float(environ.get("TX_RETRY_BASE_DELAY_MS", cls.tx_retry_base_delay_ms)),
+            "tx_retry_max_delay_ms": float(environ.get("TX_RETRY_MAX_DELAY_MS", cls.tx_retry_max_delay_ms)),
+            "db_lock_timeout_ms": float(environ.get("DB_LOCK_TIMEOUT_MS", cls.db_lock_timeout_ms)),
+            "db_pool_warm": int(environ.get("DB_POOL_WARM", cls.db_pool_warm)),
+            "slow_query_threshold_ms": float(environ.get("SLOW_QUERY_THRESHOLD_MS", cls.slow_query_threshold_ms)),
+            "slow_query_explain_sample_rate": float(
+                environ.get("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", cls.slow_query_explain_sample_rate)
+            ),
+            "debug_token": environ.get("DEBUG_TOKEN") or None,
+            "profile_token": environ.get("PROFILE_TOKEN") or None,
+            "profile_sample_rate": float(environ.get("PROFILE_SAMPLE_RATE", cls.profile_sample_rate)),
+            "profile_interval_ms": float(environ.get("PROFILE_INTERVAL_MS", cls.profile_interval_ms)),
+            "profile_buffer_size": int(environ.get("PROFILE_BUFFER_SIZE", cls.profile_buffer_size)),
+            "cors_origins": tuple(o.strip() for o in environ.get("CORS_ORIGINS", "*").split(",") if o.strip()),
+            "events_backend": environ.get("EVENTS_BACKEND", cls.events_backend),
+            "order_storage": environ.get("ORDER_STORAGE", cls.order_storage),
+            "admission_control": _flag(environ.get("ADMISSION_CONTROL", "0")),
+            "admission_limit": int(environ.get("ADMISSION_LIMIT", cls.admission_limit)),
+            "admission_target_latency_ms": float(
+                environ.get("ADMISSION_TARGET_LATENCY_MS", cls.admission_target_latency_ms)
+            ),
+            "admission_critical_wait_ms": float(
+                environ.get("ADMISSION_CRITICAL_WAIT_MS", cls.admission_critical_wait_ms)
+            ),
+            "deadline_critical_ms": float(environ.get("DEADLINE_CRITICAL_MS", cls.deadline_critical_ms)),
+            "deadline_write_ms": float(environ.get("DEADLINE_WRITE_MS", cls.deadline_write_ms)),
+            "deadline_read_ms": float(environ.get("DEADLINE_READ_MS", cls.deadline_read_ms)),
+            "deadline_bulk_ms": float(environ.get("DEADLINE_BULK_MS", cls.deadline_bulk_ms)),
+        }
+        values.update(overrides)
+        return cls(**values)
@@ -1,17 +1,20 @@
 """Pytest configuration and fixtures."""
 
-import os
-# Set test database URL BEFORE any app imports
-if "DATABASE_URL" not in os.environ:
-    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
-
 import asyncio
 import pytest
 import uuid
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy import text
+from contextlib import AsyncExitStack, contextmanager
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
-from app.infrastructure.db import get_db
+from app.application.order_service import OrderService
+from app.application.user_service import UserService
+from app.infrastructure.db import make_engine
+from app.infrastructure.memory_repositories import InMemoryOrderRepository, InMemoryStore, InMemoryUserRepository
+from app.infrastructure.schema import create_schema
+from app.main import create_app
+from app.settings import Settings
 
 
 @pytest.fixture(scope="session")
@@ -22,60 +25,47 @@ def event_loop():
     loop.close()
 
 
-@pytest.fixture(scope="session")
+@pytest.fixture
 async def test_engine():
-    """Create test database engine."""
-    engine = create_async_engine(
-        "sqlite+aiosqlite:///:memory:",
-        echo=True,
-    )
-    
-    # Create tables
-    async with engine.begin() as conn:
-        await conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                created_at TIMESTAMP NOT NULL
-            )
-        """))
-        await conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                status TEXT NOT NULL,
-                total_amount REAL NOT NULL,
-                created_at TIMESTAMP NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """))
-        await conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS order_items (
-                id TEXT PRIMARY KEY,
-                order_id TEXT NOT NULL,
-                product_name TEXT NOT NULL,
-                price REAL NOT NULL,
-                quantity INTEGER NOT NULL,
-                subtotal REAL NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders(id)
-            )
-        """))
-        await conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS order_status_history (
-                id TEXT PRIMARY KEY,
-                order_id TEXT NOT NULL,
-                status TEXT NOT NULL,
-                changed_at TIMESTAMP NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders(id)
-            )
-        """))
-    
+    """Create a fresh test database with the SQLite mirror of the migrations."""
+    engine = make_engine("sqlite+aiosqlite:///:memory:")
+    await create_schema(engine)
     yield engine
     await engine.dispose()
 
 
-@pytest.fixture(scope="session")
+@pytest.fixture
+async def make_app(tmp_path):
+    """``await make_app(**settings)``: a started app over a SQLite file database with the schema; stopped after the test."""
+    async with AsyncExitStack() as stack:
+        async def make(**overrides):
+            settings = Settings(**{"database_url": f"sqlite+aiosqlite:///{tmp_path / 'api.db'}",
+                                   "db_pool_warm": 0, **overrides})
+            engine = make_engine(settings.database_url)
+            await create_schema(engine)
+            await engine.dispose()
+            app = create_app(settings)
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            return app
+
+        yield make
+
+
+@pytest.fixture
+async def make_client(make_app):
+    """``await make_client(**settings)``: an API client of ``make_app(**settings)``, or of ``app`` when given."""
+    async with AsyncExitStack() as stack:
+        async def make(app=None, raise_app_exceptions=True, headers=None, **settings):
+            if app is None:
+                app = await make_app(**settings)
+            transport = ASGITransport(app=app, raise_app_exceptions=raise_app_exceptions)
+            client = AsyncClient(transport=transport, base_url="http://test", headers=headers)
+            return await stack.enter_async_context(client)
+
+        yield make
+
+
+@pytest.fixture
 async def test_session_factory(test_engine):
     """Create test session factory."""
     return async_sessionmaker(test_engine, expire_on_commit=False, class_=AsyncSession)
@@ -89,7 +79,47 @@ async def db_session(test_session_factory):
         await session.rollback()
 
 
+@pytest.fixture
+def captured_statements():
+    """``with captured_statements(engine, ...) as statements``: SQL run on the engines inside the block."""
+    @contextmanager
+    def capture(*engines):
+        statements = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        targets = [getattr(engine, "sync_engine", engine) for engine in engines]
+        for target in targets:
+            event.listen(target, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            for target in targets:
+                event.remove(target, "before_cursor_execute", listener)
+
+    return capture
+
+
 @pytest.fixture
 def sample_user_id():
     """Create a sample user ID."""
     return uuid.uuid4()
+
+
+@pytest.fixture
+def memory_store():
+    """Empty in-memory backend shared by the repositories of one test."""
+    return InMemoryStore()
+
+
+@pytest.fixture
+def user_service(memory_store):
+    """UserService over in-memory repositories."""
+    return UserService(InMemoryUserRepository(memory_store))
+
+
+@pytest.fixture
+def order_service(memory_store):
+    """OrderService over in-memory repositories."""
+    return OrderService(InMemoryOrderRepository(memory_store), InMemoryUserRepository(memory_store))
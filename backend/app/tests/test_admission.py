@@ -0,0 +1,96 @@
+"""Tests for admission control and how the load-test driver reacts to shed requests."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.api.admission import AdmissionController, AimdLimit, Priority, classify
+from app.tools.loadtest import Driver, LoadSpec, Recorder
+
+
+def controller(limit=10.0, saturation=None, critical_wait=0.2):
+    return AdmissionController(AimdLimit(limit, 1, 100, target_latency=0.05), lambda: saturation, critical_wait)
+
+
+class TestAdmissionController:
+    def test_classify(self):
+        assert classify("POST", "/api/orders/abc/pay") is Priority.CRITICAL
+        assert classify("POST", "/api/orders/abc/items") is Priority.WRITE
+        assert classify("GET", "/api/orders/abc") is Priority.READ
+        assert classify("GET", "/api/orders/stream") is None
+        assert classify("GET", "/health") is None
+
+    def test_aimd(self):
+        limit = AimdLimit(10, 2, 20, target_latency=0.05)
+        limit.observe(0.01)
+        assert limit.value == pytest.approx(10.1)
+        limit.observe(0.5)
+        limit.observe(0.5)
+        # Two slow completions in a row count as one congestion signal
+        assert limit.value == pytest.approx(9.09)
+        limit.observe(0.01, overloaded=True)
+        assert limit.value == pytest.approx(9.09)
+
+    async def test_reads_are_shed_before_critical(self):
+        admission = controller(limit=10)
+        assert all([admission.try_acquire(Priority.READ) for _ in range(6)])
+        assert not await admission.acquire(Priority.READ)
+        assert await admission.acquire(Priority.WRITE)
+        assert await admission.acquire(Priority.CRITICAL)
+        assert admission.rejected[Priority.READ] == 1
+
+    async def test_saturated_pool_rejects_all_but_critical(self):
+        admission = controller(saturation=1.0)
+        assert not await admission.acquire(Priority.READ)
+        assert not await admission.acquire(Priority.WRITE)
+        assert await admission.acquire(Priority.CRITICAL)
+
+    async def test_critical_waits_for_a_slot(self):
+        admission = controller(limit=1)
+        assert await admission.acquire(Priority.CRITICAL)
+        waiting = asyncio.ensure_future(admission.acquire(Priority.CRITICAL))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await admission.release(Priority.CRITICAL, 0.5)
+        assert await waiting
+        # The slow release kept the limit at 1 and nothing frees the slot: rejected after the wait
+        assert not await admission.acquire(Priority.CRITICAL)
+        assert admission.rejected[Priority.CRITICAL] == 1
+
+
+@pytest.fixture
+async def app(make_app):
+    return await make_app(admission_control=True, admission_limit=2, debug_token="t")
+
+
+async def test_overloaded_app_sheds_reads_with_retry_after(app, make_client):
+    client = await make_client(app, headers={"X-Debug-Token": "t"})
+    assert (await client.get("/api/users")).status_code == 200
+
+    for _ in range(2):
+        assert app.state.admission.try_acquire(Priority.WRITE)
+    shed = await client.get("/api/users")
+    assert shed.status_code == 503 and shed.headers["retry-after"] == "1"
+    missing = "00000000-0000-0000-0000-000000000001"
+    assert (await client.post(f"/api/orders/{missing}/pay")).status_code == 404
+    assert (await client.get("/health")).status_code == 200
+
+    stats = (await client.get("/debug/admission")).json()
+    assert stats["enabled"] and stats["rejected"]["read"] == 1
+    assert stats["inflight"] == {"read": 0, "write": 2, "critical": 0}
+
+
+async def test_load_driver_retries_shed_requests():
+    responses = iter([503, 503, 200])
+
+    def handler(request):
+        return httpx.Response(next(responses), headers={"Retry-After": "1"}, json={})
+
+    recorder = Recorder()
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://test") as client:
+        driver = Driver(client, LoadSpec(max_retry_wait=0.01), recorder)
+        await driver.call("GET", "GET /api/users", "/api/users")
+    report = recorder.report()
+    assert report["shed"] == {"GET /api/users": 2}
+    assert report["endpoints"]["GET /api/users"]["statuses"] == {"200": 1, "503": 2}
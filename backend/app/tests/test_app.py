@@ -0,0 +1,115 @@
+"""Tests for the application factory and its lifespan."""
+
+import os
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from app.infrastructure.db import make_engine
+from app.infrastructure.schema import create_schema
+from app.main import create_app
+from app.settings import Settings
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+class TestSettings:
+    def test_from_env(self):
+        settings = Settings.from_env({
+            "DATABASE_URL": "sqlite+aiosqlite:///x.db",
+            "SQL_ECHO": "true",
+            "DB_POOL_WARM": "3",
+            "CORS_ORIGINS": "http://a, http://b",
+            "PROFILE_BUFFER_SIZE": "7",
+        })
+        assert settings.database_url == "sqlite+aiosqlite:///x.db"
+        assert settings.sql_echo is True
+        assert settings.db_pool_warm == 3
+        assert settings.cors_origins == ("http://a", "http://b")
+        assert (settings.profile_buffer_size, settings.profile_interval_ms) == (7, 5.0)
+        assert settings.debug_token is None and not settings.profiling_enabled
+
+    def test_overrides_win(self):
+        settings = Settings.from_env({"DATABASE_URL": "a"}, database_url="b", profile_sample_rate=0.5)
+        assert settings.database_url == "b"
+        assert settings.profiling_enabled
+
+
+class TestCreateApp:
+    def test_does_not_connect(self):
+        app = create_app(Settings(database_url="postgresql+asyncpg://nobody@127.0.0.1:1/none"))
+        assert app.state.database._engine is None
+
+    def test_import_does_not_load_database_drivers(self):
+        code = "import sys, app.main; print(sorted({'asyncpg', 'aiosqlite'} & set(sys.modules)))"
+        env = {**os.environ, "DATABASE_URL": "postgresql+asyncpg://nobody@127.0.0.1:1/none"}
+        output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        assert output.strip() == "[]"
+
+    async def test_lifespan_warms_and_disposes(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+        schema_engine = make_engine(url)
+        await create_schema(schema_engine)
+        await schema_engine.dispose()
+
+        app = create_app(Settings(database_url=url, debug_token="t"))
+        database = app.state.database
+        async with app.router.lifespan_context(app):
+            assert database.warm_up_ms is not None
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                created = await client.post("/api/users", json={"email": "life@example.com", "name": "L"})
+                found = await client.get(f"/api/users/{created.json()['id']}")
+                startup = await client.get("/debug/startup", headers={"X-Debug-Token": "t"})
+        assert database._engine is None
+
+        assert found.status_code == 200
+        assert {"warm_up_ms", "lifespan_ms"} <= set(startup.json())
+
+    async def test_document_order_storage(self, tmp_path):
+        url = f"sqlite+aiosqlite:///{tmp_path / 'documents.db'}"
+        schema_engine = make_engine(url)
+        await create_schema(schema_engine)
+        await schema_engine.dispose()
+
+        app = create_app(Settings(database_url=url, db_pool_warm=0, order_storage="document"))
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                user = (await client.post("/api/users", json={"email": "doc@example.com", "name": "D"})).json()
+                order = (await client.post("/api/orders", json={"user_id": user["id"]})).json()
+                await client.post(f"/api/orders/{order['id']}/items",
+                                  json={"product_name": "Lamp", "price": "3.00", "quantity": 2})
+                await client.post(f"/api/orders/{order['id']}/pay")
+                found = (await client.get(f"/api/orders/{order['id']}")).json()
+                async with app.state.database.session_factory() as session:
+                    rows = await session.execute(text("SELECT COUNT(*) FROM orders"))
+                    assert rows.scalar_one() == 0
+
+        assert found["status"] == "paid" and Decimal(found["total_amount"]) == Decimal("6.00")
+        assert [h["status"] for h in found["status_history"]] == ["created", "paid"]
+
+    async def test_warm_up_failure_does_not_block_startup(self, tmp_path):
+        # No schema: priming fails, the app still starts
+        app = create_app(Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}"))
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                assert (await client.get("/health")).status_code == 200
+
+    async def test_debug_token_comes_from_settings(self):
+        app = create_app(Settings(database_url="sqlite+aiosqlite:///:memory:", debug_token="s3cret"))
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            denied = await client.get("/debug/startup")
+            allowed = await client.get("/debug/startup", headers={"X-Debug-Token": "s3cret"})
+        assert denied.status_code == 403
+        assert allowed.status_code == 200
+
+    async def test_debug_endpoints_are_hidden_without_a_token(self):
+        app = create_app(Settings(database_url="sqlite+aiosqlite:///:memory:"))
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            listing = await client.get("/debug/slow-queries", headers={"X-Debug-Token": ""})
+            reset = await client.delete("/debug/slow-queries")
+        assert listing.status_code == reset.status_code == 404
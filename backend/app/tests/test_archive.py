@@ -0,0 +1,126 @@
+"""Tests for archiving old orders and reading them back."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.repositories import OrderRepository, UserOrderStatsRepository
+from app.tools.archive import main as archive_main
+from app.tools.reconcile import reconcile
+
+OLD = datetime.now(timezone.utc) - timedelta(days=800)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite+aiosqlite:///{tmp_path / 'archive.db'}"
+
+
+@pytest.fixture
+async def app(make_app, database_url):
+    return await make_app(database_url=database_url)
+
+
+@pytest.fixture
+async def client(app, make_client):
+    return await make_client(app)
+
+
+async def place_order(client, user_id, *actions):
+    order = (await client.post("/api/orders", json={"user_id": user_id})).json()
+    await client.post(f"/api/orders/{order['id']}/items",
+                      json={"product_name": "Lamp", "price": "4.00", "quantity": 2})
+    for action in actions:
+        await client.post(f"/api/orders/{order['id']}/{action}")
+    return order["id"]
+
+
+async def backdate(app, *order_ids):
+    async with app.state.database.session_factory() as session:
+        for order_id in order_ids:
+            await session.execute(text("UPDATE orders SET created_at = :at WHERE id = :id"),
+                                  {"at": OLD, "id": order_id})
+        await session.commit()
+
+
+async def count(app, table):
+    async with app.state.database.session_factory() as session:
+        return (await session.execute(text(f"SELECT COUNT(*) FROM {table}"))).scalar_one()
+
+
+class TestArchive:
+    async def test_moves_only_old_finished_orders(self, app, client):
+        user = (await client.post("/api/users", json={"email": "arch@example.com", "name": "A"})).json()["id"]
+        done = await place_order(client, user, "pay", "ship", "complete")
+        cancelled = await place_order(client, user, "cancel")
+        paid = await place_order(client, user, "pay")
+        recent = await place_order(client, user, "cancel")
+        await backdate(app, done, cancelled, paid)
+
+        async with app.state.database.session_factory() as session:
+            repo = OrderRepository(session)
+            assert await repo.archive_batch(OLD + timedelta(days=1), limit=1) == 1
+            assert await repo.archive_batch(OLD + timedelta(days=1)) == 1
+            assert await repo.archive_batch(OLD + timedelta(days=1)) == 0
+            await session.commit()
+
+        assert await count(app, "orders_archive") == 2
+        assert await count(app, "order_items_archive") == 2
+        assert await count(app, "orders") == 2
+        async with app.state.database.session_factory() as session:
+            repo = OrderRepository(session)
+            assert await repo.find_by_id(done, include_archive=False) is None
+            assert await repo.is_archived(done)
+            assert not await repo.is_archived(paid) and not await repo.is_archived(recent)
+
+    async def test_archived_order_is_readable_but_read_only(self, app, client):
+        user = (await client.post("/api/users", json={"email": "ro@example.com", "name": "R"})).json()["id"]
+        order_id = await place_order(client, user, "pay", "ship", "complete")
+        await backdate(app, order_id)
+        async with app.state.database.session_factory() as session:
+            await OrderRepository(session).archive_batch(OLD + timedelta(days=1))
+            await session.commit()
+
+        order = (await client.get(f"/api/orders/{order_id}")).json()
+        assert order["status"] == "completed"
+        assert [item["product_name"] for item in order["items"]] == ["Lamp"]
+        history = (await client.get(f"/api/orders/{order_id}/history")).json()
+        assert [change["status"] for change in history][-1] == "completed"
+
+        response = await client.post(f"/api/orders/{order_id}/items",
+                                     json={"product_name": "Bulb", "price": "1.00", "quantity": 1})
+        assert response.status_code == 409
+        assert (await client.post(f"/api/orders/{order_id}/cancel")).status_code == 409
+        missing = "00000000-0000-0000-0000-000000000001"
+        assert (await client.post(f"/api/orders/{missing}/pay")).status_code == 404
+
+    async def test_rollups_include_archive_after_rebuild(self, app, client):
+        user = (await client.post("/api/users", json={"email": "roll@example.com", "name": "L"})).json()["id"]
+        order_id = await place_order(client, user, "pay", "ship", "complete")
+        await place_order(client, user, "pay")
+        await backdate(app, order_id)
+        async with app.state.database.session_factory() as session:
+            await reconcile(session)
+            await OrderRepository(session).archive_batch(OLD + timedelta(days=1))
+            assert await UserOrderStatsRepository(session).count_drift() == 0
+            await reconcile(session)
+            await session.commit()
+
+        summary = (await client.get(f"/api/users/{user}/summary")).json()
+        assert summary["orders"] == 2 and Decimal(summary["paid_amount"]) == Decimal("16.00")
+        assert (await client.get("/api/stats/basket")).json()["orders"] == 2
+
+    async def test_cli_archives_in_batches(self, app, client, database_url, capsys):
+        user = (await client.post("/api/users", json={"email": "cli@example.com", "name": "C"})).json()["id"]
+        orders = [await place_order(client, user, "cancel") for _ in range(3)]
+        await backdate(app, *orders)
+        await app.state.database.dispose()
+
+        loop = asyncio.get_running_loop()
+        args = ["--database-url", database_url, "--retention-days", "30", "--batch-size", "2"]
+        assert await loop.run_in_executor(None, archive_main, args) == 0
+        assert "archived 3 orders in 2 batches" in capsys.readouterr().out
+        assert await count(app, "orders_archive") == 3
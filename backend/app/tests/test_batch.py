@@ -0,0 +1,90 @@
+"""Tests for POST /api/batch."""
+
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client()
+
+
+async def register(client, email):
+    return (await client.post("/api/users", json={"email": email})).json()["id"]
+
+
+def checkout(user_id, items=20):
+    return [
+        {"op": "create_order", "user_id": user_id, "ref": "cart"},
+        *({"op": "add_item", "order_id": "$cart", "product_name": f"Part {n % 5}", "price": "2.50",
+           "quantity": 1, "merge": True} for n in range(items)),
+        {"op": "pay", "order_id": "$0"},
+    ]
+
+
+async def test_checkout_in_one_request(client):
+    user_id = await register(client, "batch@example.com")
+    response = await client.post("/api/batch", json={"operations": checkout(user_id)})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["op"] for r in results] == ["create_order"] + ["add_item"] * 20 + ["pay"]
+    assert results[0]["order"]["status"] == "created" and Decimal(results[0]["order"]["total_amount"]) == 0
+    assert results[20]["item"]["quantity"] == 4
+    assert results[-1]["order"]["status"] == "paid"
+    assert {r["order_id"] for r in results} == {results[0]["order_id"]}
+    # One save at the end instead of a load and a save per operation (about 250 statements)
+    assert int(response.headers["x-db-statements"]) <= 20
+
+    order = (await client.get(f"/api/orders/{results[0]['order_id']}")).json()
+    assert len(order["items"]) == 5 and Decimal(order["total_amount"]) == Decimal("50")
+    assert [h["status"] for h in order["status_history"]] == ["created", "paid"]
+
+
+async def test_counters_match_separate_requests(client):
+    one_by_one = await register(client, "single@example.com")
+    order_id = (await client.post("/api/orders", json={"user_id": one_by_one})).json()["id"]
+    for n in range(3):
+        await client.post(f"/api/orders/{order_id}/items",
+                          json={"product_name": f"Part {n}", "price": "2.50", "quantity": 1})
+    await client.post(f"/api/orders/{order_id}/pay")
+
+    batched = await register(client, "batched@example.com")
+    assert (await client.post("/api/batch", json={"operations": checkout(batched, items=3)})).status_code == 200
+    # An existing order, continued in a second batch
+    again = (await client.post("/api/orders", json={"user_id": batched})).json()["id"]
+    await client.post(f"/api/orders/{again}/items", json={"product_name": "X", "price": "1.00", "quantity": 1})
+    assert (await client.post("/api/batch", json={"operations": [
+        {"op": "add_item", "order_id": again, "product_name": "Y", "price": "1.00", "quantity": 2},
+        {"op": "cancel", "order_id": again},
+    ]})).status_code == 200
+
+    single = (await client.get(f"/api/users/{one_by_one}/summary")).json()
+    summary = (await client.get(f"/api/users/{batched}/summary")).json()
+    assert Decimal(summary["paid_amount"]) == Decimal(single["paid_amount"]) == Decimal("7.50")
+    assert (summary["orders"], summary["paid_orders"], summary["cancelled_orders"]) == (2, 1, 1)
+    statuses = {row["status"]: row for row in (await client.get("/api/stats/statuses")).json()}
+    assert statuses["paid"]["orders"] == 2 and Decimal(statuses["paid"]["amount"]) == Decimal("15")
+    assert statuses["cancelled"]["orders"] == 1 and Decimal(statuses["cancelled"]["amount"]) == Decimal("3")
+    assert "created" not in statuses or statuses["created"]["orders"] == 0
+
+
+async def test_all_or_nothing(client):
+    user_id = await register(client, "atomic@example.com")
+    operations = checkout(user_id, items=2) + [{"op": "pay", "order_id": "$cart"}]
+    response = await client.post("/api/batch", json={"operations": operations})
+    assert response.status_code == 409
+    assert response.json()["detail"].startswith("Operation 4:")
+    assert (await client.get("/api/orders", params={"user_id": user_id})).json() == []
+
+
+@pytest.mark.parametrize("operation, detail", [
+    ({"op": "pay"}, "pay needs order_id"),
+    ({"op": "pay", "order_id": "$later"}, "unknown reference $later"),
+    ({"op": "pay", "order_id": "$0"}, "unknown reference $0"),
+    ({"op": "pay", "order_id": "nope"}, "invalid order id nope"),
+])
+async def test_invalid_operations(client, operation, detail):
+    response = await client.post("/api/batch", json={"operations": [operation]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Operation 0: {detail}"
@@ -0,0 +1,65 @@
+"""Tests for the change feed (GET /api/changes)."""
+
+from decimal import Decimal
+
+import pytest
+
+from app.application.change_feed_service import decode_cursor
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client()
+
+
+async def create_paid_order(client, email):
+    user = (await client.post("/api/users", json={"email": email, "name": "Feed"})).json()
+    order = (await client.post("/api/orders", json={"user_id": user["id"]})).json()
+    await client.post(f"/api/orders/{order['id']}/items",
+                      json={"product_name": "Widget", "price": "2.50", "quantity": 2})
+    await client.post(f"/api/orders/{order['id']}/pay")
+    return user, order
+
+
+class TestChangeFeed:
+    async def test_changes_in_write_order(self, client):
+        user, order = await create_paid_order(client, "feed@example.com")
+
+        feed = (await client.get("/api/changes")).json()
+        changes = feed["changes"]
+        assert [(c["entity"], c["id"]) for c in changes] == [("user", user["id"])] + [("order", order["id"])] * 3
+        assert changes[-1]["data"]["status"] == "paid"
+        assert Decimal(changes[-1]["data"]["total_amount"]) == Decimal("5.00")
+        assert feed["next_cursor"] == changes[-1]["cursor"]
+        assert feed["has_more"] is False
+
+    async def test_resume_returns_only_new_changes(self, client):
+        await create_paid_order(client, "first@example.com")
+        cursor = (await client.get("/api/changes")).json()["next_cursor"]
+
+        user, _ = await create_paid_order(client, "second@example.com")
+        feed = (await client.get("/api/changes", params={"since": cursor})).json()
+        assert feed["changes"][0]["id"] == user["id"]
+        assert len(feed["changes"]) == 4
+
+        empty = (await client.get("/api/changes", params={"since": feed["next_cursor"]})).json()
+        assert empty["changes"] == [] and empty["next_cursor"] == feed["next_cursor"]
+
+    async def test_pages(self, client):
+        await create_paid_order(client, "pages@example.com")
+        first = (await client.get("/api/changes", params={"limit": 3})).json()
+        assert len(first["changes"]) == 3 and first["has_more"] is True
+        rest = (await client.get("/api/changes", params={"since": first["next_cursor"], "limit": 3})).json()
+        assert len(rest["changes"]) == 1 and rest["has_more"] is False
+
+    async def test_invalid_cursor(self, client):
+        response = await client.get("/api/changes", params={"since": "garbage"})
+        assert response.status_code == 400
+
+
+def test_decode_cursor():
+    assert decode_cursor(None) == (0, 0)
+    assert decode_cursor("12-34") == (12, 34)
+    for bad in ("12", "a-b", "-1-2", "1-2-3"):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
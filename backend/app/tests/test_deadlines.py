@@ -0,0 +1,75 @@
+"""Tests for per-request deadlines and their 504 responses."""
+
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.api.deadlines import DEADLINE_HEADER, endpoint_class
+from app.infrastructure.db import get_db
+
+
+class QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+def test_endpoint_classes():
+    assert endpoint_class("POST", "/api/orders/abc/pay") == "critical"
+    assert endpoint_class("POST", "/api/orders") == "write"
+    assert endpoint_class("GET", "/api/orders/abc") == "read"
+    assert endpoint_class("GET", "/api/orders") == "bulk"
+    assert endpoint_class("GET", "/api/stats/revenue") == "bulk"
+    assert endpoint_class("GET", "/api/orders/stream") is None
+
+
+@pytest.fixture
+async def app(make_app):
+    return await make_app(deadline_read_ms=100)
+
+
+@pytest.fixture
+async def client(app, make_client):
+    return await make_client(app)
+
+
+def slow_db(app, delay):
+    real = app.state.database
+
+    async def db():
+        await asyncio.sleep(delay)
+        async with real.session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = db
+
+
+async def test_slow_request_gets_504_with_timing(app, client):
+    assert (await client.get("/api/users/00000000-0000-0000-0000-000000000001")).status_code == 404
+    slow_db(app, 0.3)
+    response = await client.get("/api/users/00000000-0000-0000-0000-000000000001")
+    assert response.status_code == 504
+    timing = response.json()["timing"]
+    assert timing["budget_ms"] == 100 and timing["elapsed_ms"] >= 100
+    assert timing["route"] == "GET /api/users/{user_id}"
+    assert timing["db_ms"] + timing["other_ms"] == pytest.approx(timing["elapsed_ms"], abs=0.01)
+    # The bulk budget (10 s) still fits
+    assert (await client.get("/api/users")).status_code == 200
+
+
+async def test_caller_deadline_shortens_the_budget(app, client):
+    slow_db(app, 0.1)
+    assert (await client.post("/api/users", json={"email": "slow@example.com"})).status_code == 201
+    response = await client.post("/api/users", json={"email": "late@example.com"}, headers={DEADLINE_HEADER: "20"})
+    assert response.status_code == 504
+    assert response.json()["timing"]["budget_ms"] == 20
+
+
+async def test_cancelled_query_maps_to_504(app, client):
+    async def db():
+        raise DBAPIError("SELECT pg_sleep(60)", {}, QueryCanceled("canceling statement due to statement timeout"))
+        yield
+
+    app.dependency_overrides[get_db] = db
+    response = await client.get("/api/orders")
+    assert response.status_code == 504
+    assert response.json()["timing"]["route"] == "GET /api/orders"
@@ -0,0 +1,110 @@
+"""Tests for order change events and their SSE encoding."""
+
+import json
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.sse import order_event_stream
+from app.application.order_service import OrderService
+from app.domain.user import User
+from app.infrastructure.db import make_engine
+from app.infrastructure.events import EventBroker, SessionEventPublisher, Subscription
+from app.infrastructure.repositories import OrderRepository, UserRepository
+from app.infrastructure.schema import create_schema
+from app.main import create_app
+from app.settings import Settings
+
+
+@pytest.fixture
+async def session_factory():
+    engine = make_engine("sqlite+aiosqlite:///:memory:")
+    await create_schema(engine)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+def drain(subscription: Subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+class TestBroker:
+    async def test_delivered_only_after_commit(self, session_factory):
+        broker = EventBroker()
+        with broker.subscribe() as subscription:
+            async with session_factory() as session:
+                await broker.publish(session, {"n": 1})
+                assert drain(subscription) == []
+                await session.commit()
+            assert drain(subscription) == [{"n": 1}]
+
+    async def test_rollback_drops_events(self, session_factory):
+        broker = EventBroker()
+        with broker.subscribe() as subscription:
+            async with session_factory() as session:
+                await broker.publish(session, {"n": 1})
+                await session.rollback()
+                await session.commit()
+            assert drain(subscription) == []
+
+    def test_slow_subscriber_overflows(self):
+        subscription = Subscription(maxsize=2)
+        for n in range(3):
+            subscription.put({"n": n})
+        assert subscription.overflowed
+        assert drain(subscription) == []
+
+    def test_unsubscribes_on_exit(self):
+        broker = EventBroker()
+        with broker.subscribe():
+            assert broker.subscribers == 1
+        assert broker.subscribers == 0
+
+
+class TestOrderServiceEvents:
+    async def test_lifecycle_events(self, session_factory):
+        broker = EventBroker()
+        with broker.subscribe() as subscription:
+            async with session_factory() as session:
+                user = User(email="events@example.com", name="E")
+                await UserRepository(session).save(user)
+                service = OrderService(OrderRepository(session), UserRepository(session),
+                                       SessionEventPublisher(session, broker))
+                order = await service.create_order(user.id)
+                item = await service.add_item(order.id, "Widget", Decimal("2.50"), 2)
+                await service.pay_order(order.id)
+                await session.commit()
+            events = drain(subscription)
+
+        assert [e["type"] for e in events] == ["order_created", "item_added", "status_changed"]
+        assert {e["order_id"] for e in events} == {str(order.id)}
+        assert events[1]["item"]["id"] == str(item.id)
+        assert Decimal(events[1]["total_amount"]) == Decimal("5.00")
+        assert events[2]["status"] == "paid"
+
+
+class TestStream:
+    async def test_encodes_events_resync_and_keepalive(self):
+        subscription = Subscription()
+        stream = order_event_stream(subscription, keepalive=0.01)
+        assert (await stream.__anext__()).startswith("retry:")
+
+        subscription.put({"type": "status_changed", "order_id": "o1"})
+        chunk = await stream.__anext__()
+        assert chunk.startswith("event: order\ndata: ")
+        assert json.loads(chunk.split("data: ", 1)[1]) == {"type": "status_changed", "order_id": "o1"}
+
+        assert await stream.__anext__() == ": keep-alive\n\n"
+
+        subscription.overflowed = True
+        assert (await stream.__anext__()).startswith("event: resync")
+        await stream.aclose()
+
+    def test_route_is_registered_before_order_detail(self):
+        app = create_app(Settings(database_url="sqlite+aiosqlite:///:memory:"))
+        paths = [route.path for route in app.routes]
+        assert paths.index("/api/orders/stream") < paths.index("/api/orders/{order_id}")
@@ -0,0 +1,72 @@
+"""Tests for ?include=user on order endpoints and the batching UserLoader."""
+
+import asyncio
+
+import pytest
+
+from app.application.user_loader import UserLoader
+from app.domain.user import User
+from app.infrastructure.memory_repositories import InMemoryUserRepository
+
+
+async def test_loader_batches_concurrent_loads(memory_store):
+    repo = InMemoryUserRepository(memory_store)
+    alice, bob = User(email="alice@example.com"), User(email="bob@example.com")
+    for user in (alice, bob):
+        await repo.save(user)
+    missing = User(email="missing@example.com").id
+
+    loader = UserLoader(repo)
+    found = await loader.load_many([alice.id, bob.id, alice.id, missing])
+    assert [u and u.email for u in found] == ["alice@example.com", "bob@example.com", "alice@example.com", None]
+    first, second = await asyncio.gather(loader.load(bob.id), loader.load(alice.id))
+    assert (first.id, second.id) == (bob.id, alice.id)
+    assert loader.batches == 1
+
+
+async def test_loader_failure_reaches_waiters_and_its_task():
+    class BrokenRepository:
+        async def find_by_ids(self, user_ids):
+            raise RuntimeError("boom")
+
+    loader = UserLoader(BrokenRepository())
+    user = User(email="x@example.com")
+    with pytest.raises(RuntimeError, match="boom"):
+        await loader.load(user.id)
+    with pytest.raises(RuntimeError, match="boom"):
+        await loader._task
+    # The failed id is not cached: a later load retries
+    assert user.id not in loader._cache
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client()
+
+
+async def test_orders_embed_their_users(client):
+    users = [(await client.post("/api/users", json={"email": f"u{n}@example.com", "name": f"User {n}"})).json()
+             for n in range(3)]
+    for n in range(6):
+        await client.post("/api/orders", json={"user_id": users[n % 3]["id"]})
+
+    plain = await client.get("/api/orders")
+    assert all(o["user"] is None for o in plain.json())
+    response = await client.get("/api/orders", params={"include": "user"})
+    assert response.status_code == 200
+    for order in response.json():
+        assert order["user"]["id"] == order["user_id"]
+        assert order["user"]["email"] == next(u["email"] for u in users if u["id"] == order["user_id"])
+    # Three distinct users, one extra query
+    assert int(response.headers["x-db-statements"]) == int(plain.headers["x-db-statements"]) + 1
+
+    order_id = response.json()[0]["id"]
+    for params in ({"include": "user"}, {"include": "user", "items_limit": 5}):
+        detail = (await client.get(f"/api/orders/{order_id}", params=params)).json()
+        assert detail["user"]["name"] == next(u["name"] for u in users if u["id"] == detail["user_id"])
+
+
+async def test_unknown_include_is_rejected(client):
+    response = await client.get("/api/orders", params={"include": "user,payments"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown include: payments"
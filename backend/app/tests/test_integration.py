@@ -7,17 +7,32 @@ They require a running database.
 To run: pytest app/tests/test_integration.py -v
 """
 
+import os
+
 import pytest
 from httpx import AsyncClient, ASGITransport
 
-from app.main import app
+from app.main import create_app
+from app.settings import Settings
+
+
+@pytest.fixture
+async def app(make_app):
+    """The API over DATABASE_URL when set (CI applies the migrations), else over a SQLite file."""
+    database_url = os.environ.get("DATABASE_URL")
+    if database_url is None:
+        yield await make_app()
+        return
+    app = create_app(Settings(database_url=database_url))
+    async with app.router.lifespan_context(app):
+        yield app
 
 
 class TestHealthEndpoint:
     """Test that the app starts correctly."""
 
     @pytest.mark.asyncio
-    async def test_health_endpoint(self):
+    async def test_health_endpoint(self, app):
         """GET /health should return ok."""
         async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -32,7 +47,7 @@ class TestAPIEndpointsExist:
     """Test that all required endpoints exist."""
 
     @pytest.mark.asyncio
-    async def test_users_endpoint_exists(self):
+    async def test_users_endpoint_exists(self, app):
         """POST /api/users should exist."""
         async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -47,7 +62,7 @@ class TestAPIEndpointsExist:
             assert response.status_code != 404
 
     @pytest.mark.asyncio
-    async def test_orders_endpoint_exists(self):
+    async def test_orders_endpoint_exists(self, app):
         """POST /api/orders should exist."""
         async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -68,7 +83,7 @@ class TestAPIEndpointsExist:
             assert response.status_code != 404
 
     @pytest.mark.asyncio
-    async def test_pay_endpoint_exists(self):
+    async def test_pay_endpoint_exists(self, app):
         """POST /api/orders/{id}/pay should exist."""
         async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -93,7 +108,7 @@ class TestAPIEndpointsExist:
             assert response.status_code != 404
 
     @pytest.mark.asyncio
-    async def test_cancel_endpoint_exists(self):
+    async def test_cancel_endpoint_exists(self, app):
         """POST /api/orders/{id}/cancel should exist."""
         async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -0,0 +1,45 @@
+"""Tests for the load-test driver, run in-process against SQLite."""
+
+import pytest
+
+from app.tools.loadtest import LoadSpec, format_report, percentile, run_load
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client(raise_app_exceptions=False)
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+async def test_closed_loop_reports_every_endpoint(client):
+    report = await run_load(client, LoadSpec(concurrency=4, scenarios=30, miss_share=0.5, seed=3))
+
+    assert sum(report["scenarios"].values()) == 30
+    endpoints = report["endpoints"]
+    assert {"POST /api/users", "POST /api/orders", "POST /api/orders/{order_id}/pay"} <= set(endpoints)
+    assert endpoints["POST /api/orders/{order_id}/pay"]["statements_per_op"] > 0
+    assert report["operations"] == sum(row["count"] for row in endpoints.values())
+    assert "404 GET /api/orders/{order_id}" in report["errors"]
+    assert "operations in" in format_report(report)
+
+
+async def test_hot_orders_produce_double_pay_conflicts(client):
+    spec = LoadSpec(concurrency=8, scenarios=40, mix={"hot": 1}, hot_orders=1, seed=5)
+    report = await run_load(client, spec)
+
+    statuses = report["endpoints"]["POST /api/orders/{order_id}/pay"]["statuses"]
+    assert statuses.get("409", 0) > 0
+    assert report["failed_scenarios"] == {}
+
+
+async def test_open_loop_arrivals(client):
+    report = await run_load(client, LoadSpec(rate=200, concurrency=4, scenarios=10, mix={"journey": 1}))
+
+    assert report["scenarios"] == {"journey": 10}
+    assert report["endpoints"]["POST /api/orders/{order_id}/complete"]["count"] >= 8
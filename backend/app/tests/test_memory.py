@@ -0,0 +1,105 @@
+"""Tests for the in-memory repositories and the services running on them."""
+
+from decimal import Decimal
+
+import pytest
+
+from app.domain.exceptions import EmailAlreadyExistsError, OrderAlreadyPaidError, UserNotFoundError
+from app.domain.order import Order, OrderStatus
+from app.domain.user import User
+from app.infrastructure.memory_repositories import InMemoryOrderRepository, InMemoryUserRepository
+
+
+class TestInMemoryRepositories:
+    async def test_indexes_follow_saves(self, memory_store):
+        users, orders = InMemoryUserRepository(memory_store), InMemoryOrderRepository(memory_store)
+        alice, bob = User(email="alice@example.com"), User(email="bob@example.com")
+        for user in (alice, bob):
+            await users.save(user)
+        placed = [Order(user_id=alice.id), Order(user_id=alice.id), Order(user_id=bob.id)]
+        for order in placed:
+            await orders.save(order)
+        await orders.save(placed[0])
+
+        assert (await users.find_by_email("bob@example.com")).id == bob.id
+        assert [o.id for o in await orders.find_by_user(alice.id)] == [placed[0].id, placed[1].id]
+        assert await orders.find_by_user(User(email="nobody@example.com").id) == []
+
+        alice.email = "alice@example.org"
+        await users.save(alice)
+        assert await users.find_by_email("alice@example.com") is None
+        assert (await users.find_by_email("alice@example.org")).id == alice.id
+
+    async def test_reads_are_copies(self, memory_store):
+        users, orders = InMemoryUserRepository(memory_store), InMemoryOrderRepository(memory_store)
+        user = User(email="copy@example.com")
+        await users.save(user)
+        order = Order(user_id=user.id)
+        await orders.save(order)
+
+        order.add_item("Unsaved", Decimal("1.00"), 1)
+        loaded = await orders.find_by_id(order.id)
+        assert loaded.items == []
+        loaded.pay()
+        assert (await orders.find_by_id(order.id)).status == OrderStatus.CREATED
+
+    async def test_enforces_schema_constraints(self, memory_store):
+        users, orders = InMemoryUserRepository(memory_store), InMemoryOrderRepository(memory_store)
+        user = User(email="taken@example.com")
+        await users.save(user)
+        with pytest.raises(EmailAlreadyExistsError):
+            await users.save(User(email="taken@example.com"))
+        with pytest.raises(UserNotFoundError):
+            await orders.save(Order(user_id=User(email="ghost@example.com").id))
+
+        order = Order(user_id=user.id)
+        order.add_item("Widget", Decimal("2.00"), 1)
+        order.total_amount = Decimal("1.00")
+        with pytest.raises(ValueError):
+            await orders.save(order)
+
+        order = Order(user_id=user.id)
+        order.pay()
+        order.status = OrderStatus.CREATED
+        order.pay()
+        with pytest.raises(OrderAlreadyPaidError):
+            await orders.save(order)
+
+
+class TestServicesInMemory:
+    async def test_order_lifecycle(self, user_service, order_service):
+        user = await user_service.register("life@example.com", "L")
+        order = await order_service.create_order(user.id)
+        await order_service.add_item(order.id, "Keyboard", Decimal("49.90"), 2)
+        await order_service.pay_order(order.id)
+        await order_service.ship_order(order.id)
+        await order_service.complete_order(order.id)
+
+        history = await order_service.get_order_history(order.id)
+        assert [h.status for h in history] == [OrderStatus.CREATED, OrderStatus.PAID,
+                                               OrderStatus.SHIPPED, OrderStatus.COMPLETED]
+        assert (await order_service.get_order(order.id)).total_amount == Decimal("99.80")
+        [found] = await order_service.search_orders("keyb", user.id)
+        assert found.matched_products == ["Keyboard"]
+        with pytest.raises(EmailAlreadyExistsError):
+            await user_service.register("life@example.com")
+
+    async def test_merge_adds_to_existing_line(self, user_service, order_service):
+        user = await user_service.register("merge@example.com")
+        order = await order_service.create_order(user.id)
+        first, first_merged = await order_service.add_or_merge_item(order.id, "Pen", Decimal("1.20"), 1, merge=True)
+        merged, was_merged = await order_service.add_or_merge_item(order.id, "Pen", Decimal("1.20"), 2, merge=True)
+        await order_service.add_item(order.id, "Pen", Decimal("1.20"), 1)
+
+        assert (first_merged, was_merged) == (False, True)
+        assert merged.id == first.id and merged.quantity == 3
+        found = await order_service.get_order(order.id)
+        assert [i.quantity for i in found.items] == [3, 1]
+        assert found.total_amount == Decimal("4.80")
+
+    async def test_cannot_pay_twice(self, user_service, order_service):
+        user = await user_service.register("twice@example.com")
+        order = await order_service.create_order(user.id)
+        await order_service.pay_order(order.id)
+        with pytest.raises(OrderAlreadyPaidError):
+            await order_service.pay_order(order.id)
@@ -0,0 +1,106 @@
+"""Tests for paged order items and status history."""
+
+import pytest
+from sqlalchemy import text
+
+from app.api.routes import NEXT_CURSOR_HEADER
+from app.application.pagination import decode_history_cursor, decode_item_cursor, encode_item_cursor
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client()
+
+
+@pytest.fixture
+async def order_id(client):
+    return await make_order(client)
+
+
+async def make_order(client):
+    user = (await client.post("/api/users", json={"email": "pages@example.com", "name": "P"})).json()["id"]
+    order = (await client.post("/api/orders", json={"user_id": user})).json()["id"]
+    for n in range(7):
+        await client.post(f"/api/orders/{order}/items",
+                          json={"product_name": f"Part {n}", "price": "1.00", "quantity": 1})
+    for action in ("pay", "ship", "complete"):
+        await client.post(f"/api/orders/{order}/{action}")
+    return order
+
+
+async def collect(client, url, limit):
+    entries, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        entries += response.json()
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return entries, pages
+
+
+class TestCursors:
+    def test_round_trip_and_rejects_garbage(self):
+        import uuid
+
+        item_id = uuid.uuid4()
+        assert decode_item_cursor(encode_item_cursor(3, item_id)) == (3, item_id)
+        assert decode_item_cursor(None) is None
+        for bad in ("nope", encode_item_cursor(3, item_id) + "x", "W10", encode_item_cursor("3", item_id)):
+            with pytest.raises(ValueError):
+                decode_item_cursor(bad)
+        with pytest.raises(ValueError):
+            decode_history_cursor(encode_item_cursor(3, item_id))
+
+
+class TestPagedReads:
+    async def test_items_pages_cover_order_once(self, client, order_id):
+        full = (await client.get(f"/api/orders/{order_id}")).json()
+        items, pages = await collect(client, f"/api/orders/{order_id}/items", limit=3)
+        assert pages == 3
+        assert sorted(i["id"] for i in items) == sorted(i["id"] for i in full["items"])
+        # In the order the lines were added, not by their random ids
+        assert [i["product_name"] for i in items] == [f"Part {n}" for n in range(7)]
+        assert [i["id"] for i in items] == [i["id"] for i in full["items"]]
+
+    async def test_items_page_survives_a_deleted_cursor_item(self, make_app, make_client):
+        app = await make_app()
+        client = await make_client(app)
+        order_id = await make_order(client)
+        first = await client.get(f"/api/orders/{order_id}/items", params={"limit": 3})
+        async with app.state.database.session_factory() as session:
+            await session.execute(text("DELETE FROM order_items WHERE id = :id"), {"id": first.json()[-1]["id"]})
+            await session.commit()
+        rest = await client.get(f"/api/orders/{order_id}/items",
+                                params={"cursor": first.headers[NEXT_CURSOR_HEADER]})
+        assert [i["product_name"] for i in rest.json()] == [f"Part {n}" for n in range(3, 7)]
+
+    async def test_history_pages_in_order(self, client, order_id):
+        history, pages = await collect(client, f"/api/orders/{order_id}/history", limit=2)
+        assert pages == 2
+        assert [h["status"] for h in history] == ["created", "paid", "shipped", "completed"]
+
+        unpaged = await client.get(f"/api/orders/{order_id}/history")
+        assert [h["status"] for h in unpaged.json()] == ["created", "paid", "shipped", "completed"]
+        assert NEXT_CURSOR_HEADER not in unpaged.headers
+
+    async def test_detail_with_first_page_and_counts(self, client, order_id):
+        detail = (await client.get(f"/api/orders/{order_id}", params={"items_limit": 5})).json()
+        assert [i["product_name"] for i in detail["items"]] == [f"Part {n}" for n in range(5)]
+        assert detail["items_count"] == 7 and detail["history_count"] == 4
+        assert len(detail["status_history"]) == 4
+        rest = await client.get(f"/api/orders/{order_id}/items", params={"cursor": detail["items_next_cursor"]})
+        assert [i["product_name"] for i in rest.json()] == ["Part 5", "Part 6"]
+
+        full = (await client.get(f"/api/orders/{order_id}")).json()
+        assert len(full["items"]) == 7 and full["items_count"] is None
+
+    async def test_errors(self, client, order_id):
+        missing = "00000000-0000-0000-0000-000000000001"
+        assert (await client.get(f"/api/orders/{missing}/items")).status_code == 404
+        assert (await client.get(f"/api/orders/{missing}/history")).status_code == 404
+        assert (await client.get(f"/api/orders/{missing}", params={"items_limit": 5})).status_code == 404
+        response = await client.get(f"/api/orders/{order_id}/items", params={"cursor": "garbage"})
+        assert response.status_code == 400
@@ -0,0 +1,96 @@
+"""Tests for the on-demand request profiler."""
+
+import asyncio
+from datetime import datetime
+
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.api.profiling import Profile, ProfileStore, ProfilingMiddleware, Sampler
+
+
+def _profiled_app(store: ProfileStore, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow/{n}")
+    async def slow_endpoint(n: int):
+        await asyncio.sleep(0.05)
+        return {"total": sum(i * i for i in range(n))}
+
+    app.add_middleware(ProfilingMiddleware, store=store, interval_ms=1, **options)
+    return app
+
+
+class TestProfilingMiddleware:
+    async def test_requests_without_token_are_not_profiled(self):
+        store = ProfileStore()
+        app = _profiled_app(store, token="secret")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/slow/10", headers={"X-Profile-Token": "wrong"})
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert store.list() == []
+
+    async def test_token_captures_await_and_cpu_time(self):
+        store = ProfileStore()
+        app = _profiled_app(store, token="secret")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/slow/200000", headers={"X-Profile-Token": "secret"})
+
+        [profile] = store.list()
+        assert response.headers["x-profile-id"] == profile.id
+        assert profile.route == "/slow/{n}"
+        assert profile.status_code == 200
+        stacks = [";".join(s) for s in profile.samples]
+        assert any("slow_endpoint" in s and "[await" in s for s in stacks)
+        assert any("slow_endpoint" in s and "<genexpr>" in s for s in stacks)
+
+    async def test_sample_rate_profiles_everything_at_one(self):
+        store = ProfileStore(size=2)
+        app = _profiled_app(store, sample_rate=1.0)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for _ in range(3):
+                await client.get("/slow/10")
+        assert len(store.list()) == 2
+
+    async def test_stopped_profile_is_not_sampled(self):
+        sampler = Sampler(interval_ms=1)
+        profile = Profile(id="x", method="GET", path="/", route="/", started_at=datetime.now(), interval_ms=1)
+        active = sampler.start(profile, asyncio.current_task())
+        await asyncio.sleep(0.02)
+        samples = len(sampler.stop(active).samples)
+        await asyncio.sleep(0.02)
+        assert samples > 0
+        assert len(profile.samples) == len(profile.weights) == samples
+
+
+class TestProfileExport:
+    def _profile(self) -> Profile:
+        profile = Profile(id="abc", method="GET", path="/x", route="/x", started_at=datetime.now(), interval_ms=1)
+        profile.samples = [("a", "b"), ("a", "b"), ("a", "c")]
+        profile.weights = [1.0, 2.0, 0.5]
+        return profile
+
+    def test_collapsed_stacks(self):
+        assert self._profile().collapsed() == "a;b 3000\na;c 500\n"
+
+    def test_speedscope(self):
+        document = self._profile().speedscope()
+        [sampled] = document["profiles"]
+        assert [f["name"] for f in document["shared"]["frames"]] == ["a", "b", "c"]
+        assert sampled["samples"] == [[0, 1], [0, 1], [0, 2]]
+        assert sampled["endValue"] == 3.5
+
+    async def test_debug_endpoint_serves_profiles(self, make_app, make_client):
+        app = await make_app(debug_token="t", profile_buffer_size=5)
+        app.state.profile_store.add(self._profile())
+        client = await make_client(app, headers={"X-Debug-Token": "t"})
+        listing = await client.get("/debug/profiles")
+        collapsed = await client.get("/debug/profiles/abc", params={"format": "collapsed"})
+        missing = await client.get("/debug/profiles/nope")
+        anonymous = await client.get("/debug/profiles/abc", headers={"X-Debug-Token": ""})
+
+        assert listing.json()[0]["id"] == "abc"
+        assert collapsed.text == "a;b 3000\na;c 500\n"
+        assert missing.status_code == 404
+        assert anonymous.status_code == 403
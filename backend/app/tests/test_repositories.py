@@ -0,0 +1,210 @@
+"""Repository round trips against the SQLite mirror of the schema."""
+
+import pytest
+from decimal import Decimal
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.domain.order import Order, OrderStatus
+from app.domain.user import User
+from app.infrastructure.db import make_engine
+from app.infrastructure.repositories import (
+    DocumentOrderRepository,
+    OrderRepository,
+    ProductRepository,
+    UserRepository,
+    order_repository_class,
+)
+from app.infrastructure.schema import create_schema
+
+
+@pytest.fixture
+async def session():
+    engine = make_engine("sqlite+aiosqlite:///:memory:")
+    await create_schema(engine)
+    factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with factory() as session:
+        yield session
+    await engine.dispose()
+
+
+class TestSQLiteRepositories:
+    async def test_user_round_trip(self, session):
+        user = User(email="repo@example.com", name="Repo")
+        await UserRepository(session).save(user)
+
+        found = await UserRepository(session).find_by_email("repo@example.com")
+        assert found == user
+
+    async def test_order_round_trip_keeps_types(self, session):
+        user = User(email="orders@example.com")
+        await UserRepository(session).save(user)
+        order = Order(user_id=user.id)
+        order.add_item("Widget", Decimal("19.99"), 2)
+        order.pay()
+        await OrderRepository(session).save(order)
+
+        found = await OrderRepository(session).find_by_id(order.id)
+        assert found.id == order.id
+        assert found.user_id == user.id
+        assert found.status == OrderStatus.PAID
+        assert found.total_amount == Decimal("39.98")
+        assert [(i.product_name, i.price, i.quantity) for i in found.items] == [("Widget", Decimal("19.99"), 2)]
+        assert [h.status for h in found.status_history] == [OrderStatus.CREATED, OrderStatus.PAID]
+        assert [o.id for o in await OrderRepository(session).find_by_user(user.id)] == [order.id]
+
+    async def test_merged_item_is_updated_in_place(self, session):
+        user = User(email="merge@example.com")
+        await UserRepository(session).save(user)
+        order = Order(user_id=user.id)
+        line = order.add_item("Widget", Decimal("2.50"), 1)
+        repo = OrderRepository(session)
+        await repo.save(order)
+
+        assert order.add_item("Widget", Decimal("2.50"), 3, merge=True) is line
+        order.add_item("Widget", Decimal("3.00"), 1, merge=True)
+        await repo.save(order)
+
+        rows = (await session.execute(text("SELECT id, quantity FROM order_items ORDER BY price"))).fetchall()
+        assert [(r.id, r.quantity) for r in rows][0] == (line.id, 4)
+        assert len(rows) == 2
+        found = await repo.find_by_id(order.id)
+        assert found.total_amount == Decimal("13.00")
+
+
+class TestProductCatalogue:
+    async def test_names_are_interned(self, session):
+        user = User(email="catalogue@example.com")
+        await UserRepository(session).save(user)
+        for _ in range(2):
+            order = Order(user_id=user.id)
+            order.add_item("Widget", Decimal("1.00"), 1)
+            order.add_item("Gadget", Decimal("2.00"), 1)
+            await OrderRepository(session).save(order)
+
+        rows = (await session.execute(text("SELECT name FROM products ORDER BY name"))).fetchall()
+        assert [r.name for r in rows] == ["Gadget", "Widget"]
+        found = await OrderRepository(session).find_by_id(order.id)
+        assert sorted(i.product_name for i in found.items) == ["Gadget", "Widget"]
+
+    async def test_committed_ids_are_cached(self, session, captured_statements):
+        repo = ProductRepository(session)
+        ids = await repo.resolve(["Cached"])
+        await session.commit()
+
+        with captured_statements(session.bind) as statements:
+            assert await repo.resolve(["Cached", "Cached"]) == ids
+        assert statements == []
+
+    async def test_rolled_back_ids_are_not_cached(self, session):
+        repo = ProductRepository(session)
+        first = await repo.resolve(["Ephemeral"])
+        await session.rollback()
+        await session.execute(text("INSERT INTO products (name) VALUES ('Other')"))
+
+        second = await repo.resolve(["Ephemeral"])
+        assert second != first
+        row = (await session.execute(text("SELECT name FROM products WHERE id = :id"),
+                                     {"id": second["Ephemeral"]})).fetchone()
+        assert row.name == "Ephemeral"
+
+
+class TestDocumentStorage:
+    async def test_same_aggregate_as_tables(self, session):
+        user = User(email="doc@example.com")
+        await UserRepository(session).save(user)
+        order = Order(user_id=user.id)
+        order.add_item("Widget", Decimal("19.99"), 2)
+        order.add_item("Gadget", Decimal("0.50"), 1)
+        order.pay()
+        await OrderRepository(session).save(order)
+        await DocumentOrderRepository(session).save(order)
+
+        from_tables = await OrderRepository(session).find_by_id(order.id)
+        from_document = await DocumentOrderRepository(session).find_by_id(order.id)
+        for found in (from_tables, from_document):
+            assert (found.status, found.total_amount) == (OrderStatus.PAID, Decimal("40.48"))
+        assert sorted((i.id, i.product_name, i.price, i.quantity) for i in from_document.items) == \
+            sorted((i.id, i.product_name, i.price, i.quantity) for i in from_tables.items)
+        assert [(h.id, h.status) for h in from_document.status_history] == \
+            [(h.id, h.status) for h in from_tables.status_history]
+
+    async def test_single_statement_round_trip(self, session, captured_statements):
+        user = User(email="stmt@example.com")
+        await UserRepository(session).save(user)
+        repo = DocumentOrderRepository(session)
+        order = Order(user_id=user.id)
+        for n in range(20):
+            order.add_item(f"Part {n}", Decimal("1.00"), 1)
+
+        with captured_statements(session.bind) as statements:
+            await repo.save(order)
+            order.cancel()
+            await repo.save(order)
+            found = await repo.find_by_id(order.id)
+
+        assert len([s for s in statements if "order_documents" in s]) == 3
+        assert found.status == OrderStatus.CANCELLED and len(found.items) == 20
+        header = await repo.find_header(order.id)
+        assert (header.items_count, header.history_count) == (20, 2)
+        assert [o.id for o in await repo.search_by_product("part 1")] == [order.id]
+        assert [o.id for o in await repo.find_by_user(user.id)] == [order.id]
+
+    def test_storage_setting(self):
+        assert order_repository_class("document") is DocumentOrderRepository
+        with pytest.raises(ValueError):
+            order_repository_class("graph")
+
+
+class TestIdentityMap:
+    async def test_repeated_reads_share_one_instance(self, session, captured_statements):
+        users, orders = UserRepository(session), OrderRepository(session)
+        user = User(email="identity@example.com")
+        await users.save(user)
+        order = Order(user_id=user.id)
+        await orders.save(order)
+        await session.commit()
+
+        with captured_statements(session.bind) as statements:
+            found = await orders.find_by_id(order.id)
+            assert await OrderRepository(session).find_by_id(order.id) is found
+            loaded = len(statements)
+            owner = await users.find_by_id(user.id)
+            assert await users.find_by_id(user.id) is owner
+            assert await UserRepository(session).find_by_email("identity@example.com") is owner
+        assert loaded == 3 and len(statements) == 5
+
+    async def test_save_writes_only_changes(self, session, captured_statements):
+        users, orders = UserRepository(session), OrderRepository(session)
+        user = User(email="dirty@example.com")
+        await users.save(user)
+        order = Order(user_id=user.id)
+        for n in range(10):
+            order.add_item(f"Part {n}", Decimal("1.00"), 1)
+        await orders.save(order)
+
+        with captured_statements(session.bind) as statements:
+            await orders.save(order)
+            await users.save(user)
+            assert statements == []
+            order.pay()
+            await orders.save(order)
+        # Header, one history row and the change-log entry; no item rows
+        assert len(statements) == 3 and not any("order_items" in s for s in statements)
+
+    async def test_rollback_forgets_entities(self, session):
+        users = UserRepository(session)
+        user = User(email="forget@example.com")
+        await users.save(user)
+        await session.commit()
+        found = await users.find_by_id(user.id)
+        found.name = "Changed"
+        await session.rollback()
+        again = await users.find_by_id(user.id)
+        assert again is not found and again.name == ""
+
+
+class TestSharedFixtures:
+    async def test_db_session_uses_migration_schema(self, db_session):
+        columns = {row.name for row in (await db_session.execute(text("PRAGMA table_info(order_items)"))).fetchall()}
+        assert "product_id" in columns and "subtotal" not in columns
@@ -0,0 +1,67 @@
+"""Tests for product search over orders (GET /api/orders/search)."""
+
+import pytest
+
+from app.infrastructure.repositories import like_pattern
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client()
+
+
+async def create_order(client, user_id, *products):
+    order = (await client.post("/api/orders", json={"user_id": user_id})).json()
+    for product in products:
+        await client.post(f"/api/orders/{order['id']}/items",
+                          json={"product_name": product, "price": "1.00", "quantity": 1})
+    return order["id"]
+
+
+@pytest.fixture
+async def catalog(client):
+    alice = (await client.post("/api/users", json={"email": "alice@example.com", "name": "Alice"})).json()["id"]
+    bob = (await client.post("/api/users", json={"email": "bob@example.com", "name": "Bob"})).json()["id"]
+    return {
+        "alice": alice,
+        "bob": bob,
+        "keyboard": await create_order(client, alice, "Mechanical Keyboard", "Mouse"),
+        "cable": await create_order(client, alice, "USB cable"),
+        "bob_keyboard": await create_order(client, bob, "keyboard cover", "Keyboard stand"),
+    }
+
+
+class TestOrderSearch:
+    async def test_case_insensitive_substring_newest_first(self, client, catalog):
+        response = await client.get("/api/orders/search", params={"product": "KEYBOARD"})
+        assert response.status_code == 200
+        body = response.json()
+        assert [o["id"] for o in body["orders"]] == [catalog["bob_keyboard"], catalog["keyboard"]]
+        assert body["orders"][0]["matched_products"] == ["Keyboard stand", "keyboard cover"]
+        assert body["orders"][1]["matched_products"] == ["Mechanical Keyboard"]
+        assert body["has_more"] is False
+
+    async def test_filter_by_user(self, client, catalog):
+        body = (await client.get("/api/orders/search",
+                                 params={"product": "keyboard", "user_id": catalog["alice"]})).json()
+        assert [o["id"] for o in body["orders"]] == [catalog["keyboard"]]
+
+    async def test_pagination(self, client, catalog):
+        first = (await client.get("/api/orders/search", params={"product": "e", "limit": 2})).json()
+        assert len(first["orders"]) == 2 and first["has_more"] is True
+        rest = (await client.get("/api/orders/search", params={"product": "e", "limit": 2, "offset": 2})).json()
+        assert len(rest["orders"]) == 1 and rest["has_more"] is False
+        assert {o["id"] for o in first["orders"] + rest["orders"]} == {
+            catalog["keyboard"], catalog["cable"], catalog["bob_keyboard"]}
+
+    async def test_wildcards_are_literal(self, client, catalog):
+        body = (await client.get("/api/orders/search", params={"product": "%"})).json()
+        assert body["orders"] == []
+
+    async def test_blank_term_rejected(self, client):
+        assert (await client.get("/api/orders/search", params={"product": "  "})).status_code == 400
+        assert (await client.get("/api/orders/search")).status_code == 422
+
+
+def test_like_pattern_escapes():
+    assert like_pattern("50%_off\\") == "%50\\%\\_off\\\\%"
@@ -0,0 +1,69 @@
+"""Tests for the synthetic data generator."""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.domain.order import OrderStatus
+from app.infrastructure.db import make_engine
+from app.infrastructure.repositories import OrderRepository, OrderStatsRepository, UserRepository
+from app.tools.seed import CHAIN_WEIGHTS, SeedSpec, generate_orders, generate_users, main, user_id
+
+SPEC = SeedSpec(users=50, orders=2_000, seed=7, chunk_size=500)
+
+
+class TestGenerator:
+    def test_is_deterministic_per_seed(self):
+        assert generate_orders(SPEC, 1) == generate_orders(SPEC, 1)
+        assert generate_orders(SPEC, 1) != generate_orders(SeedSpec(50, 2_000, seed=8, chunk_size=500), 1)
+
+    def test_totals_equal_item_sums(self):
+        orders, items, _ = generate_orders(SPEC, 0)
+        sums = defaultdict(Decimal)
+        lines = defaultdict(list)
+        for _, order_id, _, price, quantity, line_no in items:
+            sums[order_id] += price * quantity
+            lines[order_id].append(line_no)
+        assert all(total == sums[order_id] for order_id, _, _, total, _ in orders)
+        assert all(numbers == list(range(len(numbers))) for numbers in lines.values())
+
+    def test_histories_follow_the_state_machine(self):
+        orders, _, history = generate_orders(SPEC, 0)
+        chains = defaultdict(list)
+        for _, order_id, status, changed_at in history:
+            chains[order_id].append((changed_at, status))
+        legal = {chain for chain, _ in CHAIN_WEIGHTS}
+        for order_id, _, status, _, _ in orders:
+            chain = tuple(s for _, s in sorted(chains[order_id]))
+            assert chain in legal
+            assert chain[-1] == status
+
+    def test_orders_reference_generated_users(self):
+        known = {row[0] for row in generate_users(SPEC, 0, SPEC.users)}
+        orders, _, _ = generate_orders(SPEC, 2)
+        assert {owner for _, owner, _, _, _ in orders} <= known
+        assert user_id(SPEC, 3) == user_id(SPEC, 3)
+
+
+class TestSQLiteLoad:
+    async def test_loaded_data_hydrates_through_repositories(self, tmp_path):
+        path = tmp_path / "seed.db"
+        url = f"sqlite+aiosqlite:///{path}"
+        assert main(["--database-url", url, "--users", "20", "--orders", "300",
+                     "--chunk-size", "100", "--jobs", "1", "--quiet"]) == 0
+
+        engine = make_engine(url)
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            users = await UserRepository(session).find_all()
+            orders = await OrderRepository(session).find_all()
+            buckets = await OrderStatsRepository(session).buckets()
+        await engine.dispose()
+
+        assert len(users) == 20
+        assert len(orders) == 300
+        assert sum(b.orders for b in buckets) == 300
+        for order in orders:
+            assert order.total_amount == sum((i.subtotal for i in order.items), Decimal("0"))
+            assert order.status_history[0].status == OrderStatus.CREATED
+            assert order.status_history[-1].status == order.status
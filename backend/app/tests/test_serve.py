@@ -0,0 +1,84 @@
+"""Tests for worker and pool sizing of the production entry point."""
+
+import pytest
+
+from app.serve import capped_workers, cpu_quota, default_workers, main, pool_settings, reserved_connections
+
+
+class TestCpuQuota:
+    def test_cgroup_v2_limit(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("250000 100000\n")
+        assert cpu_quota(tmp_path) == 2.5
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert cpu_quota(tmp_path) is None
+
+    def test_cgroup_v1_limit(self, tmp_path):
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("150000")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+        assert cpu_quota(tmp_path) == 1.5
+
+    def test_no_cgroup(self, tmp_path):
+        assert cpu_quota(tmp_path) is None
+
+
+class TestWorkers:
+    def test_web_concurrency_wins(self, tmp_path):
+        assert default_workers({"WEB_CONCURRENCY": "6"}, tmp_path) == 6
+
+    def test_quota_rounds_up(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("app.serve.available_cpus", lambda: 16)
+        (tmp_path / "cpu.max").write_text("150000 100000\n")
+        assert default_workers({}, tmp_path) == 2
+
+    def test_quota_never_exceeds_cpus(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("app.serve.available_cpus", lambda: 2)
+        (tmp_path / "cpu.max").write_text("800000 100000\n")
+        assert default_workers({}, tmp_path) == 2
+
+
+class TestPoolSettings:
+    def test_budget_is_split_across_workers(self):
+        assert pool_settings(40, 4, 5) == {"DB_POOL_SIZE": "10", "DB_MAX_OVERFLOW": "0", "DB_POOL_WARM": "5"}
+
+    def test_workers_are_capped_at_the_budget(self):
+        workers = capped_workers(8, 3)
+        assert workers == 3
+        assert pool_settings(3, workers, 5) == {"DB_POOL_SIZE": "1", "DB_MAX_OVERFLOW": "0", "DB_POOL_WARM": "1"}
+        assert capped_workers(4, 40) == 4
+
+    def test_budget_is_never_exceeded(self):
+        with pytest.raises(ValueError):
+            pool_settings(3, 8, 5)
+        with pytest.raises(ValueError):
+            capped_workers(2, 0)
+
+    def test_listen_connections_are_reserved(self):
+        reserved = reserved_connections("postgres")
+        assert (reserved, reserved_connections("memory")) == (1, 0)
+        assert pool_settings(40, 4, 5, reserved) == {"DB_POOL_SIZE": "9", "DB_MAX_OVERFLOW": "0", "DB_POOL_WARM": "5"}
+        assert capped_workers(8, 7, reserved) == 3
+        with pytest.raises(ValueError):
+            pool_settings(7, 4, 5, reserved)
+        with pytest.raises(ValueError):
+            capped_workers(1, 1, reserved)
+
+
+class TestMain:
+    def run(self, monkeypatch, capsys, *argv, **environ):
+        monkeypatch.setattr("os.environ", {**environ})
+        monkeypatch.setattr("uvicorn.run", lambda *args, **kwargs: None)
+        assert main(["--db-max-connections", "4", *argv]) == 0
+        return capsys.readouterr().err
+
+    def test_memory_events_with_several_workers_warn(self, monkeypatch, capsys):
+        assert "EVENTS_BACKEND=postgres" in self.run(monkeypatch, capsys, "--workers", "2")
+        assert "warning" not in self.run(monkeypatch, capsys, "--workers", "1")
+        assert "warning" not in self.run(monkeypatch, capsys, "--workers", "2", EVENTS_BACKEND="postgres")
+
+    def test_workers_beyond_the_budget_are_dropped(self, monkeypatch, capsys):
+        assert "running 2 worker(s) instead of 6" in self.run(monkeypatch, capsys, "--workers", "6",
+                                                             EVENTS_BACKEND="postgres")
+        assert "running 4 worker(s) instead of 6" in self.run(monkeypatch, capsys, "--workers", "6")
@@ -0,0 +1,134 @@
+"""Tests for routing users and orders across several SQLite databases."""
+
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.application.order_service import OrderService
+from app.application.user_service import UserService
+from app.domain.order import Order
+from app.domain.user import User
+from app.infrastructure.repositories import OrderRepository
+from app.infrastructure.sharding import (
+    ShardRouter,
+    ShardedDatabase,
+    ShardedOrderRepository,
+    ShardedUserRepository,
+)
+
+SHARDS = 3
+
+
+@pytest.fixture
+async def database(tmp_path):
+    database = ShardedDatabase([f"sqlite+aiosqlite:///{tmp_path / f'shard{n}.db'}" for n in range(SHARDS)])
+    await database.create_schema()
+    yield database
+    await database.dispose()
+
+
+@pytest.fixture
+async def sessions(database):
+    async with database.sessions() as sessions:
+        yield sessions
+
+
+@pytest.fixture
+def services(database, sessions):
+    users = ShardedUserRepository(sessions, database.router)
+    orders = ShardedOrderRepository(sessions, database.router)
+    return UserService(users), OrderService(orders, users), orders
+
+
+async def shard_counts(database, table):
+    counts = []
+    for factory in database.session_factories:
+        async with factory() as session:
+            counts.append((await session.execute(text(f"SELECT COUNT(*) FROM {table}"))).scalar_one())
+    return counts
+
+
+class TestShardRouter:
+    def test_consistent_hashing_moves_few_users(self):
+        before, after = ShardRouter(4), ShardRouter(5)
+        users = [uuid.uuid4() for _ in range(2000)]
+        placement = [before.shard_for_user(u) for u in users]
+        assert set(placement) == {0, 1, 2, 3}
+        moved = sum(before.shard_for_user(u) != after.shard_for_user(u) for u in users)
+        # Ideal is 1/5 of the users; a modulo scheme would move about 4/5
+        assert moved < len(users) * 0.35
+        assert all(after.shard_for_user(u) == 4 for u in users
+                   if before.shard_for_user(u) != after.shard_for_user(u))
+
+    def test_order_ids_carry_the_shard(self):
+        router = ShardRouter(SHARDS)
+        user_id = uuid.uuid4()
+        order_id = router.new_order_id(user_id)
+        assert order_id.version == 4
+        assert router.shard_hint(order_id) == router.shard_for_user(user_id)
+        assert router.shard_hint(uuid.UUID(int=0)) is None
+        with pytest.raises(ValueError):
+            ShardRouter(0)
+
+
+class TestShardedRepositories:
+    async def test_user_and_orders_live_on_one_shard(self, database, sessions, services):
+        user_service, order_service, _ = services
+        users = [await user_service.register(f"shard{n}@example.com") for n in range(12)]
+        for user in users:
+            order = await order_service.create_order(user.id)
+            await order_service.add_item(order.id, "Widget", Decimal("1.50"), 2)
+            await order_service.pay_order(order.id)
+        await sessions.commit()
+
+        user_counts, order_counts = await shard_counts(database, "users"), await shard_counts(database, "orders")
+        assert user_counts == order_counts and sum(order_counts) == 12
+        assert sum(1 for count in order_counts if count) > 1
+        assert (await user_service.get_by_email("shard5@example.com")).id == users[5].id
+
+    async def test_find_by_id_reads_one_shard(self, database, sessions, services, captured_statements):
+        user_service, order_service, _ = services
+        user = await user_service.register("hint@example.com")
+        order = await order_service.create_order(user.id)
+        await sessions.commit()
+
+        with captured_statements(*database.engines) as statements:
+            found = await ShardedOrderRepository(sessions, database.router).find_by_id(order.id)
+        assert found.id == order.id
+        assert len([s for s in statements if "FROM orders" in s]) == 1
+
+    async def test_order_without_hint_is_found_by_scatter(self, database, sessions):
+        user = User(email="legacy@example.com")
+        shard = database.router.shard_for_user(user.id)
+        users = ShardedUserRepository(sessions, database.router)
+        await users.save(user)
+        order = Order(user_id=user.id)
+        await OrderRepository(sessions[shard]).save(order)
+        await sessions.commit()
+
+        repo = ShardedOrderRepository(sessions, database.router)
+        assert (await repo.find_by_id(order.id)).id == order.id
+        assert [h.status for h in await repo.find_history(order.id)] == [order.status]
+        assert await repo.find_by_id(uuid.uuid4()) is None
+
+    async def test_scatter_gather_is_merged_in_order(self, database, sessions):
+        users = ShardedUserRepository(sessions, database.router)
+        orders = ShardedOrderRepository(sessions, database.router)
+        start = datetime(2026, 1, 1)
+        placed = []
+        for n in range(15):
+            user = User(email=f"merge{n}@example.com")
+            await users.save(user)
+            order = Order(user_id=user.id, id=orders.new_order_id(user.id), created_at=start + timedelta(minutes=n))
+            order.add_item(f"Thing {n}", Decimal("1.00"), 1)
+            await orders.save(order)
+            placed.append(order.id)
+        await sessions.commit()
+
+        assert [o.id for o in await orders.find_all()] == placed
+        assert [o.id async for o in orders.iter_all(batch_size=2)] == placed
+        found = await orders.search_by_product("thing", limit=4, offset=2)
+        assert [s.id for s in found] == list(reversed(placed))[2:6]
@@ -0,0 +1,75 @@
+"""Tests for the slow-query log."""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.infrastructure.db import slow_query_log
+from app.infrastructure.request_context import RequestContext, reset_request_context, set_request_context
+from app.infrastructure.slow_query_log import SlowQueryLog, normalize_sql, parameter_shape
+
+
+class TestNormalization:
+    def test_bind_markers_and_literals_collapse(self):
+        a = normalize_sql("SELECT * FROM orders WHERE user_id = $1 AND status = 'paid' LIMIT 10")
+        b = normalize_sql("SELECT *\n  FROM orders WHERE user_id = :user_id AND status = 'created' LIMIT 50")
+        assert a == b == "SELECT * FROM orders WHERE user_id = ? AND status = ? LIMIT ?"
+
+    def test_casts_are_kept(self):
+        assert normalize_sql("SELECT $1::uuid") == "SELECT ?::uuid"
+
+    def test_in_and_values_lists_collapse(self):
+        assert normalize_sql("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == "SELECT ? FROM t WHERE id IN (?, ...)"
+        assert normalize_sql("INSERT INTO t VALUES (?, ?), (?, ?), (?, ?)") == "INSERT INTO t VALUES (?, ?), ..."
+
+    def test_parameter_shape_has_no_values(self):
+        assert parameter_shape({"id": 1, "email": "a@b.c"}) == "{id: int, email: str}"
+        assert parameter_shape([(1, "x"), (2, "y")]) == "2 x (int, str)"
+
+
+class TestSlowQueryLog:
+    async def test_records_statements_over_threshold_with_route(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        log = SlowQueryLog(threshold_ms=0)
+        log.install(engine)
+        context = RequestContext(method="GET", path="/api/orders")
+        token = set_request_context(context)
+        try:
+            async with engine.connect() as conn:
+                for i in range(3):
+                    await conn.execute(text("SELECT :value"), {"value": i})
+        finally:
+            reset_request_context(token)
+            await engine.dispose()
+
+        [stats] = [s for s in log.top() if s.statement == "SELECT ?"]
+        assert stats.count == 3
+        assert stats.parameter_shape == "(int)"
+        assert stats.routes == {"GET /api/orders": 3}
+        assert context.statements == 3
+
+    async def test_fast_statements_are_ignored(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        log = SlowQueryLog(threshold_ms=10_000)
+        log.install(engine)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        await engine.dispose()
+        assert log.top() == []
+
+
+class TestSlowQueryEndpoint:
+    async def test_lists_top_fingerprints(self, make_client):
+        client = await make_client(debug_token="t", headers={"X-Debug-Token": "t"})
+        slow_query_log.reset()
+        slow_query_log.record("SELECT * FROM orders WHERE user_id = $1", ("x",), 300.0, "GET /api/orders")
+        slow_query_log.record("SELECT * FROM orders WHERE user_id = $1", ("y",), 500.0, "GET /api/orders")
+        slow_query_log.record("SELECT * FROM users", None, 250.0)
+        response = await client.get("/debug/slow-queries")
+        slow_query_log.reset()
+
+        assert response.status_code == 200
+        top = response.json()[0]
+        assert top["statement"] == "SELECT * FROM orders WHERE user_id = ?"
+        assert top["count"] == 2
+        assert top["total_ms"] == 800.0
+        assert top["max_ms"] == 500.0
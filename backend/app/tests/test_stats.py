@@ -0,0 +1,127 @@
+"""Tests for the analytics rollups and /api/stats endpoints."""
+
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.application.order_service import OrderService
+from app.domain.user import User
+from app.infrastructure.db import make_engine
+from app.infrastructure.repositories import OrderRepository, OrderStatsRepository, UserRepository
+from app.infrastructure.schema import create_schema
+
+
+@pytest.fixture
+async def client(make_client):
+    return await make_client()
+
+
+async def place_order(client, user_id, items, action=None):
+    order = (await client.post("/api/orders", json={"user_id": user_id})).json()
+    for price, quantity in items:
+        await client.post(f"/api/orders/{order['id']}/items",
+                          json={"product_name": "Thing", "price": price, "quantity": quantity})
+    if action:
+        assert (await client.post(f"/api/orders/{order['id']}/{action}")).status_code == 200
+    return order["id"]
+
+
+class TestStatsEndpoints:
+    async def test_rollups_follow_the_order_lifecycle(self, client):
+        user = (await client.post("/api/users", json={"email": "stats@example.com", "name": "S"})).json()["id"]
+        await place_order(client, user, [("10.00", 2)], "pay")
+        await place_order(client, user, [("5.50", 1), ("1.00", 3)], "pay")
+        await place_order(client, user, [("99.00", 1)], "cancel")
+        await place_order(client, user, [])
+        today = datetime.now().date().isoformat()
+
+        revenue = (await client.get("/api/stats/revenue")).json()
+        assert revenue == [{"day": today, "orders": 4, "paid_orders": 2, "revenue": "28.50"}]
+
+        statuses = {s["status"]: s for s in (await client.get("/api/stats/statuses")).json()}
+        assert statuses["paid"]["orders"] == 2 and Decimal(statuses["paid"]["amount"]) == Decimal("28.50")
+        assert statuses["cancelled"]["orders"] == 1 and Decimal(statuses["cancelled"]["amount"]) == Decimal("99.00")
+        assert statuses["created"]["orders"] == 1 and Decimal(statuses["created"]["amount"]) == 0
+        assert statuses["shipped"]["orders"] == 0
+
+        basket = (await client.get("/api/stats/basket")).json()
+        assert basket["orders"] == 2 and basket["items"] == 6
+        assert Decimal(basket["average_amount"]) == Decimal("14.25")
+        assert Decimal(basket["average_items"]) == Decimal("3.00")
+
+    async def test_period_filter(self, client):
+        user = (await client.post("/api/users", json={"email": "period@example.com", "name": "P"})).json()["id"]
+        await place_order(client, user, [("1.00", 1)], "pay")
+        tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
+        assert (await client.get("/api/stats/revenue", params={"from": tomorrow})).json() == []
+        assert (await client.get("/api/stats/basket", params={"to": tomorrow})).json()["orders"] == 1
+
+        bad = await client.get("/api/stats/revenue", params={"from": tomorrow, "to": "2000-01-01"})
+        assert bad.status_code == 400
+
+
+class TestRebuild:
+    async def test_rebuild_matches_incremental_rollups(self):
+        engine = make_engine("sqlite+aiosqlite:///:memory:")
+        await create_schema(engine)
+        factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with factory() as session:
+            user = User(email="rebuild@example.com")
+            await UserRepository(session).save(user)
+            stats = OrderStatsRepository(session)
+            service = OrderService(OrderRepository(session), UserRepository(session), stats=stats)
+            for n in range(5):
+                order = await service.create_order(user.id)
+                await service.add_item(order.id, "Widget", Decimal("3.30"), n + 1)
+                if n % 2:
+                    await service.pay_order(order.id)
+            await session.commit()
+
+            def normalised(buckets):
+                return sorted((b.day, b.status, b.orders, b.amount, b.items) for b in buckets if b.orders)
+
+            incremental = normalised(await stats.buckets())
+            await stats.rebuild()
+            assert normalised(await stats.buckets()) == incremental
+            assert {b[0] for b in incremental} == {date.today()}
+        await engine.dispose()
+
+    async def test_days_are_utc_in_both_paths(self, monkeypatch):
+        # UTC+10: an order placed at 05:00 local time belongs to the previous UTC day
+        monkeypatch.setenv("TZ", "XXX-10")
+        time.tzset()
+
+        class EarlyMorning(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(2026, 3, 1, 5, 0) if tz is None else datetime.now(tz)
+
+        monkeypatch.setattr("app.domain.order.datetime", EarlyMorning)
+        engine = make_engine("sqlite+aiosqlite:///:memory:")
+        await create_schema(engine)
+        factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        try:
+            async with factory() as session:
+                user = User(email="utc@example.com")
+                await UserRepository(session).save(user)
+                stats = OrderStatsRepository(session)
+                service = OrderService(OrderRepository(session), UserRepository(session), stats=stats)
+                order = await service.create_order(user.id)
+                await service.add_item(order.id, "Widget", Decimal("2.00"), 3)
+                # Reloaded from the database before the status move
+                await service.pay_order(order.id)
+                await session.commit()
+
+                incremental = sorted((b.day, b.status, b.orders, b.amount) for b in await stats.buckets() if b.orders)
+                await stats.rebuild()
+                rebuilt = sorted((b.day, b.status, b.orders, b.amount) for b in await stats.buckets() if b.orders)
+        finally:
+            await engine.dispose()
+            monkeypatch.undo()
+            time.tzset()
+
+        assert incremental == rebuilt
+        assert [b[0] for b in rebuilt] == [date(2026, 2, 28)]
@@ -0,0 +1,93 @@
+"""Tests for retrying order commands on serialization failures and deadlocks."""
+
+import random
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.infrastructure.repositories import OrderRepository
+from app.infrastructure.transactions import RetryPolicy, retryable_error
+
+
+class PgError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(f"SQLSTATE {sqlstate}")
+        self.sqlstate = sqlstate
+
+
+def pg_error(sqlstate):
+    return DBAPIError("UPDATE orders ...", {}, PgError(sqlstate))
+
+
+def flaky_repository(failures):
+    """Order repository whose first saves fail with the given SQLSTATEs."""
+    pending = list(failures)
+
+    class FlakyOrderRepository(OrderRepository):
+        async def save(self, order):
+            await super().save(order)
+            if pending:
+                raise pg_error(pending.pop(0))
+
+    return FlakyOrderRepository
+
+
+def test_policy_and_classification():
+    policy = RetryPolicy(attempts=5, base_delay=0.01, max_delay=0.05)
+    rng = random.Random(1)
+    assert all(0 <= policy.delay(1, rng) <= 0.01 for _ in range(50))
+    assert all(0 <= policy.delay(10, rng) <= 0.05 for _ in range(50))
+    assert retryable_error(pg_error("40001")) == "serialization_failure"
+    assert retryable_error(pg_error("40P01")) == "deadlock_detected"
+    assert retryable_error(pg_error("23505")) is None
+    assert retryable_error(ValueError()) is None
+
+
+@pytest.fixture
+async def app(make_app):
+    return await make_app(tx_retry_base_delay_ms=1, debug_token="t")
+
+
+@pytest.fixture
+async def client(app, make_client):
+    return await make_client(app, raise_app_exceptions=False, headers={"X-Debug-Token": "t"})
+
+
+async def new_order(client):
+    user = (await client.post("/api/users", json={"email": f"tx{random.random()}@example.com"})).json()["id"]
+    return (await client.post("/api/orders", json={"user_id": user})).json()["id"]
+
+
+async def test_command_is_retried_until_it_commits(app, client):
+    order_id = await new_order(client)
+    app.state.order_repository = flaky_repository(["40001", "40P01"])
+
+    response = await client.post(f"/api/orders/{order_id}/pay")
+    assert response.status_code == 200
+    # The failed attempts were rolled back: one payment in the history
+    history = (await client.get(f"/api/orders/{order_id}/history")).json()
+    assert [h["status"] for h in history] == ["created", "paid"]
+
+    metrics = (await client.get("/debug/transactions")).json()
+    assert metrics["pay_order"] == {
+        "committed": 1,
+        "retries": {"deadlock_detected": 1, "serialization_failure": 1},
+        "exhausted": 0,
+    }
+
+
+async def test_gives_up_after_the_last_attempt(app, client):
+    order_id = await new_order(client)
+    app.state.order_repository = flaky_repository(["40001"] * 3)
+    assert (await client.post(f"/api/orders/{order_id}/pay")).status_code == 500
+
+    app.state.order_repository = flaky_repository(["23505"])
+    assert (await client.post(f"/api/orders/{order_id}/cancel")).status_code == 500
+
+    metrics = (await client.get("/debug/transactions")).json()
+    assert metrics["pay_order"]["exhausted"] == 1
+    assert metrics["pay_order"]["retries"] == {"serialization_failure": 2}
+    # Other database errors are not retried
+    assert "cancel_order" not in metrics
+    history = (await client.get(f"/api/orders/{order_id}/history")).json()
+    assert [h["status"] for h in history] == ["created"]
@@ -0,0 +1,80 @@
+"""Tests for per-user order counters and their reconciliation."""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.tools.reconcile import main as reconcile_main
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite+aiosqlite:///{tmp_path / 'summary.db'}"
+
+
+@pytest.fixture
+async def app(make_app, database_url):
+    return await make_app(database_url=database_url)
+
+
+@pytest.fixture
+async def client(app, make_client):
+    return await make_client(app)
+
+
+async def place_order(client, user_id, price, action=None):
+    order = (await client.post("/api/orders", json={"user_id": user_id})).json()
+    await client.post(f"/api/orders/{order['id']}/items",
+                      json={"product_name": "Thing", "price": price, "quantity": 1})
+    if action:
+        await client.post(f"/api/orders/{order['id']}/{action}")
+    return order
+
+
+class TestUserSummary:
+    async def test_counters_follow_orders(self, client):
+        user = (await client.post("/api/users", json={"email": "sum@example.com", "name": "S"})).json()["id"]
+        empty = (await client.get(f"/api/users/{user}/summary")).json()
+        assert empty["orders"] == 0 and empty["last_order_at"] is None
+
+        await place_order(client, user, "10.00", "pay")
+        paid = await place_order(client, user, "2.50", "pay")
+        await client.post(f"/api/orders/{paid['id']}/items",
+                          json={"product_name": "Extra", "price": "1.00", "quantity": 2})
+        await place_order(client, user, "7.00", "cancel")
+        last = await place_order(client, user, "1.00")
+
+        summary = (await client.get(f"/api/users/{user}/summary")).json()
+        assert summary["orders"] == 4
+        assert summary["paid_orders"] == 2
+        assert Decimal(summary["paid_amount"]) == Decimal("14.50")
+        assert summary["cancelled_orders"] == 1
+        assert summary["last_order_at"] == last["created_at"]
+
+    async def test_unknown_user(self, client):
+        response = await client.get("/api/users/00000000-0000-0000-0000-000000000001/summary")
+        assert response.status_code == 404
+
+
+class TestReconcile:
+    async def test_detects_and_repairs_drift(self, app, client, database_url, capsys):
+        user = (await client.post("/api/users", json={"email": "drift@example.com", "name": "D"})).json()["id"]
+        await place_order(client, user, "5.00", "pay")
+        async with app.state.database.session_factory() as session:
+            await session.execute(text("UPDATE user_order_stats SET paid_orders = 7"))
+            await session.execute(text("DELETE FROM order_daily_stats"))
+            await session.commit()
+        await app.state.database.dispose()
+
+        # The CLI drives its own event loop, like it does when run from a shell
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(None, reconcile_main, ["--database-url", database_url, "--check"]) == 1
+        assert await loop.run_in_executor(None, reconcile_main, ["--database-url", database_url]) == 0
+        assert await loop.run_in_executor(None, reconcile_main, ["--database-url", database_url, "--check"]) == 0
+        assert "1 users with drifted counters" in capsys.readouterr().out
+
+        summary = (await client.get(f"/api/users/{user}/summary")).json()
+        assert summary["paid_orders"] == 1 and Decimal(summary["paid_amount"]) == Decimal("5.00")
+        assert (await client.get("/api/stats/basket")).json()["orders"] == 1
@@ -0,0 +1,124 @@
+"""Order archival: ``python -m app.tools.archive``.
+
+Moves completed and cancelled orders older than the retention window, with
+their items and status history, into the ``*_archive`` tables (see
+``migrations/007_history_partitions_and_archive.sql``). Each batch is its own
+transaction, so the job can be interrupted and re-run at any time; on
+PostgreSQL concurrently locked orders are skipped and picked up next run.
+
+On PostgreSQL the job also creates the upcoming monthly partitions of
+``order_status_history`` and drops the old ones archival has emptied.
+Reads keep working: ``OrderRepository.find_by_id`` falls back to the archive.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db import make_engine
+from app.infrastructure.repositories import OrderRepository
+
+DEFAULT_RETENTION_DAYS = 365
+DEFAULT_BATCH_SIZE = 1000
+# Monthly history partitions created ahead of time
+PARTITIONS_AHEAD = timedelta(days=92)
+
+
+@dataclass
+class ArchiveResult:
+    archived_orders: int
+    batches: int
+    partitions_created: int
+    partitions_dropped: int
+    elapsed_ms: float
+
+
+def archive_cutoff(retention_days: int, now: Optional[datetime] = None) -> datetime:
+    """Orders created before the returned moment are eligible for archival."""
+    now = now or datetime.now(timezone.utc)
+    return now - timedelta(days=retention_days)
+
+
+async def maintain_partitions(session, cutoff: datetime) -> tuple:
+    """Create upcoming history partitions and drop emptied ones (PostgreSQL only)."""
+    if session.get_bind().dialect.name != "postgresql":
+        return 0, 0
+    today = datetime.now(timezone.utc).date()
+    created = await session.execute(
+        text("SELECT ensure_order_status_history_partitions(:from_date, :to_date)"),
+        {"from_date": today, "to_date": today + PARTITIONS_AHEAD},
+    )
+    dropped = await session.execute(
+        text("SELECT drop_empty_order_status_history_partitions(:before_date)"),
+        {"before_date": cutoff.date()},
+    )
+    return int(created.scalar_one()), int(dropped.scalar_one())
+
+
+async def archive(session_factory, cutoff: datetime, batch_size: int = DEFAULT_BATCH_SIZE,
+                  max_batches: Optional[int] = None) -> ArchiveResult:
+    """Archive eligible orders in batches, committing after each one."""
+    started = time.perf_counter()
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        async with session_factory() as session:
+            moved = await OrderRepository(session).archive_batch(cutoff, batch_size)
+            await session.commit()
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    async with session_factory() as session:
+        created, dropped = await maintain_partitions(session, cutoff)
+        await session.commit()
+    return ArchiveResult(archived, batches, created, dropped, (time.perf_counter() - started) * 1000)
+
+
+async def run(url: str, retention_days: int, batch_size: int, max_batches: Optional[int]) -> ArchiveResult:
+    engine = make_engine(url)
+    try:
+        return await archive(lambda: AsyncSession(engine), archive_cutoff(retention_days), batch_size, max_batches)
+    finally:
+        await engine.dispose()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.archive",
+                                     description="Move old completed/cancelled orders to the archive tables.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="postgresql+asyncpg://... or sqlite+aiosqlite:///path.db (default: $DATABASE_URL)")
+    parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS,
+                        help=f"keep orders younger than this in the hot tables (default: {DEFAULT_RETENTION_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"orders moved per transaction (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--max-batches", type=int, default=None,
+                        help="stop after this many batches (default: until nothing is left)")
+    args = parser.parse_args(argv)
+    if args.retention_days < 0 or args.batch_size < 1:
+        parser.error("--retention-days must be >= 0 and --batch-size >= 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.database_url:
+        raise SystemExit("--database-url or DATABASE_URL is required")
+    result = asyncio.run(run(args.database_url, args.retention_days, args.batch_size, args.max_batches))
+    print(f"archived {result.archived_orders:,} orders in {result.batches} batches; "
+          f"history partitions: {result.partitions_created} created, {result.partitions_dropped} dropped; "
+          f"{result.elapsed_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
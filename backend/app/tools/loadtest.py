@@ -0,0 +1,410 @@
+"""Load-test driver for the order lifecycle: ``python -m app.tools.loadtest``.
+
+Drives a mix of scenarios through the real FastAPI application, either
+in-process through ``httpx.ASGITransport`` (default) or against a running
+server (``--url http://localhost:8000``):
+
+* ``journey`` — register, create an order, add items, pay, ship, complete,
+  reading the order back along the way;
+* ``browse`` — list a user's orders, open one, read its history; a share of
+  reads targets unknown ids and produces 404s;
+* ``hot`` — several clients race to pay the same few "hot" orders, which is
+  where double-pay 409s and lock contention come from. A hot order is
+  replaced with a fresh one after its first successful payment.
+
+Without ``--rate`` the test is closed-loop: ``--concurrency`` clients run
+scenarios back to back. With ``--rate`` scenarios arrive as a Poisson process
+at that many per second and ``--concurrency`` caps how many run at once.
+
+The report lists throughput, p50/p95/p99 latency, status breakdown and the
+number of database statements per operation for every endpoint. Statement
+counts come from the ``X-DB-Statements`` response header, so they are
+available in both modes.
+
+A 503 with ``Retry-After`` means the server shed the request (admission
+control, ``--admission`` for the in-process app). The client waits as told,
+capped at ``--max-retry-wait``, and retries up to ``--shed-retries`` times;
+shed requests are counted per endpoint in the report.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+PRODUCTS = [f"Load item {i:03d}" for i in range(100)]
+
+
+@dataclass
+class LoadSpec:
+    concurrency: int = 16
+    rate: Optional[float] = None
+    duration: float = 10.0
+    scenarios: Optional[int] = None
+    mix: Dict[str, float] = field(default_factory=lambda: {"journey": 0.5, "browse": 0.35, "hot": 0.15})
+    hot_orders: int = 4
+    miss_share: float = 0.02
+    max_items: int = 5
+    seed: int = 1
+    shed_retries: int = 2
+    max_retry_wait: float = 1.0
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    statements: List[int] = field(default_factory=list)
+    db_ms: List[float] = field(default_factory=list)
+
+    def summary(self, elapsed: float) -> dict:
+        count = len(self.latencies)
+        return {
+            "count": count,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 3),
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+            "statements_per_op": round(sum(self.statements) / len(self.statements), 2) if self.statements else None,
+            "db_ms_per_op": round(sum(self.db_ms) / len(self.db_ms), 3) if self.db_ms else None,
+        }
+
+
+class Recorder:
+    """Collects one sample per HTTP call, keyed by route template."""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.scenarios: Counter = Counter()
+        self.failed_scenarios: Counter = Counter()
+        self.hot_pay_accepted: Counter = Counter()
+        self.shed: Counter = Counter()
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    def record(self, endpoint: str, latency: float, status, response: Optional[httpx.Response]) -> None:
+        stats = self.endpoints[endpoint]
+        stats.latencies.append(latency)
+        stats.statuses[status] += 1
+        if response is None:
+            return
+        statements = response.headers.get("x-db-statements")
+        if statements is not None:
+            stats.statements.append(int(statements))
+        timing = response.headers.get("server-timing", "")
+        for metric in timing.split(","):
+            name, _, params = metric.strip().partition(";")
+            if name == "db" and params.startswith("dur="):
+                stats.db_ms.append(float(params[4:]))
+
+    def report(self) -> dict:
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        operations = sum(len(s.latencies) for s in self.endpoints.values())
+        errors: Counter = Counter()
+        for name, stats in self.endpoints.items():
+            for status, count in stats.statuses.items():
+                if not (isinstance(status, int) and status < 400):
+                    errors[f"{status} {name}"] += count
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "operations": operations,
+            "throughput_ops": round(operations / elapsed, 2) if elapsed else 0.0,
+            "scenarios": dict(self.scenarios),
+            "failed_scenarios": dict(self.failed_scenarios),
+            # Payments accepted more than once for the same order: lost updates under contention
+            "double_pay_accepted": sum(n - 1 for n in self.hot_pay_accepted.values() if n > 1),
+            # 503s from admission control, retried ones included
+            "shed": dict(self.shed.most_common()),
+            "errors": dict(errors.most_common()),
+            "endpoints": {name: self.endpoints[name].summary(elapsed) for name in sorted(self.endpoints)},
+        }
+
+
+class ScenarioFailed(Exception):
+    """A step returned an unexpected status; the rest of the scenario is skipped."""
+
+
+class Driver:
+    def __init__(self, client: httpx.AsyncClient, spec: LoadSpec, recorder: Recorder):
+        self.client = client
+        self.spec = spec
+        self.recorder = recorder
+        self.rng = random.Random(spec.seed)
+        self.users: List[str] = []
+        self.orders: List[str] = []
+        self.hot_slots: List[Optional[str]] = [None] * spec.hot_orders
+        self._sequence = 0
+
+    async def call(self, method: str, endpoint: str, url: str, json=None, expect=(200,)) -> Optional[httpx.Response]:
+        for attempt in range(self.spec.shed_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, json=json)
+            except httpx.HTTPError as exc:
+                self.recorder.record(endpoint, time.perf_counter() - started, type(exc).__name__, None)
+                raise ScenarioFailed(endpoint) from exc
+            self.recorder.record(endpoint, time.perf_counter() - started, response.status_code, response)
+            if response.status_code != 503 or "retry-after" not in response.headers:
+                break
+            self.recorder.shed[endpoint] += 1
+            if attempt < self.spec.shed_retries:
+                await asyncio.sleep(self.retry_wait(response.headers["retry-after"]))
+        if response.status_code not in expect:
+            raise ScenarioFailed(f"{endpoint} -> {response.status_code}")
+        return response
+
+    def retry_wait(self, retry_after: str) -> float:
+        """Seconds to wait before retrying a shed request, with jitter so retries do not arrive together."""
+        try:
+            wait = float(retry_after)
+        except ValueError:
+            wait = self.spec.max_retry_wait
+        return min(wait, self.spec.max_retry_wait) * self.rng.uniform(0.5, 1.0)
+
+    async def register(self) -> str:
+        self._sequence += 1
+        email = f"load-{self.spec.seed}-{uuid.uuid4().hex[:12]}-{self._sequence}@load.example"
+        response = await self.call("POST", "POST /api/users", "/api/users",
+                                   json={"email": email, "name": "Load"}, expect=(201,))
+        user_id = response.json()["id"]
+        self.users.append(user_id)
+        return user_id
+
+    async def create_order(self, user_id: str, items: int) -> str:
+        response = await self.call("POST", "POST /api/orders", "/api/orders", json={"user_id": user_id}, expect=(201,))
+        order_id = response.json()["id"]
+        for _ in range(items):
+            await self.call("POST", "POST /api/orders/{order_id}/items", f"/api/orders/{order_id}/items", json={
+                "product_name": self.rng.choice(PRODUCTS),
+                "price": f"{self.rng.randrange(100, 50_000) / 100:.2f}",
+                "quantity": self.rng.randint(1, 3),
+            }, expect=(201,))
+        self.orders.append(order_id)
+        return order_id
+
+    async def transition(self, order_id: str, action: str, expect=(200,)) -> httpx.Response:
+        return await self.call("POST", f"POST /api/orders/{{order_id}}/{action}",
+                               f"/api/orders/{order_id}/{action}", expect=expect)
+
+    async def journey(self) -> None:
+        user_id = await self.register()
+        order_id = await self.create_order(user_id, self.rng.randint(1, self.spec.max_items))
+        await self.call("GET", "GET /api/orders/{order_id}", f"/api/orders/{order_id}")
+        if self.rng.random() < 0.1:
+            await self.transition(order_id, "cancel")
+            return
+        for action in ("pay", "ship", "complete"):
+            await self.transition(order_id, action)
+        await self.call("GET", "GET /api/orders/{order_id}", f"/api/orders/{order_id}")
+
+    async def browse(self) -> None:
+        if not self.orders or self.rng.random() < self.spec.miss_share:
+            missing = uuid.uuid4()
+            await self.call("GET", "GET /api/orders/{order_id}", f"/api/orders/{missing}", expect=(404,))
+            return
+        await self.call("GET", "GET /api/orders?user_id", f"/api/orders?user_id={self.rng.choice(self.users)}")
+        order_id = self.rng.choice(self.orders)
+        await self.call("GET", "GET /api/orders/{order_id}", f"/api/orders/{order_id}")
+        await self.call("GET", "GET /api/orders/{order_id}/history", f"/api/orders/{order_id}/history")
+
+    async def hot(self) -> None:
+        slot = self.rng.randrange(len(self.hot_slots))
+        if self.hot_slots[slot] is None:
+            user_id = self.rng.choice(self.users) if self.users else await self.register()
+            self.hot_slots[slot] = await self.create_order(user_id, 1)
+        order_id = self.hot_slots[slot]
+        await self.call("GET", "GET /api/orders/{order_id}", f"/api/orders/{order_id}")
+        response = await self.transition(order_id, "pay", expect=(200, 409))
+        if response.status_code == 200:
+            self.recorder.hot_pay_accepted[order_id] += 1
+            if self.hot_slots[slot] == order_id:
+                self.hot_slots[slot] = None
+
+    async def run_scenario(self, name: str) -> None:
+        self.recorder.scenarios[name] += 1
+        try:
+            await getattr(self, name)()
+        except ScenarioFailed:
+            self.recorder.failed_scenarios[name] += 1
+
+    def pick(self) -> str:
+        names = list(self.spec.mix)
+        return self.rng.choices(names, weights=[self.spec.mix[n] for n in names])[0]
+
+
+async def run_load(client: httpx.AsyncClient, spec: LoadSpec) -> dict:
+    """Run ``spec`` against ``client`` and return the report."""
+    recorder = Recorder()
+    driver = Driver(client, spec, recorder)
+    deadline = recorder.started_at + spec.duration
+    budget = spec.scenarios
+
+    def more() -> bool:
+        nonlocal budget
+        if budget is not None:
+            if budget <= 0:
+                return False
+            budget -= 1
+            return True
+        return time.perf_counter() < deadline
+
+    if spec.rate is None:
+        async def worker():
+            while more():
+                await driver.run_scenario(driver.pick())
+
+        await asyncio.gather(*(worker() for _ in range(spec.concurrency)))
+    else:
+        limit = asyncio.Semaphore(spec.concurrency)
+        tasks = set()
+
+        async def arrival(name):
+            async with limit:
+                await driver.run_scenario(name)
+
+        next_at = time.perf_counter()
+        while more():
+            next_at += driver.rng.expovariate(spec.rate)
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(arrival(driver.pick()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    recorder.finished_at = time.perf_counter()
+    return recorder.report()
+
+
+def format_report(report: dict) -> str:
+    header = (f"{'endpoint':<40} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'stmts':>6}  statuses")
+    lines = [header, "-" * len(header)]
+    for name, row in report["endpoints"].items():
+        statements = "-" if row["statements_per_op"] is None else f"{row['statements_per_op']:.1f}"
+        statuses = " ".join(f"{code}:{n}" for code, n in row["statuses"].items())
+        lines.append(f"{name:<40} {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>9.2f} "
+                     f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {statements:>6}  {statuses}")
+    lines.append("")
+    lines.append(f"{report['operations']} operations in {report['elapsed_s']:.1f}s "
+                 f"({report['throughput_ops']:.1f} ops/s); scenarios {report['scenarios']}")
+    if report["failed_scenarios"]:
+        lines.append(f"failed scenarios: {report['failed_scenarios']}")
+    if report["shed"]:
+        lines.append(f"shed with 503: {report['shed']}")
+    if report.get("admission"):
+        lines.append(f"admission: {report['admission']}")
+    retried = {op: row["retries"] for op, row in report.get("transactions", {}).items() if row["retries"]}
+    if retried:
+        lines.append(f"transaction retries: {retried}")
+    if report["double_pay_accepted"]:
+        lines.append(f"payments accepted twice for the same order: {report['double_pay_accepted']}")
+    for error, count in report["errors"].items():
+        lines.append(f"  {count:>6} x {error}")
+    return "\n".join(lines)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("journey", "browse", "hot"):
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.loadtest", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server (default: run the app in-process)")
+    parser.add_argument("--database-url", help="DATABASE_URL for the in-process app")
+    parser.add_argument("--create-schema", action="store_true", help="create tables before an in-process run")
+    parser.add_argument("--concurrency", type=int, default=LoadSpec.concurrency)
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate, scenarios per second")
+    parser.add_argument("--duration", type=float, default=LoadSpec.duration, help="seconds")
+    parser.add_argument("--scenarios", type=int, help="stop after this many scenarios instead of --duration")
+    parser.add_argument("--mix", type=parse_mix, default=None, help="e.g. journey=5,browse=3,hot=2")
+    parser.add_argument("--hot-orders", type=int, default=LoadSpec.hot_orders)
+    parser.add_argument("--miss-share", type=float, default=LoadSpec.miss_share)
+    parser.add_argument("--max-items", type=int, default=LoadSpec.max_items)
+    parser.add_argument("--seed", type=int, default=LoadSpec.seed)
+    parser.add_argument("--shed-retries", type=int, default=LoadSpec.shed_retries,
+                        help="retries of a request shed with 503 + Retry-After")
+    parser.add_argument("--max-retry-wait", type=float, default=LoadSpec.max_retry_wait,
+                        help="cap on the Retry-After wait, seconds")
+    parser.add_argument("--admission", action="store_true", help="enable admission control in the in-process app")
+    parser.add_argument("--admission-limit", type=int, help="initial admission limit for the in-process app")
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    return parser.parse_args(argv)
+
+
+async def main_async(args) -> dict:
+    spec = LoadSpec(
+        concurrency=args.concurrency, rate=args.rate, duration=args.duration, scenarios=args.scenarios,
+        hot_orders=args.hot_orders, miss_share=args.miss_share, max_items=args.max_items, seed=args.seed,
+        shed_retries=args.shed_retries, max_retry_wait=args.max_retry_wait,
+    )
+    if args.mix:
+        spec.mix = args.mix
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            return await run_load(client, spec)
+
+    from app.main import create_app
+    from app.settings import Settings
+
+    overrides = {"database_url": args.database_url} if args.database_url else {}
+    if args.admission:
+        overrides["admission_control"] = True
+    if args.admission_limit:
+        overrides["admission_limit"] = args.admission_limit
+    app = create_app(Settings.from_env(**overrides))
+    if args.create_schema:
+        from app.infrastructure.schema import create_schema
+        await create_schema(app.state.database.engine)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    # ASGITransport does not send lifespan events, so run the lifespan here (pool warm-up)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            report = await run_load(client, spec)
+    admission = getattr(app.state, "admission", None)
+    if admission is not None:
+        report["admission"] = admission.snapshot()
+    report["transactions"] = app.state.retry_metrics.snapshot()
+    return report
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+    print(format_report(report))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
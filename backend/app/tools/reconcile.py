@@ -0,0 +1,75 @@
+"""Rollup reconciliation: ``python -m app.tools.reconcile``.
+
+``user_order_stats`` and ``order_daily_stats`` are maintained incrementally by
+``OrderService``. Writes that bypass it (bulk loads, manual SQL, restores) make
+them drift from ``orders``; this job reports the per-user drift and rebuilds
+both tables from the source rows in one transaction. Concurrent writers wait
+on the table locks taken by the rebuild (PostgreSQL) and apply their
+increments to the rebuilt rows afterwards.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db import make_engine
+from app.infrastructure.repositories import OrderStatsRepository, UserOrderStatsRepository
+
+
+@dataclass
+class ReconcileResult:
+    drifted_users: int
+    rebuilt: bool
+    elapsed_ms: float
+
+
+async def reconcile(session, fix: bool = True) -> ReconcileResult:
+    """Count drifted users and, with ``fix``, rebuild the rollups (caller commits)."""
+    started = time.perf_counter()
+    user_stats = UserOrderStatsRepository(session)
+    drifted = await user_stats.count_drift()
+    if fix:
+        await user_stats.rebuild()
+        await OrderStatsRepository(session).rebuild()
+    return ReconcileResult(drifted, fix, (time.perf_counter() - started) * 1000)
+
+
+async def run(url: str, fix: bool) -> ReconcileResult:
+    engine = make_engine(url)
+    try:
+        async with AsyncSession(engine) as session:
+            result = await reconcile(session, fix)
+            await session.commit()
+    finally:
+        await engine.dispose()
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.reconcile",
+                                     description="Check and rebuild the order rollup tables.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="postgresql+asyncpg://... or sqlite+aiosqlite:///path.db (default: $DATABASE_URL)")
+    parser.add_argument("--check", action="store_true",
+                        help="only report drift; exit status 1 when any user's counters are wrong")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if not args.database_url:
+        raise SystemExit("--database-url or DATABASE_URL is required")
+    result = asyncio.run(run(args.database_url, fix=not args.check))
+    action = "rebuilt rollups" if result.rebuilt else "checked only"
+    print(f"{result.drifted_users:,} users with drifted counters; {action} in {result.elapsed_ms:.0f} ms")
+    return 1 if args.check and result.drifted_users else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""Synthetic data generator: ``python -m app.tools.seed``.
+
+Generates users, orders, order items and status history that respect the
+domain invariants and bulk-loads them, bypassing the services:
+
+* emails are validated by constructing ``User`` objects;
+* an order's ``total_amount`` is the sum of its item subtotals;
+* status histories are replayed through the ``Order`` state machine once at
+  start-up, so only legal sequences can be emitted.
+
+Output is deterministic for a given ``--seed``: every chunk of orders has its own
+random stream, so the result does not depend on ``--jobs``. PostgreSQL is loaded
+with ``COPY`` (binary, via asyncpg) from every worker process in parallel, with
+triggers disabled through ``session_replication_role = replica`` (requires a
+superuser) because the generator already writes the history and totals the
+triggers would produce. SQLite is loaded with multi-row ``INSERT``. The
+product catalogue is upserted once up front and items carry its ids; the
+analytics rollups are recomputed once everything is loaded.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+from app.domain.order import Order, OrderStatus
+from app.domain.user import User
+from app.infrastructure.repositories import OrderStatsRepository, UserOrderStatsRepository
+
+USER_COLUMNS = ("id", "email", "name", "created_at")
+ORDER_COLUMNS = ("id", "user_id", "status", "total_amount", "created_at")
+ITEM_COLUMNS = ("id", "order_id", "product_id", "price", "quantity", "line_no")
+HISTORY_COLUMNS = ("id", "order_id", "status", "changed_at")
+
+EPOCH = datetime(2023, 1, 1)
+CENT = Decimal("0.01")
+
+
+def _legal_chains() -> List[Tuple[OrderStatus, ...]]:
+    """Every status sequence the ``Order`` state machine accepts, found by replay."""
+    transitions = {"pay": Order.pay, "cancel": Order.cancel, "ship": Order.ship, "complete": Order.complete}
+    chains = []
+
+    def walk(actions):
+        order = Order(user_id=uuid.UUID(int=0))
+        try:
+            for action in actions:
+                transitions[action](order)
+        except Exception:
+            return
+        chain = tuple(change.status for change in order.status_history)
+        # Re-entering a status (e.g. paying a shipped order again) is never realistic
+        if chain in chains or len(set(chain)) != len(chain):
+            return
+        chains.append(chain)
+        for action in transitions:
+            walk(actions + [action])
+
+    walk([])
+    return chains
+
+
+LEGAL_CHAINS = _legal_chains()
+
+# Share of orders ending in each status. The shortest legal chain reaching a status
+# is used for it (``cancelled`` comes straight from ``created``).
+STATUS_MIX = {
+    OrderStatus.CREATED: 0.10,
+    OrderStatus.PAID: 0.10,
+    OrderStatus.SHIPPED: 0.10,
+    OrderStatus.COMPLETED: 0.60,
+    OrderStatus.CANCELLED: 0.10,
+}
+CHAIN_WEIGHTS = [
+    (tuple(s.value for s in min((c for c in LEGAL_CHAINS if c[-1] == status), key=len)), weight)
+    for status, weight in STATUS_MIX.items()
+]
+
+PRODUCTS = [
+    f"{adjective} {noun}"
+    for adjective in ("Red", "Blue", "Large", "Small", "Smart", "Classic", "Eco", "Pro", "Mini", "Ultra")
+    for noun in ("Phone", "Laptop", "Mug", "Chair", "Lamp", "Backpack", "Headphones", "Kettle",
+                 "Notebook", "Sneakers", "Watch", "Camera", "Book", "Desk", "Charger")
+]
+
+
+@dataclass(frozen=True)
+class SeedSpec:
+    users: int
+    orders: int
+    seed: int = 1
+    max_items: int = 50
+    user_skew: float = 1.2
+    chunk_size: int = 10_000
+    days: int = 365
+
+
+_VERSION_MASK = ~((0xF000 << 64) | (0xC000 << 48)) & ((1 << 128) - 1)
+_VERSION_BITS = (0x4000 << 64) | (0x8000 << 48)
+_new_uuid = object.__new__
+_set = object.__setattr__
+
+
+def _uuid(value: int) -> uuid.UUID:
+    """Random 128-bit value as a version 4 UUID, skipping ``UUID.__init__`` validation."""
+    result = _new_uuid(uuid.UUID)
+    _set(result, "int", (value & _VERSION_MASK) | _VERSION_BITS)
+    _set(result, "is_safe", uuid.SafeUUID.unknown)
+    return result
+
+
+def user_id(spec: SeedSpec, index: int) -> uuid.UUID:
+    """Stable id of the ``index``-th user; order chunks derive it without shared state."""
+    digest = hashlib.blake2b(f"{spec.seed}:user:{index}".encode(), digest_size=16).digest()
+    return _uuid(int.from_bytes(digest, "big"))
+
+
+def generate_users(spec: SeedSpec, start: int, stop: int, tz=None) -> List[tuple]:
+    rows = []
+    epoch = EPOCH.replace(tzinfo=tz)
+    for index in range(start, stop):
+        created_at = epoch + timedelta(seconds=index % (spec.days * 86400))
+        # Constructing the entity validates the email exactly like the API does
+        user = User(email=f"user{index}@seed.example", name=f"User {index}",
+                    id=user_id(spec, index), created_at=created_at)
+        rows.append((user.id, user.email, user.name, user.created_at))
+    return rows
+
+
+def generate_orders(spec: SeedSpec, chunk: int, tz=None, products: Sequence = PRODUCTS):
+    """Orders, items and history for orders ``[chunk * chunk_size, ...)``.
+
+    ``products`` holds what goes into an item's product column: the ids of
+    ``PRODUCTS`` (same order) when loading, the names themselves otherwise.
+    """
+    rng = random.Random(f"{spec.seed}:orders:{chunk}")
+    getrandbits, random_ = rng.getrandbits, rng.random
+    lognormvariate, expovariate, paretovariate = rng.lognormvariate, rng.expovariate, rng.paretovariate
+    start = chunk * spec.chunk_size
+    stop = min(spec.orders, start + spec.chunk_size)
+    chains, weights = zip(*CHAIN_WEIGHTS)
+    picked_chains = rng.choices(chains, weights, k=stop - start)
+    epoch = EPOCH.replace(tzinfo=tz)
+    span = spec.days * 86400
+    skew = 1 + spec.user_skew
+    users, max_items = spec.users, spec.max_items
+    owners = {}
+    orders, items, history = [], [], []
+    for chain in picked_chains:
+        # Zipf-like skew: a small share of users owns most of the orders
+        user_index = min(users - 1, int(users * random_() ** skew))
+        owner = owners.get(user_index)
+        if owner is None:
+            owner = owners[user_index] = user_id(spec, user_index)
+        order_id = _uuid(getrandbits(128))
+        created_at = epoch + timedelta(seconds=int(random_() * span))
+        total_cents = 0
+        # Heavy-tailed basket sizes: most orders have a few lines, some have dozens
+        for line_no in range(min(max_items, int(paretovariate(1.6)))):
+            price_cents = int(lognormvariate(7.5, 1.2)) + 1
+            quantity = 1 + int(expovariate(1.5))
+            total_cents += price_cents * quantity
+            items.append((_uuid(getrandbits(128)), order_id, products[getrandbits(16) % len(products)],
+                          Decimal(price_cents) * CENT, quantity, line_no))
+        changed_at = created_at
+        for status in chain:
+            history.append((_uuid(getrandbits(128)), order_id, status, changed_at))
+            changed_at += timedelta(seconds=300 + int(random_() * 4 * 86400))
+        orders.append((order_id, owner, chain[-1], Decimal(total_cents) * CENT, created_at))
+    return orders, items, history
+
+
+def _chunks(total: int, size: int) -> range:
+    return range((total + size - 1) // size)
+
+
+# --- loaders ---------------------------------------------------------------------------------
+
+
+def _asyncpg_dsn(url: str) -> str:
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def _postgres_product_ids(dsn: str) -> List[int]:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute(
+            "INSERT INTO products (name) SELECT unnest($1::text[]) ON CONFLICT (name) DO NOTHING", PRODUCTS)
+        rows = await conn.fetch("SELECT id, name FROM products WHERE name = ANY($1::text[])", PRODUCTS)
+    finally:
+        await conn.close()
+    ids = {row["name"]: row["id"] for row in rows}
+    return [ids[name] for name in PRODUCTS]
+
+
+def _sqlite_product_ids(conn) -> List[int]:
+    conn.executemany("INSERT INTO products (name) VALUES (?) ON CONFLICT (name) DO NOTHING",
+                     [(name,) for name in PRODUCTS])
+    ids = dict(conn.execute("SELECT name, id FROM products").fetchall())
+    return [ids[name] for name in PRODUCTS]
+
+
+def _rollup_statements(dialect: str) -> List[str]:
+    return OrderStatsRepository.rebuild_statements(dialect) + UserOrderStatsRepository.rebuild_statements(dialect)
+
+
+async def _postgres_rebuild_rollups(dsn: str) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            for statement in _rollup_statements("postgresql"):
+                await conn.execute(statement)
+    finally:
+        await conn.close()
+
+
+async def _copy(dsn: str, tables) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            await conn.execute("SET LOCAL session_replication_role = replica")
+            for table, columns, rows in tables:
+                if rows:
+                    await conn.copy_records_to_table(table, records=rows, columns=columns)
+    finally:
+        await conn.close()
+
+
+def _postgres_users_job(args) -> int:
+    dsn, spec, start, stop = args
+    rows = generate_users(spec, start, stop, tz=timezone.utc)
+    asyncio.run(_copy(dsn, [("users", USER_COLUMNS, rows)]))
+    return len(rows)
+
+
+def _postgres_orders_job(args) -> Tuple[int, int, int]:
+    dsn, spec, chunk, product_ids = args
+    orders, items, history = generate_orders(spec, chunk, tz=timezone.utc, products=product_ids)
+    asyncio.run(_copy(dsn, [
+        ("orders", ORDER_COLUMNS, orders),
+        ("order_items", ITEM_COLUMNS, items),
+        ("order_status_history", HISTORY_COLUMNS, history),
+    ]))
+    return len(orders), len(items), len(history)
+
+
+def _generate_orders_job(args):
+    spec, chunk, product_ids = args
+    return generate_orders(spec, chunk, products=product_ids)
+
+
+def _count_orders_job(args) -> Tuple[int, int, int]:
+    orders, items, history = generate_orders(*args)
+    return len(orders), len(items), len(history)
+
+
+def _insert_sql(table: str, columns, rows_per_statement: int) -> str:
+    placeholders = "(" + ", ".join("?" * len(columns)) + ")"
+    values = ", ".join([placeholders] * rows_per_statement)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values}"
+
+
+def _sqlite_insert(conn, table: str, columns, rows: List[tuple]) -> None:
+    # SQLite caps bound variables per statement (32766 since 3.32)
+    per_statement = max(1, 32000 // len(columns))
+    full = _insert_sql(table, columns, per_statement)
+    for start in range(0, len(rows), per_statement):
+        batch = rows[start:start + per_statement]
+        sql = full if len(batch) == per_statement else _insert_sql(table, columns, len(batch))
+        conn.execute(sql, [value for row in batch for value in row])
+
+
+class Progress:
+    def __init__(self, total_orders: int, quiet: bool):
+        self.total = total_orders
+        self.quiet = quiet
+        self.started = time.perf_counter()
+        self.orders = self.items = self.history = 0
+
+    def add(self, orders: int, items: int, history: int) -> None:
+        self.orders += orders
+        self.items += items
+        self.history += history
+        if not self.quiet:
+            rate = self.orders / max(self.elapsed, 1e-9)
+            print(f"\r  orders {self.orders:>12,}/{self.total:,}  {rate:>10,.0f} orders/s", end="", flush=True)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def seed_postgres(url: str, spec: SeedSpec, jobs: int, progress: Progress) -> None:
+    dsn = _asyncpg_dsn(url)
+    user_batches = [(dsn, spec, start, min(spec.users, start + spec.chunk_size))
+                    for start in range(0, spec.users, spec.chunk_size)]
+    product_ids = asyncio.run(_postgres_product_ids(dsn))
+    order_batches = [(dsn, spec, chunk, product_ids) for chunk in _chunks(spec.orders, spec.chunk_size)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for _ in pool.map(_postgres_users_job, user_batches):
+            pass
+        for counts in pool.map(_postgres_orders_job, order_batches):
+            progress.add(*counts)
+    asyncio.run(_postgres_rebuild_rollups(dsn))
+
+
+def seed_sqlite(path: str, spec: SeedSpec, jobs: int, progress: Progress) -> None:
+    import sqlite3
+
+    from app.infrastructure import schema  # registers UUID/Decimal adapters
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        for statement in schema.SQLITE_SCHEMA:
+            conn.execute(statement)
+        for start in range(0, spec.users, spec.chunk_size):
+            _sqlite_insert(conn, "users", USER_COLUMNS,
+                           generate_users(spec, start, min(spec.users, start + spec.chunk_size)))
+        product_ids = _sqlite_product_ids(conn)
+        batches = [(spec, chunk, product_ids) for chunk in _chunks(spec.orders, spec.chunk_size)]
+        # SQLite has a single writer, so worker processes only help when generation dominates
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        chunks = pool.map(_generate_orders_job, batches) if pool else map(_generate_orders_job, batches)
+        try:
+            for orders, items, history in chunks:
+                _sqlite_insert(conn, "orders", ORDER_COLUMNS, orders)
+                _sqlite_insert(conn, "order_items", ITEM_COLUMNS, items)
+                _sqlite_insert(conn, "order_status_history", HISTORY_COLUMNS, history)
+                conn.commit()
+                progress.add(len(orders), len(items), len(history))
+        finally:
+            if pool:
+                pool.shutdown()
+        for statement in _rollup_statements("sqlite"):
+            conn.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def generate_only(spec: SeedSpec, jobs: int, progress: Progress) -> None:
+    """Generate without loading, to measure the generator on its own."""
+    batches = [(spec, chunk) for chunk in _chunks(spec.orders, spec.chunk_size)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for counts in pool.map(_count_orders_job, batches):
+            progress.add(*counts)
+
+
+# --- CLI -------------------------------------------------------------------------------------
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.tools.seed", description="Bulk-load synthetic marketplace data.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="postgresql+asyncpg://... or sqlite+aiosqlite:///path.db (default: $DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-items", type=int, default=50, help="upper bound of lines per order")
+    parser.add_argument("--user-skew", type=float, default=1.2, help="0 = uniform; higher = more orders on fewer users")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="orders per COPY/transaction")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="generator/loader processes")
+    parser.add_argument("--dry-run", action="store_true", help="generate only, do not touch the database")
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.users < 1:
+        raise SystemExit("--users must be at least 1")
+    spec = SeedSpec(args.users, args.orders, args.seed, args.max_items, args.user_skew, args.chunk_size)
+    progress = Progress(spec.orders, args.quiet)
+    if args.dry_run:
+        generate_only(spec, args.jobs, progress)
+    elif not args.database_url:
+        raise SystemExit("--database-url or DATABASE_URL is required (or use --dry-run)")
+    elif args.database_url.startswith("sqlite"):
+        seed_sqlite(args.database_url.split("///", 1)[1], spec, args.jobs, progress)
+    else:
+        seed_postgres(args.database_url, spec, args.jobs, progress)
+    elapsed = progress.elapsed
+    if not args.quiet:
+        print()
+    print(
+        f"{spec.users:,} users, {progress.orders:,} orders, {progress.items:,} items, "
+        f"{progress.history:,} history rows in {elapsed:.1f}s "
+        f"({progress.orders / max(elapsed, 1e-9):,.0f} orders/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Reproducible benchmarks for the repository and API layers.
+
+Run from ``backend/``::
+
+    python -m benchmarks --help
+"""
@@ -0,0 +1,292 @@
+"""Benchmark cases for repositories, service transitions and HTTP endpoints."""
+
+import asyncio
+import json
+import random
+import sys
+from decimal import Decimal
+from typing import Dict, List
+
+from httpx import AsyncClient, ASGITransport
+
+from app.application.order_service import OrderService
+from app.domain.order import Order, OrderStatus
+from app.infrastructure.db import get_db
+from app.infrastructure.memory_repositories import InMemoryOrderRepository, InMemoryStore, InMemoryUserRepository
+from app.infrastructure.repositories import DocumentOrderRepository, OrderRepository, UserRepository
+
+from .dataset import PRODUCTS, Dataset, seed_orders_in_status
+from .harness import Case
+
+CREATED = (OrderStatus.CREATED,)
+PAID = (OrderStatus.CREATED, OrderStatus.PAID)
+SHIPPED = (OrderStatus.CREATED, OrderStatus.PAID, OrderStatus.SHIPPED)
+
+
+class BenchContext:
+    """Shared state handed to every case."""
+
+    def __init__(self, session_factory, dataset: Dataset, large_order_items: int, database_url: str = None):
+        self.session_factory = session_factory
+        self.database_url = database_url
+        self.dataset = dataset
+        self.large_order_items = large_order_items
+        self.rng = random.Random(dataset.spec.seed + 1)
+
+    def user_id(self, i: int):
+        return self.dataset.user_ids[i % len(self.dataset.user_ids)]
+
+    def order_id(self, i: int):
+        # Stride through the dataset so consecutive iterations hit different users
+        ids = self.dataset.order_ids
+        return ids[(i * 7919) % len(ids)]
+
+    async def fixtures(self, chain, count: int) -> List:
+        async with self.session_factory() as session:
+            return await seed_orders_in_status(session, self.user_id(0), chain, count, self.rng)
+
+    def client(self, app) -> AsyncClient:
+        async def bench_db():
+            async with self.session_factory() as session:
+                try:
+                    yield session
+                    await session.commit()
+                except Exception:
+                    await session.rollback()
+                    raise
+
+        app.dependency_overrides[get_db] = bench_db
+        return AsyncClient(transport=ASGITransport(app=app), base_url="http://bench")
+
+
+def repository_cases(ctx: BenchContext, iterations: int) -> List[Case]:
+    async def user_find_by_id(i):
+        async with ctx.session_factory() as session:
+            assert await UserRepository(session).find_by_id(ctx.user_id(i)) is not None
+
+    async def order_find_by_id(i):
+        async with ctx.session_factory() as session:
+            assert await OrderRepository(session).find_by_id(ctx.order_id(i)) is not None
+
+    async def order_find_by_user(i):
+        async with ctx.session_factory() as session:
+            await OrderRepository(session).find_by_user(ctx.user_id(i))
+
+    async def order_find_all(i):
+        async with ctx.session_factory() as session:
+            await OrderRepository(session).find_all()
+
+    async def order_search(i):
+        async with ctx.session_factory() as session:
+            await OrderRepository(session).search_by_product(PRODUCTS[i % len(PRODUCTS)][-4:])
+
+    async def order_save_large(i):
+        order = Order(user_id=ctx.user_id(i))
+        for n in range(ctx.large_order_items):
+            order.add_item(f"Bulk item {n}", Decimal("9.99"), 1 + n % 3)
+        async with ctx.session_factory() as session:
+            await OrderRepository(session).save(order)
+            await session.commit()
+
+    return [
+        Case("repo.user.find_by_id", user_find_by_id, iterations),
+        Case("repo.order.find_by_id", order_find_by_id, iterations),
+        Case("repo.order.find_by_user", order_find_by_user, iterations),
+        Case("repo.order.find_all", order_find_all, max(3, iterations // 50)),
+        Case("repo.order.search_by_product", order_search, iterations),
+        Case(f"repo.order.save[{ctx.large_order_items} items]", order_save_large, max(3, iterations // 10)),
+    ]
+
+
+def document_cases(ctx: BenchContext, iterations: int) -> List[Case]:
+    """The repository cases against DocumentOrderRepository, on a copy of the seeded orders."""
+    copied: List = []
+
+    async def setup(count):
+        if copied:
+            return
+        async with ctx.session_factory() as session:
+            tables, documents = OrderRepository(session), DocumentOrderRepository(session)
+            for order_id in ctx.dataset.order_ids:
+                await documents.save(await tables.find_by_id(order_id))
+            await session.commit()
+        copied.append(True)
+
+    async def find_by_id(i):
+        async with ctx.session_factory() as session:
+            assert await DocumentOrderRepository(session).find_by_id(ctx.order_id(i)) is not None
+
+    async def find_by_user(i):
+        async with ctx.session_factory() as session:
+            await DocumentOrderRepository(session).find_by_user(ctx.user_id(i))
+
+    async def save_large(i):
+        order = Order(user_id=ctx.user_id(i))
+        for n in range(ctx.large_order_items):
+            order.add_item(f"Bulk item {n}", Decimal("9.99"), 1 + n % 3)
+        async with ctx.session_factory() as session:
+            await DocumentOrderRepository(session).save(order)
+            await session.commit()
+
+    return [
+        Case("repo.order_document.find_by_id", find_by_id, iterations, setup),
+        Case("repo.order_document.find_by_user", find_by_user, iterations, setup),
+        Case(f"repo.order_document.save[{ctx.large_order_items} items]", save_large,
+             max(3, iterations // 10), setup),
+    ]
+
+
+def memory_cases(ctx: BenchContext, iterations: int) -> List[Case]:
+    """Zero-I/O baseline: the same reads, writes and a payment against in-memory repositories.
+
+    The difference to ``repo.*``/``service.*`` is the cost of the database round trips.
+    """
+    store = InMemoryStore()
+    users, orders = InMemoryUserRepository(store), InMemoryOrderRepository(store)
+    unpaid: List = []
+
+    async def setup(count):
+        if store.users:
+            return
+        async with ctx.session_factory() as session:
+            for user in await UserRepository(session).find_all():
+                await users.save(user)
+            tables = OrderRepository(session)
+            for order_id in ctx.dataset.order_ids:
+                await orders.save(await tables.find_by_id(order_id))
+
+    async def find_by_id(i):
+        assert await orders.find_by_id(ctx.order_id(i)) is not None
+
+    async def find_by_user(i):
+        await orders.find_by_user(ctx.user_id(i))
+
+    async def save_large(i):
+        order = Order(user_id=ctx.user_id(i))
+        for n in range(ctx.large_order_items):
+            order.add_item(f"Bulk item {n}", Decimal("9.99"), 1 + n % 3)
+        await orders.save(order)
+
+    async def setup_pay(count):
+        await setup(count)
+        unpaid[:] = []
+        for i in range(count):
+            order = Order(user_id=ctx.user_id(i))
+            await orders.save(order)
+            unpaid.append(order.id)
+
+    async def pay(i):
+        await OrderService(orders, users).pay_order(unpaid[i])
+
+    return [
+        Case("memory.order.find_by_id", find_by_id, iterations, setup),
+        Case("memory.order.find_by_user", find_by_user, iterations, setup),
+        Case(f"memory.order.save[{ctx.large_order_items} items]", save_large, max(3, iterations // 10), setup),
+        Case("memory.service.pay_order", pay, iterations, setup_pay),
+    ]
+
+
+def transition_cases(ctx: BenchContext, iterations: int) -> List[Case]:
+    """Every state transition through ``OrderService`` on freshly seeded orders."""
+    cases = []
+    for name, chain in (("pay", CREATED), ("cancel", CREATED), ("ship", PAID), ("complete", SHIPPED)):
+        ids: List = []
+
+        async def setup(count, chain=chain, ids=ids):
+            ids[:] = await ctx.fixtures(chain, count)
+
+        async def run(i, name=name, ids=ids):
+            async with ctx.session_factory() as session:
+                service = OrderService(OrderRepository(session), UserRepository(session))
+                await getattr(service, f"{name}_order")(ids[i])
+                await session.commit()
+
+        cases.append(Case(f"service.{name}_order", run, iterations, setup))
+    return cases
+
+
+def http_cases(ctx: BenchContext, client: AsyncClient, iterations: int) -> List[Case]:
+    """Full request path: routing, validation, services, repositories, serialization."""
+
+    def get(url_for, expected=200):
+        async def run(i):
+            response = await client.get(url_for(i))
+            assert response.status_code == expected, response.text
+        return run
+
+    def post(url_for, body_for=lambda i: None, expected=200, fixture_chain=None):
+        ids: List = []
+
+        async def setup(count):
+            if fixture_chain is not None:
+                ids[:] = await ctx.fixtures(fixture_chain, count)
+
+        async def run(i):
+            target = ids[i] if ids else i
+            response = await client.post(url_for(target), json=body_for(i))
+            assert response.status_code == expected, response.text
+
+        return run, setup
+
+    cases = [
+        Case("http.GET /api/users/{id}", get(lambda i: f"/api/users/{ctx.user_id(i)}"), iterations),
+        Case("http.GET /api/users/{id}/summary", get(lambda i: f"/api/users/{ctx.user_id(i)}/summary"), iterations),
+        Case("http.GET /api/orders/{id}", get(lambda i: f"/api/orders/{ctx.order_id(i)}"), iterations),
+        Case("http.GET /api/orders/{id}?items_limit=20",
+             get(lambda i: f"/api/orders/{ctx.order_id(i)}?items_limit=20"), iterations),
+        Case("http.GET /api/orders/{id}/items?limit=20",
+             get(lambda i: f"/api/orders/{ctx.order_id(i)}/items?limit=20"), iterations),
+        Case("http.GET /api/orders/{id}/history", get(lambda i: f"/api/orders/{ctx.order_id(i)}/history"), iterations),
+        Case("http.GET /api/orders?user_id", get(lambda i: f"/api/orders?user_id={ctx.user_id(i)}"), iterations),
+        Case("http.GET /api/orders", get(lambda i: "/api/orders"), max(3, iterations // 50)),
+        Case("http.GET /api/stats/revenue", get(lambda i: "/api/stats/revenue"), iterations),
+    ]
+    writes = [
+        ("http.POST /api/users", lambda i: "/api/users",
+         lambda i: {"email": f"http{i}@bench.example", "name": "Bench"}, 201, None),
+        ("http.POST /api/orders", lambda i: "/api/orders",
+         lambda i: {"user_id": str(ctx.user_id(i))}, 201, None),
+        ("http.POST /api/orders/{id}/items", lambda oid: f"/api/orders/{oid}/items",
+         lambda i: {"product_name": "Bench item", "price": "19.99", "quantity": 2}, 201, CREATED),
+        ("http.POST /api/orders/{id}/pay", lambda oid: f"/api/orders/{oid}/pay", lambda i: None, 200, CREATED),
+        ("http.POST /api/orders/{id}/cancel", lambda oid: f"/api/orders/{oid}/cancel", lambda i: None, 200, CREATED),
+        ("http.POST /api/orders/{id}/ship", lambda oid: f"/api/orders/{oid}/ship", lambda i: None, 200, PAID),
+        ("http.POST /api/orders/{id}/complete", lambda oid: f"/api/orders/{oid}/complete", lambda i: None, 200, SHIPPED),
+    ]
+    for name, url_for, body_for, expected, chain in writes:
+        run, setup = post(url_for, body_for, expected, chain)
+        cases.append(Case(name, run, iterations, setup))
+    return cases
+
+
+def startup_cases(ctx: BenchContext, iterations: int) -> List[Case]:
+    """Cold start of a fresh interpreter: import, lifespan, first vs. steady request.
+
+    Every iteration spawns ``python -m benchmarks.startup`` once; the cases share
+    its measurements.
+    """
+    probes: Dict[int, dict] = {}
+
+    async def probe(i: int) -> dict:
+        if i not in probes:
+            order_ids = [str(ctx.order_id(i * 31 + n)) for n in range(21)]
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "benchmarks.startup", ctx.database_url, *order_ids,
+                stdout=asyncio.subprocess.PIPE,
+            )
+            stdout, _ = await process.communicate()
+            assert process.returncode == 0, "startup probe failed"
+            probes[i] = json.loads(stdout)
+        return probes[i]
+
+    def metric(key):
+        async def run(i):
+            return (await probe(i))[key]
+        return run
+
+    return [
+        Case("startup.import app.main", metric("import_ms"), iterations, warmup=1),
+        Case("startup.lifespan (pool warm-up)", metric("lifespan_ms"), iterations, warmup=1),
+        Case("startup.first request", metric("first_request_ms"), iterations, warmup=1),
+        Case("startup.steady request", metric("steady_request_ms"), iterations, warmup=1),
+    ]
@@ -0,0 +1,142 @@
+"""Deterministic benchmark datasets (users x orders x items x history)."""
+
+import random
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from app.domain.order import OrderStatus
+from app.infrastructure.repositories import OrderStatsRepository, ProductRepository, UserOrderStatsRepository
+
+# Status chains an order can have; the last element is its current status.
+CHAINS = [
+    (OrderStatus.CREATED,),
+    (OrderStatus.CREATED, OrderStatus.PAID),
+    (OrderStatus.CREATED, OrderStatus.PAID, OrderStatus.SHIPPED),
+    (OrderStatus.CREATED, OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.COMPLETED),
+    (OrderStatus.CREATED, OrderStatus.CANCELLED),
+]
+
+PRODUCTS = [f"Product {i:04d}" for i in range(500)]
+EPOCH = datetime(2024, 1, 1)
+CHUNK = 1000
+
+
+@dataclass
+class DatasetSpec:
+    users: int = 200
+    orders_per_user: int = 5
+    items_per_order: int = 5
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    spec: DatasetSpec
+    user_ids: List[uuid.UUID] = field(default_factory=list)
+    order_ids: List[uuid.UUID] = field(default_factory=list)
+
+    def describe(self) -> Dict[str, int]:
+        return asdict(self.spec)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+INSERT_USER = text("INSERT INTO users (id, email, name, created_at) VALUES (:id, :email, :name, :created_at)")
+INSERT_ORDER = text(
+    "INSERT INTO orders (id, user_id, status, total_amount, created_at) "
+    "VALUES (:id, :user_id, :status, :total_amount, :created_at)"
+)
+INSERT_ITEM = text(
+    "INSERT INTO order_items (id, order_id, product_id, price, quantity, line_no) "
+    "VALUES (:id, :order_id, :product_id, :price, :quantity, :line_no)"
+)
+INSERT_HISTORY = text(
+    "INSERT INTO order_status_history (id, order_id, status, changed_at) "
+    "VALUES (:id, :order_id, :status, :changed_at)"
+)
+
+
+async def _insert(session, statement, rows: List[dict]) -> None:
+    for start in range(0, len(rows), CHUNK):
+        await session.execute(statement, rows[start:start + CHUNK])
+
+
+async def reset(session) -> None:
+    """Empty every table the benchmarks write to; the product catalogue is kept."""
+    if session.get_bind().dialect.name == "postgresql":
+        await session.execute(text(
+            "TRUNCATE users, orders, order_items, order_status_history, orders_archive, order_items_archive,"
+            " order_status_history_archive, order_documents, change_log, order_daily_stats, user_order_stats CASCADE"
+        ))
+    else:
+        for table in ("order_documents", "change_log", "order_daily_stats", "user_order_stats",
+                      "order_status_history_archive", "order_items_archive", "orders_archive",
+                      "order_status_history", "order_items", "orders", "users"):
+            await session.execute(text(f"DELETE FROM {table}"))
+    await session.commit()
+
+
+async def seed(session, spec: DatasetSpec) -> Dataset:
+    """Insert ``spec`` worth of consistent data and return the generated ids."""
+    rng = random.Random(spec.seed)
+    dataset = Dataset(spec)
+    products = await ProductRepository(session).resolve(PRODUCTS)
+    users, orders, items, history = [], [], [], []
+    for u in range(spec.users):
+        user_id = _uuid(rng)
+        dataset.user_ids.append(user_id)
+        users.append({"id": user_id, "email": f"user{u}@bench.example", "name": f"User {u}",
+                      "created_at": EPOCH + timedelta(minutes=u)})
+        for _ in range(spec.orders_per_user):
+            order_id = _uuid(rng)
+            dataset.order_ids.append(order_id)
+            created_at = EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+            total = Decimal("0")
+            for line_no in range(spec.items_per_order):
+                price = Decimal(rng.randrange(100, 100_000)) / 100
+                quantity = rng.randint(1, 5)
+                total += price * quantity
+                items.append({"id": _uuid(rng), "order_id": order_id, "product_id": products[rng.choice(PRODUCTS)],
+                              "price": float(price), "quantity": quantity, "line_no": line_no})
+            chain = rng.choice(CHAINS)
+            for step, status in enumerate(chain):
+                history.append({"id": _uuid(rng), "order_id": order_id, "status": status.value,
+                                "changed_at": created_at + timedelta(hours=step)})
+            orders.append({"id": order_id, "user_id": user_id, "status": chain[-1].value,
+                           "total_amount": float(total), "created_at": created_at})
+    await _insert(session, INSERT_USER, users)
+    await _insert(session, INSERT_ORDER, orders)
+    await _insert(session, INSERT_ITEM, items)
+    await _insert(session, INSERT_HISTORY, history)
+    await OrderStatsRepository(session).rebuild()
+    await UserOrderStatsRepository(session).rebuild()
+    await session.commit()
+    return dataset
+
+
+async def seed_orders_in_status(session, user_id: uuid.UUID, chain, count: int, rng: random.Random) -> List[uuid.UUID]:
+    """Create ``count`` single-item orders whose history follows ``chain``."""
+    orders, items, history, ids = [], [], [], []
+    fixture = (await ProductRepository(session).resolve(["Fixture"]))["Fixture"]
+    for _ in range(count):
+        order_id = _uuid(rng)
+        ids.append(order_id)
+        orders.append({"id": order_id, "user_id": user_id, "status": chain[-1].value,
+                       "total_amount": 10.0, "created_at": datetime.now()})
+        items.append({"id": _uuid(rng), "order_id": order_id, "product_id": fixture,
+                      "price": 10.0, "quantity": 1, "line_no": 0})
+        for step, status in enumerate(chain):
+            history.append({"id": _uuid(rng), "order_id": order_id, "status": status.value,
+                            "changed_at": datetime.now() + timedelta(microseconds=step)})
+    await _insert(session, INSERT_ORDER, orders)
+    await _insert(session, INSERT_ITEM, items)
+    await _insert(session, INSERT_HISTORY, history)
+    await session.commit()
+    return ids
@@ -0,0 +1,115 @@
+"""Timing loop, latency statistics and baseline comparison."""
+
+import json
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+PERCENTILES = (50, 90, 95, 99)
+COMPARED_METRICS = ("p50_ms", "p95_ms")
+
+
+@dataclass
+class Case:
+    """One benchmark: ``run(i)`` is awaited ``warmup + iterations`` times.
+
+    ``run`` may return its own measurement in milliseconds (e.g. taken inside a
+    subprocess); otherwise the wall time of the call is recorded.
+    """
+
+    name: str
+    run: Callable[[int], Awaitable[Optional[float]]]
+    iterations: int
+    setup: Optional[Callable[[int], Awaitable[None]]] = None
+    warmup: Optional[int] = None
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = (len(sorted_samples) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_samples) - 1)
+    return sorted_samples[low] + (sorted_samples[high] - sorted_samples[low]) * (rank - low)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    total_s = sum(ordered) / 1000
+    summary = {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+        "stdev_ms": statistics.pstdev(ordered),
+        "ops_per_sec": len(ordered) / total_s if total_s else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = percentile(ordered, pct)
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in summary.items()}
+
+
+async def measure(case: Case, warmup: int) -> Dict[str, float]:
+    if case.warmup is not None:
+        warmup = case.warmup
+    if case.setup is not None:
+        await case.setup(warmup + case.iterations)
+    for i in range(warmup):
+        await case.run(i)
+    samples = []
+    for i in range(warmup, warmup + case.iterations):
+        started = time.perf_counter()
+        reported = await case.run(i)
+        samples.append(reported if reported is not None else (time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+    min_delta_ms: float = 0.05,
+) -> List[str]:
+    """Human-readable regressions of ``current`` against ``baseline``.
+
+    A metric regresses when it is more than ``tolerance`` (relative) and more than
+    ``min_delta_ms`` (absolute) slower than the baseline; the absolute floor keeps
+    sub-millisecond noise from failing the run.
+    """
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        result = current.get(name)
+        if result is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = base[metric], result[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta_ms:
+                regressions.append(
+                    f"{name}: {metric} {before:.3f}ms -> {after:.3f}ms (+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def load_report(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def format_table(results: Dict[str, Dict[str, float]]) -> str:
+    header = f"{'benchmark':<42} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<42} {r['count']:>6} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+            f"{r['p99_ms']:>9.3f} {r['ops_per_sec']:>10.1f}"
+        )
+    return "\n".join(lines)
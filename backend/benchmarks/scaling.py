@@ -0,0 +1,120 @@
+"""Throughput vs. worker processes: ``python -m benchmarks.scaling``.
+
+Starts ``python -m app.serve --workers N`` for every N in ``--workers``, drives
+it with the load-test driver (``app.tools.loadtest``) for ``--duration``
+seconds and prints throughput and latency per worker count. The database
+connection budget (``--db-max-connections``) stays the same for every run, as
+in production, so the table shows what extra processes buy for a fixed pool.
+
+The driver itself runs in this process; on machines with more than a few
+cores give it a core of its own (e.g. ``taskset``) or it becomes the bottleneck.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from app.tools.loadtest import LoadSpec, run_load
+
+from .harness import write_report
+from .run import BENCH_DIR
+
+WATCHED = ("POST /api/orders/{order_id}/pay", "GET /api/orders/{order_id}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(url: str, server: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise SystemExit(f"server exited with code {server.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("server did not become ready")
+
+
+async def measure_workers(args, workers: int) -> dict:
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": args.database_url}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--db-max-connections", str(args.db_max_connections), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        await _wait_ready(url, server)
+        spec = LoadSpec(concurrency=args.concurrency, duration=args.duration, seed=workers)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=30, limits=limits) as client:
+            return await run_load(client, spec)
+    finally:
+        server.terminate()
+        server.wait(timeout=args.duration + 30)
+
+
+def format_scaling(rows: dict) -> str:
+    header = f"{'workers':>7} {'ops/s':>9} {'speedup':>8}" + "".join(f" {name + ' p95':>42}" for name in WATCHED)
+    lines = [header, "-" * len(header)]
+    base = None
+    for workers, report in rows.items():
+        base = base or report["throughput_ops"]
+        cells = "".join(f" {report['endpoints'].get(name, {}).get('p95_ms', 0):>39.2f} ms" for name in WATCHED)
+        lines.append(f"{workers:>7} {report['throughput_ops']:>9.1f} {report['throughput_ops'] / base:>7.2f}x{cells}")
+    return "\n".join(lines)
+
+
+async def run(args) -> int:
+    if args.create_schema:
+        from app.infrastructure.db import make_engine
+        from app.infrastructure.schema import create_schema
+
+        engine = make_engine(args.database_url)
+        await create_schema(engine)
+        await engine.dispose()
+    rows = {}
+    for workers in args.workers:
+        print(f"workers={workers} ...", flush=True)
+        rows[workers] = await measure_workers(args, workers)
+    print(format_scaling(rows))
+    write_report(args.output, {
+        "meta": {"cpus": os.cpu_count(), "concurrency": args.concurrency, "duration": args.duration,
+                 "db_max_connections": args.db_max_connections},
+        "results": {str(w): report for w, report in rows.items()},
+    })
+    print(f"\nreport written to {args.output}")
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scaling", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"), required=not os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument("--workers", type=lambda v: [int(n) for n in v.split(",")], default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--db-max-connections", type=int, default=40)
+    parser.add_argument("--output", type=Path, default=BENCH_DIR / "results" / "scaling.json")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,46 @@
+"""Cold-start probe, run in a fresh interpreter: ``python -m benchmarks.startup URL ORDER_ID...``.
+
+Prints one JSON object with the time to import ``app.main``, to run the
+application lifespan (engine creation and pool warm-up), the latency of the
+first ``GET /api/orders/{id}`` and the median latency of the following ones.
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+_started = time.perf_counter()
+
+
+async def probe(database_url: str, order_ids) -> dict:
+    import_started = time.perf_counter()
+    from app.main import create_app
+    from app.settings import Settings
+    import_ms = (time.perf_counter() - import_started) * 1000
+
+    from httpx import ASGITransport, AsyncClient
+
+    app = create_app(Settings.from_env(database_url=database_url))
+    lifespan_started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        lifespan_ms = (time.perf_counter() - lifespan_started) * 1000
+        latencies = []
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://startup") as client:
+            for order_id in order_ids:
+                started = time.perf_counter()
+                response = await client.get(f"/api/orders/{order_id}")
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+    return {
+        "import_ms": import_ms,
+        "lifespan_ms": lifespan_ms,
+        "first_request_ms": latencies[0],
+        "steady_request_ms": statistics.median(latencies[1:]),
+        "total_ms": (time.perf_counter() - _started) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(probe(sys.argv[1], sys.argv[2:]))))
@@ -0,0 +1,23 @@
+-- ============================================
+-- Журнал изменений (outbox) для инкрементальной синхронизации
+-- ============================================
+-- Строка пишется в той же транзакции, что и изменение пользователя или заказа
+-- (UserRepository.save / OrderRepository.save).
+--
+-- seq выдаётся при вставке, а не при коммите, поэтому строка с меньшим seq может
+-- стать видимой позже строки с большим. Чтобы потребитель не пропускал такие
+-- строки, чтение идёт по (txid, seq) и отдаёт только транзакции, которые
+-- старше самой старой активной (txid < pg_snapshot_xmin(pg_current_snapshot())):
+-- после этого ни одна новая строка уже не может оказаться перед курсором.
+
+CREATE TABLE IF NOT EXISTS change_log (
+    seq BIGSERIAL PRIMARY KEY,
+    txid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    entity TEXT NOT NULL CHECK (entity IN ('user', 'order')),
+    entity_id UUID NOT NULL,
+    op TEXT NOT NULL,
+    data JSONB NOT NULL DEFAULT '{}'::jsonb,
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_txid_seq ON change_log (txid, seq);
@@ -0,0 +1,17 @@
+-- ============================================
+-- Поиск заказов по названию товара
+-- ============================================
+-- GET /api/orders/search ищет подстроку без учёта регистра (ILIKE '%...%').
+-- Обычный B-tree такой запрос не ускоряет; GIN-индекс по триграммам (pg_trgm)
+-- обслуживает ILIKE с ведущим '%' для образцов от трёх символов.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_order_items_product_name_trgm
+    ON order_items USING GIN (product_name gin_trgm_ops);
+
+-- Проверка EXISTS по позициям конкретного заказа (поиск с фильтром user_id)
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id);
+
+-- Заказы пользователя в порядке выдачи результатов: новые первыми
+CREATE INDEX IF NOT EXISTS idx_orders_user_id_created_at ON orders (user_id, created_at DESC, id DESC);
@@ -0,0 +1,48 @@
+-- ============================================
+-- Справочник товаров: order_items ссылается на products.id вместо текста
+-- ============================================
+-- Название хранится один раз, позиции заказа — 8-байтовый идентификатор.
+-- Идентификаторы выдаёт OrderRepository.save (пакетный upsert по названиям с кэшем);
+-- в API и домене позиция по-прежнему имеет product_name.
+
+CREATE TABLE IF NOT EXISTS products (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+        CHECK (name <> ''),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS product_id BIGINT REFERENCES products(id);
+
+-- Перенос существующих позиций: выполняется один раз, пока в order_items есть product_name.
+-- Триггер пересчёта total_amount на время переноса отключён: суммы не меняются,
+-- а пересчёт на каждую строку сделал бы перенос квадратичным.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'order_items' AND column_name = 'product_name'
+    ) THEN
+        INSERT INTO products (name)
+        SELECT DISTINCT product_name FROM order_items
+        ON CONFLICT (name) DO NOTHING;
+
+        ALTER TABLE order_items DISABLE TRIGGER trigger_recalculate_total_amount;
+        UPDATE order_items i
+        SET product_id = p.id
+        FROM products p
+        WHERE i.product_id IS NULL AND p.name = i.product_name;
+        ALTER TABLE order_items ENABLE TRIGGER trigger_recalculate_total_amount;
+
+        ALTER TABLE order_items ALTER COLUMN product_id SET NOT NULL;
+        -- Вместе со столбцом удаляется и его триграммный индекс из 003_product_search.sql
+        ALTER TABLE order_items DROP COLUMN product_name;
+    END IF;
+END $$;
+
+-- Агрегаты по товару и поиск позиций по найденным товарам
+CREATE INDEX IF NOT EXISTS idx_order_items_product_id ON order_items (product_id);
+
+-- Поиск по подстроке названия (GET /api/orders/search); заменяет индекс
+-- idx_order_items_product_name_trgm из 003_product_search.sql
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
@@ -0,0 +1,33 @@
+-- ============================================
+-- Агрегаты для аналитики: заказы по дням и статусам
+-- ============================================
+-- OrderService обновляет строки инкрементально в той же транзакции, что и заказ:
+-- создание (+1 заказ), добавление товара (+сумма, +штуки), смена статуса
+-- (перенос заказа между статусами). Запросы /api/stats/* читают только эту
+-- таблицу, поэтому их стоимость зависит от числа дней, а не заказов.
+--
+-- slot разносит счётчики одного дня и статуса по нескольким строкам: иначе все
+-- транзакции, создающие заказы, ждали бы блокировку одной строки (day, 'created').
+-- Значение строки может быть отрицательным — смысл имеет только сумма по slot.
+-- day — дата создания заказа (UTC).
+
+CREATE TABLE IF NOT EXISTS order_daily_stats (
+    day DATE NOT NULL,
+    status TEXT NOT NULL REFERENCES order_statuses(status),
+    slot SMALLINT NOT NULL DEFAULT 0,
+    orders BIGINT NOT NULL DEFAULT 0,
+    amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    items BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status, slot)
+);
+
+-- Первичное заполнение по существующим заказам (пока таблица пуста)
+INSERT INTO order_daily_stats (day, status, slot, orders, amount, items)
+SELECT (o.created_at AT TIME ZONE 'UTC')::date, o.status, 0,
+       COUNT(*), SUM(o.total_amount), COALESCE(SUM(i.items), 0)
+FROM orders o
+LEFT JOIN (
+    SELECT order_id, SUM(quantity) AS items FROM order_items GROUP BY order_id
+) i ON i.order_id = o.id
+WHERE NOT EXISTS (SELECT 1 FROM order_daily_stats)
+GROUP BY 1, 2;
@@ -0,0 +1,29 @@
+-- ============================================
+-- Счётчики заказов пользователя для карточки клиента
+-- ============================================
+-- Обновляются OrderService в той же транзакции, что и заказ: создание
+-- (+1 заказ, last_order_at), оплата (+1 оплаченный, +сумма), отмена (+1 отменённый),
+-- добавление товара в оплаченный заказ (+сумма). GET /api/users/{id}/summary читает
+-- одну строку вместо всех заказов пользователя. Расхождения с orders находит и
+-- исправляет python -m app.tools.reconcile.
+
+CREATE TABLE IF NOT EXISTS user_order_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    orders BIGINT NOT NULL DEFAULT 0,
+    paid_orders BIGINT NOT NULL DEFAULT 0,
+    paid_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    cancelled_orders BIGINT NOT NULL DEFAULT 0,
+    last_order_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Первичное заполнение по существующим заказам (пока таблица пуста)
+INSERT INTO user_order_stats (user_id, orders, paid_orders, paid_amount, cancelled_orders, last_order_at)
+SELECT user_id,
+       COUNT(*),
+       COUNT(*) FILTER (WHERE status IN ('paid', 'shipped', 'completed')),
+       COALESCE(SUM(total_amount) FILTER (WHERE status IN ('paid', 'shipped', 'completed')), 0),
+       COUNT(*) FILTER (WHERE status = 'cancelled'),
+       MAX(created_at)
+FROM orders
+WHERE NOT EXISTS (SELECT 1 FROM user_order_stats)
+GROUP BY user_id;
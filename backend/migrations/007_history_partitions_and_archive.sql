@@ -0,0 +1,135 @@
+-- ============================================
+-- Секционирование order_status_history по месяцам и архив завершённых заказов
+-- ============================================
+-- История статусов только растёт, поэтому она секционирована по changed_at
+-- (одна секция на месяц, UTC). Секции создаются заранее на три месяца вперёд —
+-- при каждом запуске миграций и задачей архивации (python -m app.tools.archive);
+-- строка вне существующих секций попадает в секцию DEFAULT и переносится
+-- в месячную секцию при её создании.
+--
+-- Задача архивации переносит завершённые и отменённые заказы старше срока хранения
+-- вместе с позициями и историей в таблицы *_archive. Горячие таблицы и их индексы
+-- остаются небольшими, а опустевшие старые секции истории удаляются целиком
+-- вместо VACUUM. OrderRepository.find_by_id при промахе ищет заказ в архиве.
+
+CREATE TABLE IF NOT EXISTS orders_archive (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id),
+    status TEXT NOT NULL REFERENCES order_statuses(status),
+    total_amount NUMERIC(10, 2) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_orders_archive_user_id ON orders_archive (user_id);
+
+CREATE TABLE IF NOT EXISTS order_items_archive (
+    id UUID PRIMARY KEY,
+    order_id UUID NOT NULL REFERENCES orders_archive(id) ON DELETE CASCADE,
+    product_id BIGINT NOT NULL REFERENCES products(id),
+    price NUMERIC(10, 2) NOT NULL,
+    quantity INT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_order_items_archive_order_id ON order_items_archive (order_id);
+
+CREATE TABLE IF NOT EXISTS order_status_history_archive (
+    id UUID PRIMARY KEY,
+    order_id UUID NOT NULL REFERENCES orders_archive(id) ON DELETE CASCADE,
+    status TEXT NOT NULL REFERENCES order_statuses(status),
+    changed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_order_status_history_archive_order_id
+    ON order_status_history_archive (order_id, changed_at);
+
+-- Месячные секции [from_date, to_date]; возвращает число созданных.
+CREATE OR REPLACE FUNCTION ensure_order_status_history_partitions(from_date DATE, to_date DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::date;
+    lower_bound TIMESTAMPTZ;
+    upper_bound TIMESTAMPTZ;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        part_name := 'order_status_history_' || to_char(month_start, '"y"YYYY"m"MM');
+        lower_bound := month_start::timestamp AT TIME ZONE 'UTC';
+        upper_bound := (month_start + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE order_status_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                           part_name);
+            -- Строки, попавшие в DEFAULT до появления секции, иначе ATTACH не пройдёт
+            EXECUTE format('WITH moved AS (DELETE FROM order_status_history_default '
+                           'WHERE changed_at >= %L AND changed_at < %L RETURNING *) '
+                           'INSERT INTO %I SELECT * FROM moved', lower_bound, upper_bound, part_name);
+            EXECUTE format('ALTER TABLE order_status_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           part_name, lower_bound, upper_bound);
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Удаляет пустые месячные секции, целиком лежащие до before_date; возвращает их число.
+CREATE OR REPLACE FUNCTION drop_empty_order_status_history_partitions(before_date DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    is_empty BOOLEAN;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'order_status_history'::regclass
+          AND c.relname ~ '^order_status_history_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(substring(c.relname FROM 'y([0-9]{4}m[0-9]{2})$'), 'YYYY"m"MM')
+              + INTERVAL '1 month' <= before_date
+    LOOP
+        EXECUTE format('SELECT NOT EXISTS (SELECT 1 FROM %I)', part.relname) INTO is_empty;
+        IF is_empty THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Однократное преобразование обычной таблицы в секционированную
+DO $$
+DECLARE
+    first_change DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'order_status_history'::regclass) = 'r' THEN
+        ALTER TABLE order_status_history RENAME TO order_status_history_unpartitioned;
+        ALTER TABLE order_status_history_unpartitioned
+            RENAME CONSTRAINT order_status_history_pkey TO order_status_history_unpartitioned_pkey;
+
+        -- Ключ секционирования обязан входить в первичный ключ
+        CREATE TABLE order_status_history (
+            id UUID NOT NULL DEFAULT uuid_generate_v4(),
+            order_id UUID NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+            status TEXT NOT NULL REFERENCES order_statuses(status),
+            changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (id, changed_at)
+        ) PARTITION BY RANGE (changed_at);
+        CREATE TABLE order_status_history_default PARTITION OF order_status_history DEFAULT;
+
+        SELECT MIN(changed_at)::date INTO first_change FROM order_status_history_unpartitioned;
+        PERFORM ensure_order_status_history_partitions(COALESCE(first_change, CURRENT_DATE), CURRENT_DATE);
+        INSERT INTO order_status_history (id, order_id, status, changed_at)
+        SELECT id, order_id, status, COALESCE(changed_at, NOW()) FROM order_status_history_unpartitioned;
+        DROP TABLE order_status_history_unpartitioned;
+    END IF;
+END $$;
+
+-- История заказа (find_by_id, проверка повторной оплаты); индекс создаётся в каждой секции
+CREATE INDEX IF NOT EXISTS idx_order_status_history_order_id ON order_status_history (order_id, changed_at);
+
+SELECT ensure_order_status_history_partitions(CURRENT_DATE, (CURRENT_DATE + INTERVAL '3 months')::date);
@@ -0,0 +1,10 @@
+-- ============================================
+-- Постраничное чтение позиций заказа
+-- ============================================
+-- GET /api/orders/{id}/items читает позиции порциями по возрастанию id
+-- (WHERE order_id = ? AND id > ? ORDER BY id LIMIT ?). Составной индекс отдаёт
+-- страницу большого заказа без сортировки всех его позиций.
+-- История статусов уже покрыта idx_order_status_history_order_id (order_id, changed_at).
+
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id_id ON order_items (order_id, id);
+CREATE INDEX IF NOT EXISTS idx_order_items_archive_order_id_id ON order_items_archive (order_id, id);
@@ -0,0 +1,29 @@
+-- ============================================
+-- Заказ одним документом (ORDER_STORAGE=document)
+-- ============================================
+-- Альтернативная схема хранения для DocumentOrderRepository: позиции и история
+-- заказа лежат в JSONB рядом с полями заказа. Чтение заказа — один запрос по
+-- первичному ключу, запись — один INSERT ... ON CONFLICT вместо 2 + N команд.
+-- Поля, по которым идут запросы, вынесены в обычные колонки; число позиций и
+-- записей истории вычисляются из документа (генерируемые колонки).
+-- Таблица заполняется только в режиме document; табличная схема (orders,
+-- order_items, order_status_history) при этом не используется.
+
+CREATE TABLE IF NOT EXISTS order_documents (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id),
+    status TEXT NOT NULL REFERENCES order_statuses(status),
+    total_amount NUMERIC(10, 2) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    doc JSONB NOT NULL,
+    items_count INTEGER GENERATED ALWAYS AS (jsonb_array_length(doc -> 'items')) STORED,
+    history_count INTEGER GENERATED ALWAYS AS (jsonb_array_length(doc -> 'history')) STORED
+);
+
+-- Заказы пользователя, новые первыми (как idx_orders_user_id_created_at)
+CREATE INDEX IF NOT EXISTS idx_order_documents_user_id_created_at
+    ON order_documents (user_id, created_at DESC, id DESC);
+
+-- Поиск заказов с точным товаром: doc -> 'items' @> '[{"product_name": "..."}]'
+CREATE INDEX IF NOT EXISTS idx_order_documents_items
+    ON order_documents USING GIN ((doc -> 'items') jsonb_path_ops);
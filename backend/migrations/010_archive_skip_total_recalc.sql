@@ -0,0 +1,16 @@
+-- ============================================
+-- Архивация без пересчёта сумм удаляемых заказов
+-- ============================================
+-- OrderRepository.archive_batch удаляет позиции перенесённых в архив заказов.
+-- Триггер пересчёта total_amount срабатывал на каждую удалённую строку: SUM по
+-- оставшимся позициям и UPDATE заказа, который удаляется следующей командой.
+-- Теперь триггер пропускается, пока в транзакции установлен
+-- app.skip_total_recalc = 'on' (set_config(..., true), только до конца
+-- транзакции). В отличие от DISABLE TRIGGER это не требует блокировки таблицы.
+
+DROP TRIGGER IF EXISTS trigger_recalculate_total_amount ON order_items;
+CREATE TRIGGER trigger_recalculate_total_amount
+    AFTER INSERT OR UPDATE OR DELETE ON order_items
+    FOR EACH ROW
+    WHEN (current_setting('app.skip_total_recalc', true) IS DISTINCT FROM 'on')
+    EXECUTE FUNCTION recalculate_total_amount();
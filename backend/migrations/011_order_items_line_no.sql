@@ -0,0 +1,46 @@
+-- ============================================
+-- Порядок позиций заказа: номер строки вместо случайного id
+-- ============================================
+-- Позиции выдаются и листаются (GET /api/orders/{id}/items, ?items_limit=) в
+-- порядке добавления. id позиции — случайный UUID4 и порядка не задаёт, поэтому
+-- OrderRepository.save записывает в line_no номер позиции в заказе, а чтение
+-- сортирует по (line_no, id); id различает строки с одинаковым номером, если
+-- две транзакции добавили позиции в заказ одновременно.
+-- Порядок добавления уже сохранённых позиций неизвестен: им номера выдаются по
+-- возрастанию id, один раз при добавлении столбца. Триггер пересчёта
+-- total_amount при этом пропускается (010_archive_skip_total_recalc.sql).
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'order_items' AND column_name = 'line_no'
+    ) THEN
+        ALTER TABLE order_items ADD COLUMN line_no INTEGER NOT NULL DEFAULT 0;
+        PERFORM set_config('app.skip_total_recalc', 'on', true);
+        UPDATE order_items i
+        SET line_no = n.line_no
+        FROM (SELECT id, row_number() OVER (PARTITION BY order_id ORDER BY id) - 1 AS line_no
+              FROM order_items) n
+        WHERE n.id = i.id;
+        PERFORM set_config('app.skip_total_recalc', 'off', true);
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'order_items_archive' AND column_name = 'line_no'
+    ) THEN
+        ALTER TABLE order_items_archive ADD COLUMN line_no INTEGER NOT NULL DEFAULT 0;
+        UPDATE order_items_archive i
+        SET line_no = n.line_no
+        FROM (SELECT id, row_number() OVER (PARTITION BY order_id ORDER BY id) - 1 AS line_no
+              FROM order_items_archive) n
+        WHERE n.id = i.id;
+    END IF;
+END $$;
+
+-- Keyset-страницы по (line_no, id) вместо (id) из 008_order_items_keyset.sql
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id_line_no ON order_items (order_id, line_no, id);
+CREATE INDEX IF NOT EXISTS idx_order_items_archive_order_id_line_no ON order_items_archive (order_id, line_no, id);
+DROP INDEX IF EXISTS idx_order_items_order_id_id;
+DROP INDEX IF EXISTS idx_order_items_archive_order_id_id;
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 
 const API_URL = '/api'
 
@@ -6,6 +6,7 @@ function App() {
   const [activeTab, setActiveTab] = useState('users')
   const [users, setUsers] = useState([])
   const [orders, setOrders] = useState([])
+  const ordersRef = useRef(orders)
   const [error, setError] = useState(null)
   const [success, setSuccess] = useState(null)
   const [loading, setLoading] = useState(false)
@@ -25,7 +26,20 @@ function App() {
 
   useEffect(() => {
     fetchUsers()
-    fetchOrders()
+  }, [])
+
+  useEffect(() => {
+    ordersRef.current = orders
+  }, [orders])
+
+  // Orders are loaded once per (re)connection of the event stream and then
+  // patched from its events instead of being refetched after every action.
+  useEffect(() => {
+    const source = new EventSource(`${API_URL}/orders/stream`)
+    source.onopen = () => fetchOrders()
+    source.addEventListener('order', (e) => applyOrderEvent(JSON.parse(e.data)))
+    source.addEventListener('resync', () => fetchOrders())
+    return () => source.close()
   }, [])
 
   const showError = (msg) => {
@@ -63,6 +77,61 @@ function App() {
     }
   }
 
+  const fetchOrder = async (orderId) => {
+    try {
+      const res = await fetch(`${API_URL}/orders/${orderId}`)
+      if (res.ok) {
+        const { status_history, ...order } = await res.json()
+        upsertOrder(order)
+      }
+    } catch (e) {
+      console.error('Failed to fetch order:', e)
+    }
+  }
+
+  const upsertOrder = (order) => {
+    setOrders((current) => {
+      const index = current.findIndex((o) => o.id === order.id)
+      if (index === -1) return [...current, order]
+      const next = [...current]
+      next[index] = { ...current[index], ...order }
+      return next
+    })
+  }
+
+  const applyOrderEvent = (event) => {
+    const known = ordersRef.current.some((o) => o.id === event.order_id)
+    if (!known && event.type !== 'order_created') {
+      // Created before the list was loaded: fetch just this order
+      fetchOrder(event.order_id)
+      return
+    }
+    setOrders((current) => {
+      const index = current.findIndex((o) => o.id === event.order_id)
+      if (index === -1) {
+        return [...current, {
+          id: event.order_id,
+          user_id: event.user_id,
+          status: event.status,
+          total_amount: event.total_amount,
+          created_at: event.created_at,
+          items: [],
+        }]
+      }
+      const order = current[index]
+      let items = order.items || []
+      if (event.item) {
+        // A merged add reports the existing line with its new quantity
+        items = items.some((item) => item.id === event.item.id)
+          ? items.map((item) => (item.id === event.item.id ? event.item : item))
+          : [...items, event.item]
+      }
+      const next = [...current]
+      next[index] = { ...order, status: event.status, total_amount: event.total_amount, items }
+      return next
+    })
+  }
+
   const createUser = async (e) => {
     e.preventDefault()
     setLoading(true)
@@ -102,7 +171,7 @@ function App() {
       })
       if (res.ok) {
         showSuccess('Order created successfully!')
-        fetchOrders()
+        upsertOrder(await res.json())
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to create order')
@@ -135,7 +204,7 @@ function App() {
         setProductName('')
         setProductPrice('')
         setProductQuantity('1')
-        fetchOrders()
+        // The item_added event carries the new item and the order total
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to add item')
@@ -154,7 +223,7 @@ function App() {
       })
       if (res.ok) {
         showSuccess('Order paid successfully!')
-        fetchOrders()
+        upsertOrder(await res.json())
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to pay order')
@@ -173,7 +242,7 @@ function App() {
       })
       if (res.ok) {
         showSuccess('Order cancelled!')
-        fetchOrders()
+        upsertOrder(await res.json())
       } else {
         const data = await res.json()
         showError(data.detail || 'Failed to cancel order')